@@ -0,0 +1,206 @@
+import json
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.utils import build_q_object_from_lookup_parameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms import ModelChoiceField
+from django.utils.functional import cached_property
+
+from apps.moderation.scoring import ModeratedBy
+
+
+def estimate_count(queryset):
+    """
+    Estimate the number of rows of a queryset from PostgreSQL planner statistics instead of running COUNT(*).
+
+    Unfiltered querysets use pg_class.reltuples, filtered ones the row estimate of their query plan.
+    :param queryset: queryset to estimate
+    :return: estimated number of rows, or None if no estimate is available
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 for tables that have never been vacuumed or analyzed
+        return int(row[0]) if row and row[0] >= 0 else None
+
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses planner estimates instead of an exact COUNT(*) for results larger than
+    ADMIN_ESTIMATED_COUNT_THRESHOLD rows. Smaller results, where counting is cheap, are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+class AuthorAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Author list filter using the admin autocomplete widget, instead of rendering every user as a filter choice.
+    """
+    title = 'author'
+    parameter_name = 'author'
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        field = model._meta.get_field('author')
+        self.widget = AutocompleteSelect(field, model_admin.admin_site)
+        # Only the selected author, if any, is ever fetched to render the widget
+        self.widget.choices = ModelChoiceField(queryset=field.remote_field.model._default_manager.all()).choices
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None:
+            return queryset
+        if not value.isdigit():
+            return queryset.none()
+        return queryset.filter(author_id=value)
+
+    def lookup_parameters(self) -> dict:
+        """
+        :return: the filter as admin lookup parameters (field lookup -> values, any of which matches)
+        """
+        value = self.value()
+        if value is None:
+            return {}
+        return {'author_id': [int(value)]} if value.isdigit() else {'pk__in': [[]]}
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'All',
+        }
+
+    def rendered_widget(self):
+        value = self.value() if self.value() and self.value().isdigit() else None
+        return self.widget.render(self.parameter_name, value, attrs={'id': f'{self.parameter_name}-filter'})
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables with millions of rows: no exact full count, no facet counts, and estimated counts
+    for large result sets.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    @property
+    def media(self):
+        # The author filter isn't a form field, so its widget assets have to be added explicitly
+        return super().media + AutocompleteSelect(self.model._meta.get_field('author'), self.admin_site).media
+
+
+def action_filters(modeladmin, request, queryset) -> dict:
+    """
+    JSON serializable filters matching the rows an admin action runs on, for set_blocked.
+
+    Rows ticked on the changelist, one page at most, are passed by primary key. "Select all" passes the changelist's
+    lookup parameters and search term instead, so neither the admin request nor the task message carries the primary
+    keys of every matching row.
+    :param modeladmin: admin the action belongs to
+    :param request: request of the action
+    :param queryset: queryset the action was called with
+    :return: filters for filter_rows
+    """
+    if request.POST.get('select_across') != '1':
+        return {'pk__in': list(queryset.values_list('pk', flat=True))}
+
+    changelist = modeladmin.get_changelist_instance(request)
+    filter_specs, _, lookups, _, _ = changelist.get_filters(request)
+    for spec in filter_specs:
+        if isinstance(spec, admin.FieldListFilter):
+            lookups.update(spec.used_parameters)
+        else:
+            lookups.update(spec.lookup_parameters())
+    return {'lookups': lookups, 'search': changelist.query}
+
+
+def filter_rows(model, filters: dict):
+    """
+    :param model: model class
+    :param filters: queryset filter keyword arguments, or changelist filters from action_filters
+    :return: queryset of the matching rows
+    """
+    if 'lookups' not in filters:
+        return model.objects.filter(**filters)
+
+    queryset = model.objects.filter(build_q_object_from_lookup_parameters(filters['lookups']))
+    if filters['search']:
+        matches, may_have_duplicates = admin.site.get_model_admin(model).get_search_results(
+            None, queryset, filters['search']
+        )
+        # Bulk updates need a plain queryset, without the joins a search may add
+        queryset = model.objects.filter(pk__in=matches.values('pk')) if may_have_duplicates else matches
+    return queryset
+
+
+def set_blocked(modeladmin, request, filters: dict, is_blocked: bool, task):
+    """
+    Block or unblock the rows matching filters for an admin action.
+
+    Small sets are updated right away with a single UPDATE, anything above ADMIN_BULK_SYNC_LIMIT rows is handed over
+    to a chunked Celery task so the admin request doesn't hold locks on a huge set of rows.
+    :param modeladmin: admin of a model using BlockableQuerySet
+    :param request: request object
+    :param filters: JSON serializable queryset filter keyword arguments, or filters from action_filters
+    :param is_blocked: new value of is_blocked
+    :param task: Celery task taking (filters, is_blocked) that does the chunked update
+    """
+    queryset = filter_rows(modeladmin.model, filters)
+    verbose_name_plural = modeladmin.model._meta.verbose_name_plural
+    action = "blocked" if is_blocked else "unblocked"
+
+    pending = queryset.exclude(is_blocked=is_blocked).count()
+    if pending > settings.ADMIN_BULK_SYNC_LIMIT:
+        result = task.delay(filters, is_blocked)
+        modeladmin.message_user(
+            request,
+            f"{pending} {verbose_name_plural} will be {action} in the background (task {result.id}).",
+            messages.INFO,
+        )
+        return
+
+    updated = queryset.set_blocked(is_blocked)
+    modeladmin.message_user(request, f"{updated} {verbose_name_plural} {action}.", messages.SUCCESS)
+
+
+def save_changed_fields(obj, form, change):
+    """
+    Save only the fields an admin form actually changed.
+
+    A moderator flipping is_blocked from the changelist then issues a single-column UPDATE instead of a full-row save
+    re-running profanity detection. Blocking or unblocking by hand is recorded as a staff decision, which moderation
+    thresholds don't override.
+    """
+    if not change:
+        obj.save()
+    elif form.changed_data:
+        update_fields = [*form.changed_data, 'updated_at']
+        if 'is_blocked' in form.changed_data:
+            obj.moderated_by = ModeratedBy.STAFF
+            update_fields.append('moderated_by')
+        obj.save(update_fields=update_fields)
@@ -1,11 +1,44 @@
 from ninja import NinjaAPI
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
 
+from PostManagementAPI import metrics, task_metrics
+from PostManagementAPI.schemas.errors import ErrorSchema
+from PostManagementAPI.schemas.metrics import MetricsSchema
 from apps.users.api import router as users_router
 from apps.posts.api import router as posts_router
 from apps.comments.api import router as comments_router
+from apps.users.auth import JWTBearer
 
 api = NinjaAPI()
 
 api.add_router("/users/", users_router)
 api.add_router("/posts/", posts_router)
-api.add_router("/comments/", comments_router)
\ No newline at end of file
+api.add_router("/comments/", comments_router)
+
+task_metrics.register_queue_gauges()
+
+
+@api.get("/metrics", response={200: MetricsSchema, 403: ErrorSchema, 503: ErrorSchema}, auth=JWTBearer())
+def get_metrics(request):
+    """
+    Operational metrics, e.g. hot cache hit rates, task queue depths and latencies. Staff only.
+    :param request: request object
+    :return: 200: Counters, hit rates and averages of the whole deployment, gauges of the serving process,
+    403: If the user isn't staff, 503: If Redis or the Celery broker can't be reached
+    """
+    if not request.auth.is_staff:
+        return 403, {"message": "You do not have permission to view metrics"}
+
+    try:
+        counters = metrics.get_counters()
+        gauges = metrics.get_gauges()
+    except (RedisError, OperationalError):
+        return 503, {"message": "Metrics are unavailable"}
+
+    return 200, {
+        "counters": counters,
+        "hit_rates": metrics.get_hit_rates(counters),
+        "averages": metrics.get_averages(counters),
+        "gauges": gauges,
+    }
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+import redis.asyncio
+from django.conf import settings
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before reconnecting to Redis after the pub/sub connection was lost
+RECONNECT_DELAY = 1
+
+
+class Subscription:
+    """
+    Messages of one channel for one local consumer. A consumer that falls more than SSE_QUEUE_SIZE messages behind is
+    closed instead of silently losing messages, so it can reconnect and catch up from its last seen event.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message: bytes):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Make room for the sentinel, the consumer stops at it anyway
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[bytes]:
+        """
+        :return: next message, or None once the subscription overflowed
+        """
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """
+    Fans Redis pub/sub messages out to the consumers of this process.
+
+    The whole process shares a single pattern subscription, so thousands of idle consumers cost thousands of small
+    in-memory queues instead of thousands of Redis connections.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        """
+        Receive the messages published to channel while the block runs.
+        :param channel: Redis channel matching the broadcaster's pattern
+        """
+        subscription = Subscription(channel)
+        self._subscriptions[channel].add(subscription)
+        self._ensure_listener()
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions[channel]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[channel]
+
+    def dispatch(self, channel: str, message: bytes):
+        for subscription in tuple(self._subscriptions.get(channel, ())):
+            subscription.put(message)
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(self.pattern)
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self.dispatch(message["channel"].decode(), message["data"])
+            except (RedisError, OSError):
+                logger.warning("Lost the pub/sub connection to Redis, reconnecting", exc_info=True)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+            await asyncio.sleep(RECONNECT_DELAY)
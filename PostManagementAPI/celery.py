@@ -2,6 +2,9 @@ from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
 
+# Connects the signals measuring task queue latency
+from PostManagementAPI import task_metrics  # noqa: F401
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PostManagementAPI.settings.base')
 
 app = Celery('PostManagementAPI')
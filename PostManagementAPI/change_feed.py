@@ -0,0 +1,55 @@
+import base64
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+def encode_cursor(updated_at: datetime, pk: int) -> str:
+    """
+    :return: opaque cursor pointing right after the row with this (updated_at, pk)
+    """
+    return base64.urlsafe_b64encode(f"{updated_at.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    :param cursor: cursor returned by encode_cursor
+    :return: (updated_at, pk) of the last row the client has seen
+    :raises ValueError: if the cursor is malformed
+    """
+    try:
+        updated_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        updated_at = datetime.fromisoformat(updated_at)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if timezone.is_naive(updated_at) or not pk.isdigit():
+        raise ValueError("Invalid cursor")
+    return updated_at, int(pk)
+
+
+def get_changes(queryset, cursor: Optional[str], limit: int):
+    """
+    Page through the rows of a queryset created or updated after a cursor, in (updated_at, pk) order.
+
+    Rows updated in the last CHANGE_FEED_SETTLE_SECONDS are held back: a transaction that is still open may commit
+    a smaller updated_at later, and the cursor would already be past it.
+    :param queryset: queryset of a model with updated_at, indexed on (updated_at, id)
+    :param cursor: cursor of the previous page, None to start from the beginning
+    :param limit: maximum number of rows
+    :return: (rows, next cursor, whether more rows are ready)
+    :raises ValueError: if the cursor is malformed
+    """
+    settled_before = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    queryset = queryset.filter(updated_at__lte=settled_before)
+    if cursor:
+        updated_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+
+    rows = list(queryset.order_by("updated_at", "pk")[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].pk) if rows else cursor
+    return rows, next_cursor, has_more
@@ -0,0 +1,107 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Reads only go to replicas inside replica_reads(), everything else (writes, Celery tasks, management commands)
+# keeps reading from the primary
+_replica_reads_enabled = ContextVar("replica_reads_enabled", default=False)
+
+# alias -> (checked at, lag in seconds or None if the replica is unreachable)
+_replica_lag = {}
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+@contextmanager
+def replica_reads():
+    """
+    Route reads made inside the block to a replica that is within the allowed replication lag.
+    """
+    token = _replica_reads_enabled.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads_enabled.reset(token)
+
+
+def get_replica_lag(alias: str):
+    """
+    Replication lag of a replica, checked at most once every REPLICA_LAG_CHECK_INTERVAL seconds per process.
+    :param alias: database alias of the replica
+    :return: lag in seconds, or None if the replica can't be reached
+    """
+    checked_at, lag = _replica_lag.get(alias, (None, None))
+    now = time.monotonic()
+    if checked_at is not None and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = float(cursor.fetchone()[0])
+        else:
+            lag = 0.0
+    except DatabaseError:
+        logger.warning("Replica %s is unreachable, reading from the primary", alias, exc_info=True)
+        lag = None
+
+    _replica_lag[alias] = (now, lag)
+    return lag
+
+
+def get_available_replicas():
+    """
+    :return: aliases of the replicas whose replication lag is within REPLICA_MAX_LAG
+    """
+    available = []
+    for alias in settings.DATABASE_REPLICAS:
+        lag = get_replica_lag(alias)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            available.append(alias)
+    return available
+
+
+class ReplicaRouter:
+    """
+    Sends reads made inside replica_reads() to a random replica that keeps up with the primary and all writes to
+    the primary. Replicas are physical copies of the primary, so migrations only run on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Related objects are read from where their instance came from, e.g. replies of comments read from the primary
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not settings.DATABASE_REPLICAS or not _replica_reads_enabled.get():
+            return DEFAULT_DB_ALIAS
+        replicas = get_available_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are still written to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
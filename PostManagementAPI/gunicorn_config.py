@@ -0,0 +1,59 @@
+"""
+Gunicorn settings of the web service, used as `gunicorn -c python:PostManagementAPI.gunicorn_config`.
+
+The application is loaded once in the master process and the workers are forked from it, so they share the pages of
+Django, the URLconf and the moderation model instead of each importing its own copy. Reference counting and the
+cyclic garbage collector write to every object they touch, which would copy those pages into each worker over time,
+so the collector is kept off while loading and everything loaded is moved out of its reach with gc.freeze() before
+the first fork.
+"""
+import gc
+import os
+
+# Objects allocated from here on stay where they are until gc.freeze(), a collection would only dirty their pages
+gc.disable()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true")
+gc_freeze = os.getenv("GUNICORN_GC_FREEZE", "true").lower() in ("1", "true")
+# Workers are replaced after this many requests (plus up to the jitter, so they don't all restart at once), which
+# gives back memory leaked or unshared over time. With preloading the replacement is a cheap fork of the master.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+accesslog = "-"
+errorlog = "-"
+
+
+def _warm_up():
+    from django.urls import get_resolver
+
+    from apps.moderation.pipeline import warm_up
+
+    # Import every view and schema, and load the moderation model, instead of doing it on the first requests
+    get_resolver().url_patterns
+    warm_up()
+
+
+def when_ready(server):
+    """
+    Master process, after the application was loaded and before the first worker is forked.
+    """
+    if preload_app:
+        from django.db import connections
+
+        _warm_up()
+        # Workers must not share the sockets of the master
+        connections.close_all()
+        if gc_freeze:
+            gc.collect()
+            gc.freeze()
+            server.log.info("Froze %d objects loaded by the master", gc.get_freeze_count())
+    # Inherited by the workers
+    gc.enable()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm_up()
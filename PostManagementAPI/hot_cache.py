@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+
+from PostManagementAPI import metrics
+from PostManagementAPI.popularity import PopularityTracker
+
+
+class HotCache:
+    """
+    Small in-process cache for the most popular objects, with TinyLFU admission.
+
+    Only keys accessed at least HOT_CACHE_MIN_FREQUENCY times get in. Once the cache is full, a new key only replaces
+    the least recently used entry if it is accessed more often, so a burst of one-off reads can't flush out the viral
+    posts. Entries of keys above HOT_CACHE_HOT_THRESHOLD are kept for HOT_CACHE_HOT_TTL seconds, all others for
+    HOT_CACHE_TTL. Invalidation only reaches the current process, the TTLs bound how stale other processes can be.
+    """
+
+    def __init__(self, name: str, popularity: PopularityTracker):
+        self.name = name
+        self.popularity = popularity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        metrics.register_gauge(f"hot_cache.{name}.size", self.__len__)
+
+    def _count(self, event: str):
+        metrics.increment(f"hot_cache.{self.name}.{event}")
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, popularity_key, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        self._count("hits" if entry is not None else "misses")
+        return value if entry is not None else None
+
+    def admits(self, popularity_key: str) -> bool:
+        """
+        :param popularity_key: key whose access frequency decides admission
+        :return: whether values of the key are popular enough to be offered to the cache at all
+        """
+        return self.popularity.estimate(popularity_key) >= settings.HOT_CACHE_MIN_FREQUENCY
+
+    def put(self, key: str, value: Any, popularity_key: str) -> bool:
+        """
+        Offer a value to the cache.
+        :param key: cache key
+        :param value: value to cache
+        :param popularity_key: key whose access frequency decides admission, shared by all entries of one object
+        :return: whether the value was admitted
+        """
+        frequency = self.popularity.estimate(popularity_key)
+        if frequency < settings.HOT_CACHE_MIN_FREQUENCY:
+            self._count("rejections")
+            return False
+        ttl = settings.HOT_CACHE_HOT_TTL if frequency >= settings.HOT_CACHE_HOT_THRESHOLD else settings.HOT_CACHE_TTL
+
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= settings.HOT_CACHE_SIZE:
+                victim_key, (victim_expires_at, victim_popularity_key, _) = next(iter(self._entries.items()))
+                if (victim_expires_at > time.monotonic()
+                        and frequency <= self.popularity.estimate(victim_popularity_key)):
+                    admitted = False
+                else:
+                    del self._entries[victim_key]
+                    admitted = True
+            else:
+                admitted = True
+            if admitted:
+                self._entries[key] = (time.monotonic() + ttl, popularity_key, value)
+                self._entries.move_to_end(key)
+
+        self._count("admissions" if admitted else "rejections")
+        return admitted
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from PostManagementAPI.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "metrics:counters"
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+_gauges: Dict[str, Callable[[], float]] = {}
+
+
+def increment(name: str, amount: int = 1):
+    """
+    Add to a counter. Counters are kept in process memory and added to the cluster wide totals in Redis at most every
+    METRICS_FLUSH_INTERVAL seconds, so counting never costs a round trip on the request path.
+    :param name: counter name, e.g. "hot_cache.posts.hits"
+    :param amount: amount to add
+    """
+    global _last_flush
+    with _lock:
+        _pending[name] += amount
+        if time.monotonic() - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        _last_flush = time.monotonic()
+    flush()
+
+
+def observe(name: str, value: float):
+    """
+    Count a measurement, e.g. a duration, as the counters "<name>.sum" and "<name>.count", their ratio is the average.
+    :param name: measurement name, e.g. "celery.replies.latency_ms"
+    :param value: measured value, rounded to an integer
+    """
+    increment(f"{name}.count")
+    increment(f"{name}.sum", round(value))
+
+
+def flush():
+    """
+    Add the counts collected by this process to the totals in Redis.
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        for name, amount in pending.items():
+            pipeline.hincrby(METRICS_KEY, name, amount)
+        pipeline.execute()
+    except RedisError:
+        logger.warning("Couldn't flush metrics", exc_info=True)
+        # Keep the counts for the next flush
+        with _lock:
+            _pending.update(pending)
+
+
+def get_counters() -> Dict[str, int]:
+    """
+    :return: cluster wide counter totals, including the counts of this process that haven't been flushed yet
+    """
+    counters = Counter({name.decode(): int(value) for name, value in get_redis().hgetall(METRICS_KEY).items()})
+    with _lock:
+        counters.update(_pending)
+    return dict(counters)
+
+
+def register_gauge(name: str, func: Callable[[], float]):
+    """
+    Report a value of this process, read whenever metrics are requested.
+    :param name: gauge name, e.g. "hot_cache.posts.size"
+    :param func: callable returning the current value
+    """
+    _gauges[name] = func
+
+
+def get_gauges() -> Dict[str, float]:
+    """
+    :return: current values of the gauges of the process serving the request
+    """
+    return {name: func() for name, func in _gauges.items()}
+
+
+def get_hit_rates(counters: Dict[str, int]) -> Dict[str, float]:
+    """
+    :return: hit rate of every "<name>.hits"/"<name>.misses" counter pair, by name
+    """
+    rates = {}
+    for counter, hits in counters.items():
+        if not counter.endswith(".hits"):
+            continue
+        name = counter[:-len(".hits")]
+        lookups = hits + counters.get(f"{name}.misses", 0)
+        rates[name] = hits / lookups if lookups else 0.0
+    return rates
+
+
+def get_averages(counters: Dict[str, int]) -> Dict[str, float]:
+    """
+    :return: average of every measurement counted by observe(), by name
+    """
+    return {
+        counter[:-len(".count")]: counters.get(counter[:-len(".count")] + ".sum", 0) / count
+        for counter, count in counters.items()
+        if counter.endswith(".count") and count
+    }
@@ -0,0 +1,88 @@
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from PostManagementAPI.db_routers import replica_reads
+from apps.users.utils import decode_access_token
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _get_token_user_id(request):
+    """
+    Read the user id from the bearer token without touching the database.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_access_token(token).get("user_id")
+    except jwt.InvalidTokenError:
+        return None
+
+
+def _recent_write_cache_key(user_id) -> str:
+    return f"db:recent-write:{user_id}"
+
+
+def _reads_from_replica(path: str) -> bool:
+    """
+    Only the read-only API handlers under REPLICA_READ_PATH_PREFIXES read from replicas. The admin, session lookups
+    and live streams, which hold their connection for as long as the client listens, stay on the primary.
+    """
+    return path.startswith(tuple(settings.REPLICA_READ_PATH_PREFIXES)) and not path.endswith("/stream")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serves read-only API requests from replicas, except for users who wrote something in the last
+    READ_YOUR_WRITES_SECONDS, who keep reading from the primary so they see their own changes.
+    Works in both sync and async mode, so it doesn't push async views (live streams) into a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = _get_token_user_id(request)
+        if request.method in SAFE_METHODS:
+            if not _reads_from_replica(request.path):
+                return self.get_response(request)
+            if user_id is not None and cache.get(_recent_write_cache_key(user_id)):
+                return self.get_response(request)
+            with replica_reads():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if user_id is not None and response.status_code < 400:
+            cache.set(_recent_write_cache_key(user_id), True, settings.READ_YOUR_WRITES_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        user_id = _get_token_user_id(request)
+        if request.method in SAFE_METHODS:
+            if not _reads_from_replica(request.path):
+                return await self.get_response(request)
+            if user_id is not None and await cache.aget(_recent_write_cache_key(user_id)):
+                return await self.get_response(request)
+            with replica_reads():
+                return await self.get_response(request)
+
+        response = await self.get_response(request)
+        if user_id is not None and response.status_code < 400:
+            await cache.aset(_recent_write_cache_key(user_id), True, settings.READ_YOUR_WRITES_SECONDS)
+        return response
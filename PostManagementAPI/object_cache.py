@@ -0,0 +1,106 @@
+from typing import Callable, Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.dispatch import Signal
+
+# Sent with the model as sender and the pks of the rows whose cached copies were dropped, once the change committed.
+# Lets process local caches follow the invalidation of the shared one.
+objects_invalidated = Signal()
+
+
+def object_cache_key(model, pk) -> str:
+    # Bump the version when the cached shape changes, so that old entries are never read (v2: version field)
+    return f"objects:v2:{model._meta.label_lower}:{pk}"
+
+
+def get_cached_objects(model, pks: Iterable[int], serialize: Callable) -> Dict[int, dict]:
+    """
+    Serialized rows by primary key, from the cache where possible and with a single in_bulk query for the rest.
+    Misses are read from the primary even inside replica_reads(), a lagging replica would put back rows that were
+    already invalidated.
+    :param model: model class
+    :param pks: primary keys
+    :param serialize: callable turning an instance into the dict that gets cached
+    :return: serialized rows by primary key, pks that don't exist are left out
+    """
+    keys = {pk: object_cache_key(model, pk) for pk in pks}
+    cached = cache.get_many(keys.values())
+    objects = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    uncached = [pk for pk in keys if pk not in objects]
+    if uncached:
+        fetched = {pk: serialize(instance) for pk, instance in model.objects.using(router.db_for_write(model)).in_bulk(uncached).items()}
+        cache.set_many({keys[pk]: data for pk, data in fetched.items()}, settings.OBJECT_CACHE_TIMEOUT)
+        objects.update(fetched)
+    return objects
+
+
+def invalidate_objects(model, pks: Iterable[int], using=None):
+    """
+    Drop cached rows once the current transaction commits, so readers can't cache the old version again in between.
+    A reader whose query ran before the commit but whose cache write lands after the invalidation still puts the old
+    version back, however long it took in between. Nothing invalidates that entry again, it is served until
+    OBJECT_CACHE_TIMEOUT expires.
+    """
+    pks = list(pks)
+    if not pks:
+        return
+
+    def invalidate():
+        cache.delete_many([object_cache_key(model, pk) for pk in pks])
+        objects_invalidated.send(sender=model, pks=pks)
+
+    transaction.on_commit(invalidate, using=using or router.db_for_write(model))
+
+
+class ObjectCacheMixin:
+    """
+    Model mixin invalidating the per-object cache entry of an instance whenever it is saved or deleted.
+    """
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_objects(type(self), [self.pk], using=kwargs.get('using'))
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_objects(type(self), [pk], using=kwargs.get('using'))
+        return result
+
+
+def parse_ids(raw_ids: str) -> List[int]:
+    """
+    :param raw_ids: comma separated ids, e.g. "3,1,2"
+    :return: distinct ids in the order they were given
+    :raises ValueError: if an id isn't a positive integer or there are more than BATCH_MAX_IDS of them
+    """
+    ids = []
+    for raw_id in filter(None, (part.strip() for part in raw_ids.split(","))):
+        if not raw_id.isdigit():
+            raise ValueError(f"Invalid id {raw_id!r}")
+        ids.append(int(raw_id))
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("ids is required")
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise ValueError(f"At most {settings.BATCH_MAX_IDS} ids can be requested at once")
+    return ids
+
+
+def get_batch(model, ids: List[int], serialize: Callable) -> dict:
+    """
+    Resolve a batch of ids of a model with is_blocked through the per-object cache.
+    :param model: model class
+    :param ids: requested ids
+    :param serialize: callable turning an instance into a dict, which must include is_blocked
+    :return: dict with the visible rows in requested order ("items") and the ids that are "missing" or "blocked"
+    """
+    objects = get_cached_objects(model, ids, serialize)
+    return {
+        'items': [objects[pk] for pk in ids if pk in objects and not objects[pk]['is_blocked']],
+        'missing': [pk for pk in ids if pk not in objects],
+        'blocked': [pk for pk in ids if pk in objects and objects[pk]['is_blocked']],
+    }
@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from PostManagementAPI.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    """
+    Approximate per-key counts in fixed memory (depth x width counters). Estimates never undercount, they overcount
+    by at most a small fraction of the total count with high probability.
+    """
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.counters = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def indexes(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return np.frombuffer(digest, dtype="<u8") % self.width
+
+    def add(self, key: str, count: int = 1):
+        self.counters[self._rows, self.indexes(key)] += count
+
+    def estimate(self, key: str) -> int:
+        return int(self.counters[self._rows, self.indexes(key)].min())
+
+    def halve(self):
+        self.counters >>= 1
+
+    def clear(self):
+        self.counters[:] = 0
+
+
+class PopularityTracker:
+    """
+    Decaying access frequencies of keys, per process and cluster wide.
+
+    Accesses go into a local sketch that is halved every POPULARITY_SAMPLE_SIZE accesses (the TinyLFU reset), so old
+    popularity fades out. Every POPULARITY_FLUSH_INTERVAL seconds the accesses since the last flush are added to a
+    Redis sketch of the current POPULARITY_WINDOW, and the cluster wide counts (current window plus half the previous
+    one) are read back. Flushing happens on the request path of whichever request is due, there is no background
+    thread to keep alive in forked workers.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        width, depth = settings.POPULARITY_SKETCH_WIDTH, settings.POPULARITY_SKETCH_DEPTH
+        self.local = CountMinSketch(width, depth)
+        self._pending = CountMinSketch(width, depth)
+        self._cluster = CountMinSketch(width, depth)
+        self._additions = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, key: str):
+        with self._lock:
+            self.local.add(key)
+            self._pending.add(key)
+            self._additions += 1
+            if self._additions >= settings.POPULARITY_SAMPLE_SIZE:
+                self.local.halve()
+                self._additions = 0
+            due = time.monotonic() - self._last_flush >= settings.POPULARITY_FLUSH_INTERVAL
+            if due:
+                self._last_flush = time.monotonic()
+        if due:
+            self.flush()
+
+    def estimate(self, key: str) -> int:
+        """
+        :return: the larger of the local and the cluster wide estimate
+        """
+        with self._lock:
+            return max(self.local.estimate(key), self._cluster.estimate(key))
+
+    def clear(self):
+        with self._lock:
+            self.local.clear()
+            self._pending.clear()
+            self._cluster.clear()
+            self._additions = 0
+
+    def _redis_key(self, window: int) -> str:
+        return f"popularity:{self.namespace}:{window}"
+
+    def flush(self):
+        """
+        Merge the accesses since the last flush into the Redis sketch and refresh the cluster wide counts.
+        """
+        with self._lock:
+            pending = self._pending.counters.copy()
+            self._pending.clear()
+
+        window = int(time.time() // settings.POPULARITY_WINDOW)
+        current_key, previous_key = self._redis_key(window), self._redis_key(window - 1)
+        rows, columns = np.nonzero(pending)
+        try:
+            pipeline = get_redis().pipeline(transaction=False)
+            for row, column in zip(rows.tolist(), columns.tolist()):
+                pipeline.hincrby(current_key, f"{row}:{column}", int(pending[row, column]))
+            pipeline.expire(current_key, settings.POPULARITY_WINDOW * 2)
+            pipeline.hgetall(current_key)
+            pipeline.hgetall(previous_key)
+            *_, current, previous = pipeline.execute()
+        except RedisError:
+            logger.warning("Couldn't merge popularity counts into Redis", exc_info=True)
+            with self._lock:
+                self._pending.counters += pending
+            return
+
+        cluster = np.zeros_like(pending)
+        for counts, weight in ((current, 2), (previous, 1)):
+            for field, value in counts.items():
+                row, column = map(int, field.split(b":"))
+                cluster[row, column] += int(value) * weight
+        with self._lock:
+            # Current window counts fully, the previous one half
+            self._cluster.counters = cluster >> 1
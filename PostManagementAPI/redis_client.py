@@ -0,0 +1,20 @@
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    """
+    :return: the process wide Redis client for REDIS_URL, its connection pool is shared by every thread
+    """
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@receiver(setting_changed)
+def _clear_redis_client(setting, **kwargs):
+    if setting == "REDIS_URL":
+        get_redis.cache_clear()
@@ -0,0 +1,12 @@
+from typing import Dict
+
+from ninja import Schema
+
+
+class MetricsSchema(Schema):
+    # Cluster wide totals
+    counters: Dict[str, int]
+    hit_rates: Dict[str, float]
+    averages: Dict[str, float]
+    # Values of the process that served the request
+    gauges: Dict[str, float]
@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
+from kombu import Queue
 import os
 
 load_dotenv()
@@ -49,6 +51,8 @@ LOCAL_APPS = [
     "apps.users.apps.UsersConfig",
     "apps.posts.apps.PostsConfig",
     "apps.comments.apps.CommentsConfig",
+    "apps.outbox.apps.OutboxConfig",
+    "apps.moderation.apps.ModerationConfig",
 ]
 
 # External packages or libraries.
@@ -66,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'PostManagementAPI.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'PostManagementAPI.urls'
@@ -101,6 +106,32 @@ WSGI_APPLICATION = 'PostManagementAPI.wsgi.application'
 # }
 
 
+# Read replicas
+# https://docs.djangoproject.com/en/5.0/topics/db/multi-db/
+
+# Aliases in DATABASES of read replicas, read-only requests are served from them
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ["PostManagementAPI.db_routers.ReplicaRouter"]
+# Only GET, HEAD and OPTIONS requests to these paths read from replicas, live streams (paths ending in /stream)
+# excluded
+REPLICA_READ_PATH_PREFIXES = ("/api/posts/", "/api/comments/")
+# Replicas lagging more than this many seconds behind the primary are skipped
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", 5))
+# After a write, the user's requests read from the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -119,6 +150,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+
+# Preferred hasher for new and upgraded hashes: "argon2" or "pbkdf2".
+# Hashes made by the other one (or with other cost parameters) are upgraded on the next successful login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "argon2")
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 19456))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 1))
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", 600000))
+
+_TUNED_PASSWORD_HASHERS = {
+    "argon2": "apps.users.hashers.TunedArgon2PasswordHasher",
+    "pbkdf2": "apps.users.hashers.TunedPBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _TUNED_PASSWORD_HASHERS[PASSWORD_HASHER],
+    *[hasher for name, hasher in _TUNED_PASSWORD_HASHERS.items() if name != PASSWORD_HASHER],
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+AUTHENTICATION_BACKENDS = ["apps.users.backends.HashingPoolModelBackend"]
+
+# Size of the thread pool password hashes run on, and how long a login waits for it (seconds)
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", 4))
+PASSWORD_HASHING_TIMEOUT = float(os.getenv("PASSWORD_HASHING_TIMEOUT", 5))
+# How long a rejected username/password pair is rejected again without hashing (seconds)
+FAILED_LOGIN_CACHE_TIMEOUT = int(os.getenv("FAILED_LOGIN_CACHE_TIMEOUT", 30))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -166,13 +227,190 @@ LOGGING = {
     },
 }
 
+# Admin moderation settings
+# Bulk block/unblock actions touching more rows than this are handed over to Celery
+ADMIN_BULK_SYNC_LIMIT = int(os.getenv("ADMIN_BULK_SYNC_LIMIT", 5000))
+BULK_MODERATION_CHUNK_SIZE = int(os.getenv("BULK_MODERATION_CHUNK_SIZE", 1000))
+# Deleting or restoring a post or comment hides or shows its comments during the request up to this many comments,
+# larger threads are changed by a chunked Celery task (see apps.comments.threads)
+THREAD_CASCADE_SYNC_LIMIT = int(os.getenv("THREAD_CASCADE_SYNC_LIMIT", 1000))
+# Admin changelists show PostgreSQL planner estimates instead of exact counts above this number of rows
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", 100000))
+
+# Staff exports stream rows from a server-side cursor, fetching this many rows at a time
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Change feeds (/posts/changes, /comments/changes)
+CHANGE_FEED_MAX_PAGE_SIZE = int(os.getenv("CHANGE_FEED_MAX_PAGE_SIZE", 1000))
+# Changes younger than this are held back until transactions that started earlier have committed
+CHANGE_FEED_SETTLE_SECONDS = int(os.getenv("CHANGE_FEED_SETTLE_SECONDS", 5))
+
+# Sub-thread pages (/comments/{pk}/thread)
+THREAD_MAX_PAGE_SIZE = int(os.getenv("THREAD_MAX_PAGE_SIZE", 500))
+
+# Per-object cache used by the batch endpoints (/posts/batch, /comments/batch)
+OBJECT_CACHE_TIMEOUT = int(os.getenv("OBJECT_CACHE_TIMEOUT", 300))
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", 100))
+
+# Profanity model exported by `manage.py export_moderation_model`, memory mapped by every process
+MODERATION_MODEL_DIR = os.getenv("MODERATION_MODEL_DIR", BASE_DIR / "moderation_model")
+# Stages scoring posts and comments, each one scores the texts the ones before it couldn't decide
+MODERATION_PIPELINE = [
+    "apps.moderation.pipeline.WordlistStage",
+    "apps.moderation.pipeline.ClassifierStage",
+]
+# Wordlists of the WordlistStage, checked for changes every MODERATION_WORDLIST_CHECK_INTERVAL seconds
+MODERATION_BLOCKLIST = os.getenv("MODERATION_BLOCKLIST", BASE_DIR / "apps/moderation/wordlists/blocklist.txt")
+MODERATION_ALLOWLIST = os.getenv("MODERATION_ALLOWLIST", BASE_DIR / "apps/moderation/wordlists/allowlist.txt")
+MODERATION_WORDLIST_CHECK_INTERVAL = int(os.getenv("MODERATION_WORDLIST_CHECK_INTERVAL", 30))
+# Score of texts containing a blocklist phrase
+WORDLIST_BLOCK_SCORE = float(os.getenv("WORDLIST_BLOCK_SCORE", 1.0))
+# Posts and comments scoring above this are blocked, unless their post has its own moderation_threshold
+MODERATION_THRESHOLD = float(os.getenv("MODERATION_THRESHOLD", 0.5))
+# Rows rescored per chunk by `manage.py backfill_moderation_scores`
+MODERATION_BACKFILL_CHUNK_SIZE = int(os.getenv("MODERATION_BACKFILL_CHUNK_SIZE", 500))
+# Comments sharing at least this share of their words with a blocked text get its score without being scored
+FINGERPRINT_MIN_SIMILARITY = float(os.getenv("FINGERPRINT_MIN_SIMILARITY", 0.8))
+FINGERPRINT_MAX_CANDIDATES = int(os.getenv("FINGERPRINT_MAX_CANDIDATES", 50))
+# Fingerprints not seen for this many days are purged
+FINGERPRINT_RETENTION_DAYS = int(os.getenv("FINGERPRINT_RETENTION_DAYS", 30))
+# Authors who posted FLOOD_MAX_DUPLICATES near duplicates of a comment within FLOOD_WINDOW seconds are blocked for
+# flooding, only their last FLOOD_HISTORY_SIZE comments are compared
+FLOOD_WINDOW = int(os.getenv("FLOOD_WINDOW", 60))
+FLOOD_MAX_DUPLICATES = int(os.getenv("FLOOD_MAX_DUPLICATES", 5))
+FLOOD_HISTORY_SIZE = int(os.getenv("FLOOD_HISTORY_SIZE", 50))
+
+# Trending feed (/posts/trending): scores combine the comments of the last TRENDING_WINDOW seconds with post age,
+# one point per TRENDING_DECAY_SECONDS, and are updated every TRENDING_UPDATE_INTERVAL seconds by Celery beat
+TRENDING_WINDOW = int(os.getenv("TRENDING_WINDOW", 6 * 60 * 60))
+TRENDING_DECAY_SECONDS = int(os.getenv("TRENDING_DECAY_SECONDS", 45000))
+TRENDING_UPDATE_INTERVAL = int(os.getenv("TRENDING_UPDATE_INTERVAL", 60))
+TRENDING_BATCH_SIZE = int(os.getenv("TRENDING_BATCH_SIZE", 1000))
+TRENDING_PAGE_SIZE = int(os.getenv("TRENDING_PAGE_SIZE", 20))
+
+# Hot post cache: popular posts and their first comment page are pinned in process memory
+HOT_CACHE_SIZE = int(os.getenv("HOT_CACHE_SIZE", 1000))
+# Reads of a post before it can be cached at all
+HOT_CACHE_MIN_FREQUENCY = int(os.getenv("HOT_CACHE_MIN_FREQUENCY", 2))
+HOT_CACHE_TTL = int(os.getenv("HOT_CACHE_TTL", 5))
+# Posts read at least this often (decayed count) are kept for HOT_CACHE_HOT_TTL seconds instead
+HOT_CACHE_HOT_THRESHOLD = int(os.getenv("HOT_CACHE_HOT_THRESHOLD", 50))
+HOT_CACHE_HOT_TTL = int(os.getenv("HOT_CACHE_HOT_TTL", 30))
+# Count-min sketch of post reads, halved every POPULARITY_SAMPLE_SIZE reads and merged into Redis every
+# POPULARITY_FLUSH_INTERVAL seconds, with POPULARITY_WINDOW second windows
+POPULARITY_SKETCH_WIDTH = int(os.getenv("POPULARITY_SKETCH_WIDTH", 2048))
+POPULARITY_SKETCH_DEPTH = int(os.getenv("POPULARITY_SKETCH_DEPTH", 4))
+POPULARITY_SAMPLE_SIZE = int(os.getenv("POPULARITY_SAMPLE_SIZE", HOT_CACHE_SIZE * 10))
+POPULARITY_FLUSH_INTERVAL = int(os.getenv("POPULARITY_FLUSH_INTERVAL", 10))
+POPULARITY_WINDOW = int(os.getenv("POPULARITY_WINDOW", 300))
+# Metrics counters are added to the totals in Redis at most this often (seconds)
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", 10))
+
+# Redis used directly by the application (pub/sub for live comment streams)
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/2")
+
+# Live comment streams (Server-Sent Events, served by the ASGI application)
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+SSE_RETRY_MILLISECONDS = int(os.getenv("SSE_RETRY_MILLISECONDS", 3000))
+# Messages buffered per connection before a slow client is disconnected
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", 100))
+# Comments replayed to a reconnecting client from its Last-Event-ID
+SSE_REPLAY_LIMIT = int(os.getenv("SSE_REPLAY_LIMIT", 500))
+
+# Transactional outbox, drained by `manage.py run_outbox_relay`
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 0.5))
+# Failed events are retried after OUTBOX_RETRY_BACKOFF seconds, doubling up to OUTBOX_RETRY_BACKOFF_MAX, and
+# dead-lettered (failed_at set, no longer relayed) after OUTBOX_MAX_ATTEMPTS failures. Redis or broker connection
+# errors don't count, those events are retried every OUTBOX_RETRY_BACKOFF_MAX seconds
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+OUTBOX_RETRY_BACKOFF = float(os.getenv("OUTBOX_RETRY_BACKOFF", 1))
+OUTBOX_RETRY_BACKOFF_MAX = float(os.getenv("OUTBOX_RETRY_BACKOFF_MAX", 300))
+# Events claimed by a relay are left to it for this many seconds, then other relays retry them
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 60))
+# Redis stream every published event is appended to, trimmed to roughly OUTBOX_STREAM_MAXLEN entries
+OUTBOX_STREAM = os.getenv("OUTBOX_STREAM", "domain-events")
+OUTBOX_STREAM_MAXLEN = int(os.getenv("OUTBOX_STREAM_MAXLEN", 100000))
+# How long consumers remember delivered dedup keys (seconds)
+OUTBOX_DEDUP_TTL = int(os.getenv("OUTBOX_DEDUP_TTL", 86400))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
+# Comment storage settings
+# Range partition the comments table by created_at month (PostgreSQL only). Read when the comments migrations run,
+# so enable it before migrating
+COMMENTS_PARTITIONED = os.getenv("COMMENTS_PARTITIONED", "false").lower() in ("1", "true")
+# Number of monthly partitions kept ready after the current month
+COMMENT_PARTITIONS_AHEAD = int(os.getenv("COMMENT_PARTITIONS_AHEAD", 3))
+# Blocked threads that haven't changed for this many days are moved to the comment archive
+COMMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("COMMENT_ARCHIVE_AFTER_DAYS", 365))
+COMMENT_ARCHIVE_BATCH_SIZE = int(os.getenv("COMMENT_ARCHIVE_BATCH_SIZE", 1000))
+
 # JWT Auth settings
 SECRET_KEY = "test_secret_key"
 REFRESH_TOKEN_SECRET_KEY = "test_refresh_token_secret_key"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+# Access token signing: "HS256" with SECRET_KEY, or "RS256"/"EdDSA" with the <kid>.pem keys in JWT_KEYS_DIR,
+# the public halves of which are published at /api/users/jwks.json
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", BASE_DIR / "keys")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")
+# Keep accepting HS256 access tokens after switching to asymmetric keys, until the last ones have expired
+JWT_ACCEPT_HS256 = os.getenv("JWT_ACCEPT_HS256", "true").lower() in ("1", "true")
+# How long verifiers may cache the JWKS document (seconds)
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", 300))
 
 
 # Celery settings
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER", "redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_BACKEND", "redis://127.0.0.1:6379/0")
+# Each queue has its own workers (see docker-compose.yaml), so a backlog in one doesn't delay the others
+CELERY_TASK_QUEUES = (
+    Queue("moderation"),  # bulk blocking started from the admin
+    Queue("replies"),  # delayed auto-replies
+    Queue("maintenance"),  # periodic cleanup
+    Queue("analytics"),  # derived data such as trending scores
+)
+CELERY_TASK_DEFAULT_QUEUE = "maintenance"
+CELERY_TASK_ROUTES = {
+    "apps.posts.tasks.bulk_set_posts_blocked": {"queue": "moderation"},
+    "apps.comments.tasks.bulk_set_comments_blocked": {"queue": "moderation"},
+    "apps.comments.tasks.cascade_thread_blocked": {"queue": "moderation"},
+    "apps.comments.tasks.auto_reply_to_comment": {"queue": "replies"},
+    "apps.comments.tasks.create_comment_partitions": {"queue": "maintenance"},
+    "apps.comments.tasks.archive_comment_threads": {"queue": "maintenance"},
+    "apps.moderation.tasks.purge_fingerprints": {"queue": "maintenance"},
+    "apps.outbox.tasks.purge_published_events": {"queue": "maintenance"},
+    "apps.posts.tasks.update_trending_scores": {"queue": "analytics"},
+}
+# Tasks of these queues are acknowledged once they finished, so a task of a crashed worker runs again. Their tasks
+# are idempotent. Auto-replies are acknowledged on start: they wait for their eta in the worker, a Redis broker would
+# redeliver them after its visibility timeout, and they are deduplicated on delivery anyway.
+TASK_ACKS_LATE_QUEUES = ("moderation", "maintenance", "analytics")
+CELERY_TASK_ANNOTATIONS = {
+    task: {"acks_late": route["queue"] in TASK_ACKS_LATE_QUEUES} for task, route in CELERY_TASK_ROUTES.items()
+}
+# Nothing reads the return values of tasks, except the progress of bulk blocking, whose tasks opt in
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    "update-trending-scores": {
+        "task": "apps.posts.tasks.update_trending_scores",
+        "schedule": TRENDING_UPDATE_INTERVAL,
+    },
+    "create-comment-partitions": {
+        "task": "apps.comments.tasks.create_comment_partitions",
+        "schedule": crontab(minute=0, hour=3),
+    },
+    "archive-comment-threads": {
+        "task": "apps.comments.tasks.archive_comment_threads",
+        "schedule": crontab(minute=30, hour=3),
+    },
+    "purge-content-fingerprints": {
+        "task": "apps.moderation.tasks.purge_fingerprints",
+        "schedule": crontab(minute=30, hour=4),
+    },
+    "purge-published-outbox-events": {
+        "task": "apps.outbox.tasks.purge_published_events",
+        "schedule": crontab(minute=0, hour=4),
+    },
+}
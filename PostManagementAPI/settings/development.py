@@ -4,6 +4,19 @@ DEBUG = True
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',')
 
+# Database connection reuse, tunable per process type ("web" for gunicorn, "asgi" for uvicorn, "worker" for Celery).
+# Under ASGI, sync ORM code doesn't run on a fixed set of threads, so persistent connections would pile up idle on the
+# server; the asgi process closes them after each request instead.
+# DB_POOL_MODE "persistent" keeps each thread's connection to PostgreSQL open for CONN_MAX_AGE seconds,
+# "pgbouncer" expects DB_HOST to be a PgBouncer running in transaction pooling mode.
+DJANGO_PROCESS_TYPE = os.getenv("DJANGO_PROCESS_TYPE", "web")
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "persistent")
+_CONN_MAX_AGE_DEFAULTS = {
+    "web": 60,
+    "asgi": 0,
+    "worker": 600,
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -12,5 +25,35 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("DB_HOST"),  # This should be container name
         "PORT": os.environ.get("PGPORT"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE") or _CONN_MAX_AGE_DEFAULTS.get(DJANGO_PROCESS_TYPE, 0)),
+        # Ping reused connections before handing them to a request or task, so a restarted server or
+        # a dropped idle connection doesn't surface as an error
+        "CONN_HEALTH_CHECKS": True,
+        # Server-side cursors don't survive transaction pooling
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOL_MODE == "pgbouncer",
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+            # Detect connections silently dropped by the network while they are idle in the pool
+            "keepalives": 1,
+            "keepalives_idle": 60,
+            "keepalives_interval": 10,
+            "keepalives_count": 3,
+        },
+    }
+}
+
+# Read replicas share the primary's credentials, DB_REPLICA_HOSTS is a comma separated list of hosts
+for _number, _host in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica_{_number}"] = {
+        **DATABASES["default"],
+        "HOST": _host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica_")]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CACHE_URL", "redis://redis:6379/1"),
     }
 }
@@ -0,0 +1,7 @@
+from .development import *
+
+# A mirror of the test database standing in for a replica, so replica routing runs against a real second alias
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "TEST": {"MIRROR": "default"},
+}
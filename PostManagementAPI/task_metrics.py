@@ -0,0 +1,57 @@
+import time
+from datetime import datetime
+
+from celery import current_app
+from celery.signals import before_task_publish, task_prerun
+from django.conf import settings
+from kombu.exceptions import ChannelError
+
+from PostManagementAPI import metrics
+
+PUBLISHED_AT_HEADER = "published_at"
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def _record_latency(task=None, **kwargs):
+    """
+    Record how long a task waited in its queue, from publishing (or its eta, for delayed tasks) until a worker started
+    it, as "celery.<queue>.latency_ms".
+    """
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        # Run eagerly, or published by a process without this module
+        return
+    due = published_at
+    if task.request.eta:
+        due = max(due, datetime.fromisoformat(task.request.eta).timestamp())
+    queue = (task.request.delivery_info or {}).get("routing_key") or "unknown"
+    metrics.observe(f"celery.{queue}.latency_ms", max(0.0, time.time() - due) * 1000)
+
+
+def queue_depth(queue: str) -> int:
+    """
+    :return: number of messages waiting in a queue of the broker, not counting the ones prefetched by workers
+    :raises kombu.exceptions.OperationalError: if the broker can't be reached
+    """
+    with current_app.connection_for_read() as connection:
+        # Fail right away instead of retrying, metrics are requested by someone waiting for them
+        connection.ensure_connection(max_retries=0)
+        try:
+            return connection.default_channel.queue_declare(queue, passive=True).message_count
+        except ChannelError:
+            # NOT_FOUND: the Redis transport only knows a queue while its list holds messages
+            return 0
+
+
+def register_queue_gauges():
+    """
+    Report the depth of every CELERY_TASK_QUEUES queue as the gauge "celery.<queue>.depth".
+    """
+    for queue in settings.CELERY_TASK_QUEUES:
+        metrics.register_gauge(f"celery.{queue.name}.depth", lambda name=queue.name: queue_depth(name))
@@ -0,0 +1,114 @@
+from typing import List, Optional, Set
+
+from django.db import models
+from django.db.models import F
+
+
+class VersionConflict(Exception):
+    """
+    Raised by a save with expected_version when the row was written by someone else since that version.
+    """
+
+
+class VersionedMixin:
+    """
+    Model mixin counting the writes of a row in its version field, for optimistic concurrency control: clients send
+    back the version they read (If-Match) and save(expected_version=...) only writes if the row is still at it. The
+    check is part of the UPDATE itself, no row is locked in between.
+
+    Models using it define a version field, the queryset level writes (e.g. set_blocked) increment it themselves.
+    """
+    _expected_version = None
+
+    def save(self, *args, expected_version: Optional[int] = None, **kwargs):
+        """
+        :param expected_version: only write if the row is still at this version
+        :raises VersionConflict: if it isn't
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+
+        if expected_version is None:
+            # Saved by someone who didn't ask for a check, e.g. the admin: increment whatever version the row is at
+            self.version = F('version') + 1
+            super().save(*args, **kwargs)
+            # Deferred, loaded again if it is read
+            del self.__dict__['version']
+            return
+
+        self.version, self._expected_version = expected_version + 1, expected_version
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._expected_version = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if self._expected_version is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not super()._do_update(
+            base_qs.filter(version=self._expected_version), using, pk_val, values, update_fields, forced_update
+        ):
+            raise VersionConflict(f"{self._meta.verbose_name} {pk_val} isn't at version {self._expected_version}")
+        return True
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: str) -> Optional[Set[int]]:
+    """
+    :param value: If-Match header value, "*" or a comma separated list of ETags returned by etag()
+    :return: the versions any of which matches, None for "*" (any version matches). ETags that aren't versions are
+    left out, so a list of them only matches nothing.
+    """
+    if value.strip() == '*':
+        return None
+    versions = set()
+    for tag in value.split(','):
+        tag = tag.strip().removeprefix('W/').strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+def save_changes(instance: models.Model, data: dict, expected_version: Optional[int] = None) -> List[str]:
+    """
+    Assign data to an instance and save only the fields whose value actually changed, with their updated_at. A save
+    that doesn't touch the moderated text fields skips moderation, one that changes nothing doesn't write at all.
+    :param instance: Post or Comment loaded from the database
+    :param data: new values by field name
+    :param expected_version: only write if the row is still at this version
+    :return: names of the changed fields
+    :raises VersionConflict: if the row isn't at expected_version
+    """
+    changed = [name for name, value in data.items() if getattr(instance, name) != value]
+    if not changed:
+        return changed
+    for name in changed:
+        setattr(instance, name, data[name])
+    instance.save(update_fields=[*changed, 'updated_at'], expected_version=expected_version)
+    return changed
+
+
+def save_if_match(instance: models.Model, data: dict, if_match: Optional[str]) -> bool:
+    """
+    save_changes guarded by the versions the client accepts (If-Match), and by the loaded version so that a write
+    made in between isn't overwritten.
+    :param instance: versioned Post or Comment loaded from the database
+    :param data: new values by field name
+    :param if_match: If-Match header value, None if it wasn't sent, which like "*" accepts any version
+    :return: False if the row isn't at one of those versions, or by the time of the UPDATE no longer at the loaded one
+    """
+    versions = None if if_match is None else parse_if_match(if_match)
+    if versions is not None and instance.version not in versions:
+        return False
+    try:
+        save_changes(instance, data, expected_version=instance.version)
+    except VersionConflict:
+        return False
+    return True
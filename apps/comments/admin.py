@@ -1,15 +1,20 @@
 from django.contrib import admin
 
+from PostManagementAPI.admin_utils import action_filters, set_blocked, save_changed_fields, \
+    AuthorAutocompleteFilter, LargeTableAdminMixin
 from apps.comments.models import Comment
+from apps.comments.tasks import bulk_set_comments_blocked
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'author', 'text', 'is_blocked', 'created_at', 'updated_at')
-    list_filter = ('author', 'is_blocked', 'created_at', 'updated_at')
-    date_hierarchy = 'created_at'
+    list_filter = (AuthorAutocompleteFilter, 'is_blocked', 'created_at', 'updated_at')
+    autocomplete_fields = ('author', 'post')
+    raw_id_fields = ('parent',)
     list_editable = ('is_blocked', )
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'moderated_by', 'moderation_score', 'moderation_model_version')
+    actions = ['block_comments', 'unblock_comments', 'block_all_by_author', 'block_all_by_post']
 
     def get_queryset(self, request):
         """
@@ -20,3 +25,24 @@ class CommentAdmin(admin.ModelAdmin):
         """
         qs = super().get_queryset(request)
         return qs.select_related('author', 'post')
+
+    def save_model(self, request, obj, form, change):
+        save_changed_fields(obj, form, change)
+
+    @admin.action(description="Block selected comments")
+    def block_comments(self, request, queryset):
+        set_blocked(self, request, action_filters(self, request, queryset), True, bulk_set_comments_blocked)
+
+    @admin.action(description="Unblock selected comments")
+    def unblock_comments(self, request, queryset):
+        set_blocked(self, request, action_filters(self, request, queryset), False, bulk_set_comments_blocked)
+
+    @admin.action(description="Block all comments by the authors of selected comments")
+    def block_all_by_author(self, request, queryset):
+        author_ids = list(queryset.order_by().values_list('author_id', flat=True).distinct())
+        set_blocked(self, request, {'author_id__in': author_ids}, True, bulk_set_comments_blocked)
+
+    @admin.action(description="Block all comments on the posts of selected comments")
+    def block_all_by_post(self, request, queryset):
+        post_ids = list(queryset.order_by().values_list('post_id', flat=True).distinct())
+        set_blocked(self, request, {'post_id__in': post_ids}, True, bulk_set_comments_blocked)
@@ -1,13 +1,25 @@
+from datetime import date, datetime
 from typing import List
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Count, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from ninja import Router
 
+from PostManagementAPI.change_feed import get_changes
+from PostManagementAPI.exports import ExportFormat, export_response, filter_export_queryset, iter_queryset_rows
+from PostManagementAPI.object_cache import get_batch, parse_ids
 from PostManagementAPI.schemas.errors import ErrorSchema
-from apps.comments.models import Comment
-from apps.comments.schema import CommentInSchema, CommentOutSchema, ReplySchema, CommentAnalyticsSchema
+from PostManagementAPI.updates import etag, save_if_match
+from apps.comments.models import MAX_THREAD_DEPTH, ArchivedComment, Comment
+from apps.comments.schema import (
+    CommentInSchema, CommentOutSchema, ReplySchema, CommentAnalyticsSchema, CommentChangesSchema, CommentBatchSchema,
+    CommentDataSchema, CommentPatchSchema, CommentThreadSchema, CommentThreadCountSchema,
+)
+from apps.comments.threads import cascade_blocked, get_subthread_page, subthread
 from apps.posts.models import Post
 from apps.users.auth import JWTBearer
 
@@ -15,6 +27,49 @@ router = Router()
 
 User = get_user_model()
 
+COMMENT_EXPORT_FIELDS = (
+    'id', 'post_id', 'author_id', 'parent_id', 'text', 'is_blocked', 'moderated_by', 'moderation_score',
+    'moderation_model_version', 'created_at', 'updated_at',
+)
+ANALYTICS_EXPORT_FIELDS = ('date', 'total_comments', 'blocked_comments')
+
+
+def _serialize_comment(comment: Comment) -> dict:
+    return {**CommentDataSchema.from_orm(comment).dict(), 'is_blocked': comment.is_blocked}
+
+
+def get_daily_breakdown(date_from, date_to) -> list:
+    """
+    Count comments created and blocked per day, archived comments included.
+    :param date_from: first day
+    :param date_to: last day
+    :return: list of dicts with date, total_comments and blocked_comments, ordered by date
+    """
+    daily_comments = Comment.objects.filter(
+        created_at__date__gte=date_from, created_at__date__lte=date_to
+    ).values('created_at__date').annotate(
+        total_comments=Count('id'),
+        blocked_comments=Count('id', filter=Q(is_blocked=True))
+    ).order_by('created_at__date')
+
+    # Archived comments were all blocked when they were archived
+    daily_archived = ArchivedComment.objects.filter(
+        created_at__date__gte=date_from, created_at__date__lte=date_to
+    ).values('created_at__date').annotate(archived_comments=Count('id'))
+
+    breakdown = {
+        item['created_at__date']: [item['total_comments'], item['blocked_comments']] for item in daily_comments
+    }
+    for item in daily_archived:
+        counts = breakdown.setdefault(item['created_at__date'], [0, 0])
+        counts[0] += item['archived_comments']
+        counts[1] += item['archived_comments']
+
+    return [
+        {'date': day, 'total_comments': total_comments, 'blocked_comments': blocked_comments}
+        for day, (total_comments, blocked_comments) in sorted(breakdown.items())
+    ]
+
 
 @router.get("/comments-daily-breakdown", response={200: List[CommentAnalyticsSchema], 400: ErrorSchema})
 def daily_breakdown(request, date_from: str, date_to: str):
@@ -28,30 +83,82 @@ def daily_breakdown(request, date_from: str, date_to: str):
     if date_from > date_to:
         return 400, {"message": "date_from must be earlier than date_to"}
 
-    daily_comments = Comment.objects.filter(
-        created_at__date__gte=date_from, created_at__date__lte=date_to
-    ).values('created_at__date').annotate(
-        total_comments=Count('id'),
-        blocked_comments=Count('id', filter=Q(is_blocked=True))
-    ).order_by('created_at__date')
-
     # Convert to schema format
-    result = [
-        CommentAnalyticsSchema(
-            date=item['created_at__date'],
-            total_comments=item['total_comments'],
-            blocked_comments=item['blocked_comments']
-        ) for item in daily_comments
-    ]
+    result = [CommentAnalyticsSchema(**item) for item in get_daily_breakdown(date_from, date_to)]
 
     return 200, result
 
 
+@router.get("/comments-daily-breakdown/export", response={400: ErrorSchema, 403: ErrorSchema}, auth=JWTBearer())
+def export_daily_breakdown(request, date_from: date, date_to: date, format: ExportFormat = "ndjson"):
+    """
+    Export the daily breakdown of comments as NDJSON or CSV. Staff only.
+    :param request: request object
+    :param date_from: first day
+    :param date_to: last day
+    :param format: "ndjson" or "csv"
+    :return: streamed export, 400 if the date range is reversed, 403 for non-staff users
+    """
+    if not request.auth.is_staff:
+        return 403, {"message": "You do not have permission to export analytics"}
+    if date_from > date_to:
+        return 400, {"message": "date_from must be earlier than date_to"}
+
+    rows = get_daily_breakdown(date_from, date_to)
+    return export_response(rows, ANALYTICS_EXPORT_FIELDS, format, f"comments-daily-breakdown-{date_from}-{date_to}")
+
+
+@router.get("/export", response={403: ErrorSchema}, auth=JWTBearer())
+def export_comments(request, format: ExportFormat = "ndjson", created_from: datetime = None,
+                    created_to: datetime = None, updated_since: datetime = None):
+    """
+    Stream every comment, blocked ones included, as NDJSON or CSV. Staff only.
+    :param request: request object
+    :param format: "ndjson" or "csv"
+    :param created_from: only comments created at or after this
+    :param created_to: only comments created before this
+    :param updated_since: only comments updated at or after this
+    :return: streamed export, 403 for non-staff users
+    """
+    if not request.auth.is_staff:
+        return 403, {"message": "You do not have permission to export comments"}
+
+    comments = filter_export_queryset(Comment.objects.all(), created_from, created_to, updated_since)
+    return export_response(iter_queryset_rows(comments, COMMENT_EXPORT_FIELDS), COMMENT_EXPORT_FIELDS, format,
+                           "comments")
+
+
+@router.get("/changes", response={200: CommentChangesSchema, 400: ErrorSchema})
+def get_comment_changes(request, cursor: str = None, limit: int = 100):
+    """
+    List comments created, updated or blocked since a cursor, oldest change first.
+    Blocked comments are returned as tombstones without their text.
+    :param request: request object
+    :param cursor: next_cursor of the previous page, omitted for the first sync
+    :param limit: page size, at most CHANGE_FEED_MAX_PAGE_SIZE
+    :return: changed comments and the cursor to continue from, 400 if the cursor is invalid
+    """
+    limit = max(1, min(limit, settings.CHANGE_FEED_MAX_PAGE_SIZE))
+    try:
+        comments, next_cursor, has_more = get_changes(Comment.objects.all(), cursor, limit)
+    except ValueError as e:
+        return 400, {"message": str(e)}
+
+    items = [
+        {
+            'id': comment.pk,
+            'updated_at': comment.updated_at,
+            'deleted': comment.is_blocked,
+            'comment': None if comment.is_blocked else comment,
+        } for comment in comments
+    ]
+    return 200, {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
+
+
 @router.post("/",
              response={201: CommentOutSchema, 400: ErrorSchema, 404: ErrorSchema, 500: ErrorSchema},
              auth=JWTBearer())
 def create_comment(request, comment_data: CommentInSchema):
-    from apps.comments.tasks import auto_reply_to_comment
     if not comment_data.post_id:
         return 400, {"message": "post_id is required when creating comment"}
     try:
@@ -67,13 +174,6 @@ def create_comment(request, comment_data: CommentInSchema):
             author=user,
         )
 
-        # Schedule auto-reply if enabled
-        if post.auto_reply_enabled and post.auto_reply_delay > 0:
-            auto_reply_to_comment.apply_async(
-                (comment.id,),
-                countdown=post.auto_reply_delay
-            )
-
         return 201, comment
     except Exception as e:
         return 500, {"message": str(e)}
@@ -96,7 +196,10 @@ def reply_to_comment(request, pk: int, reply_data: CommentInSchema):
     except Comment.DoesNotExist:
         return 404, {"message": "Comment does not exist"}
 
-    # Create the reply
+    if parent_comment.depth + 1 >= MAX_THREAD_DEPTH:
+        return 400, {"message": f"Threads can't be deeper than {MAX_THREAD_DEPTH} comments"}
+
+    # Create the reply, its path is set from the parent's on insert
     reply = Comment.objects.create(
         text=reply_data.text,
         post=parent_comment.post,
@@ -107,59 +210,168 @@ def reply_to_comment(request, pk: int, reply_data: CommentInSchema):
     return 201, reply
 
 
+@router.get("/batch", response={200: CommentBatchSchema, 400: ErrorSchema})
+def get_comments_batch(request, ids: str):
+    """
+    Retrieve several comments at once, from the per-object cache where possible and with one query for the rest.
+    Replies aren't included, they can be requested in the same batch.
+    :param request: request object
+    :param ids: comma separated comment ids, at most BATCH_MAX_IDS
+    :return: visible comments in the requested order and the ids that are missing or blocked, 400 if ids is invalid
+    """
+    try:
+        ids = parse_ids(ids)
+    except ValueError as e:
+        return 400, {"message": str(e)}
+
+    return 200, get_batch(Comment, ids, _serialize_comment)
+
+
+@router.get("/{pk}/thread", response={200: CommentThreadSchema, 400: ErrorSchema, 404: ErrorSchema})
+def get_comment_thread(request, pk: int, cursor: str = None, limit: int = 100, max_depth: int = None):
+    """
+    Page through a comment and all its visible replies in depth first order, as one range scan of the path index.
+    :param request: request object
+    :param pk: primary key of the comment the sub-thread starts at
+    :param cursor: next_cursor of the previous page, omitted for the first page
+    :param limit: page size, at most THREAD_MAX_PAGE_SIZE
+    :param max_depth: only replies up to this many levels below the comment
+    :return: comments of the sub-thread and the cursor to continue from, 400 if the cursor is invalid,
+    404 if the comment does not exist
+    """
+    limit = max(1, min(limit, settings.THREAD_MAX_PAGE_SIZE))
+    root = Comment.objects.filter(pk=pk, is_blocked=False).first()
+    if root is None:
+        return 404, {"message": "Comment does not exist"}
+    try:
+        comments, next_cursor, has_more = get_subthread_page(root, cursor, limit, max_depth)
+    except ValueError as e:
+        return 400, {"message": str(e)}
+    return 200, {'items': comments, 'next_cursor': next_cursor, 'has_more': has_more}
+
+
+@router.get("/{pk}/thread/count", response={200: CommentThreadCountSchema, 404: ErrorSchema})
+def count_comment_thread(request, pk: int, max_depth: int = None):
+    """
+    Count a comment and all its visible replies, as one range scan of the path index.
+    :param request: request object
+    :param pk: primary key of the comment the sub-thread starts at
+    :param max_depth: only replies up to this many levels below the comment
+    :return: number of comments, 404 if the comment does not exist
+    """
+    root = Comment.objects.filter(pk=pk, is_blocked=False).first()
+    if root is None:
+        return 404, {"message": "Comment does not exist"}
+    return 200, {'count': subthread(root, max_depth).count()}
+
+
 @router.get("/{pk}", response={200: CommentOutSchema, 404: ErrorSchema})
-def get_comment(request, pk: int):
+def get_comment(request, pk: int, response: HttpResponse):
     """
     Retrieve a comment and its replies
     :param request: request object
     :param pk: primary key of the comment to retrieve
+    :param response: response whose ETag header is set to the comment's version
     :return: comment and its replies
     """
     try:
         comment = get_object_or_404(Comment, pk=pk, is_blocked=False)
+        response["ETag"] = etag(comment.version)
         return 200, comment
     except Comment.DoesNotExist:
         return 404, {"message": "Comment does not exist"}
 
 
-@router.put("/{pk}", response={200: CommentOutSchema, 403: ErrorSchema, 404: ErrorSchema}, auth=JWTBearer())
-def update_comment(request, pk: int, comment_data: CommentInSchema):
+def _update_comment(request, pk: int, data: dict, response: HttpResponse):
+    """
+    Shared by PUT and PATCH: write the changed fields of data if the user may edit the comment and it's still at the
+    version the client read.
     """
-    Update a comment
+    # The post is needed for its moderation threshold if the text changed
+    comment = Comment.objects.editable_by(request.auth).filter(pk=pk).select_related('post').first()
+    if comment is None:
+        # Tell apart the two failures only once the comment couldn't be loaded
+        if Comment.objects.filter(pk=pk, is_blocked=False).exists():
+            return 403, {"message": "You do not have permission to edit this comment"}
+        return 404, {"message": "No Comment matches the given query"}
+
+    if not save_if_match(comment, data, request.headers.get("If-Match")):
+        return 412, {"message": "The comment was changed since it was read, read it again"}
+
+    response["ETag"] = etag(comment.version)
+    return 200, comment
+
+
+@router.put("/{pk}", response={200: CommentOutSchema, 403: ErrorSchema, 404: ErrorSchema, 412: ErrorSchema},
+            auth=JWTBearer())
+def update_comment(request, pk: int, comment_data: CommentInSchema, response: HttpResponse):
+    """
+    Update a comment. The text is only written and re-moderated if it changed. An If-Match header with the comment's
+    ETag is optional.
     :param request: request object
     :param pk: primary key of the comment to update
     :param comment_data: data to update
+    :param response: response whose ETag header is set to the new version
     :return: 200 if comment was updated, 403 if user does not have permission to update comment,
-    404 if comment does not exist
+    404 if comment does not exist, 412 if the comment was changed since the version in If-Match (or since it was loaded)
     """
-    user = request.auth
-    comment = get_object_or_404(Comment, pk=pk, is_blocked=False)
+    return _update_comment(request, pk, {'text': comment_data.text}, response)
 
-    if comment.author != user and not user.is_staff:
-        return 403, {"message": "You do not have permission to edit this comment"}
 
-    comment.text = comment_data.text
-    comment.save()
-
-    return comment
+@router.patch("/{pk}",
+              response={200: CommentOutSchema, 403: ErrorSchema, 404: ErrorSchema, 412: ErrorSchema, 428: ErrorSchema},
+              auth=JWTBearer())
+def patch_comment(request, pk: int, comment_data: CommentPatchSchema, response: HttpResponse):
+    """
+    Partially update a comment, only the fields sent are changed. Requires an If-Match header with the ETag of the
+    version the changes are based on, so that concurrent updates can't overwrite each other.
+    :param request: request object
+    :param pk: primary key of the comment to update
+    :param comment_data: fields to change
+    :param response: response whose ETag header is set to the new version
+    :return: 200 if comment was updated, 403 if user does not have permission to update comment,
+    404 if comment does not exist, 412 if the comment was changed since that version, 428 if If-Match is missing
+    """
+    if "If-Match" not in request.headers:
+        return 428, {"message": "If-Match header with the comment's ETag is required"}
+    return _update_comment(request, pk, comment_data.dict(exclude_none=True), response)
 
 
 @router.delete("/{pk}", response={204: None, 403: ErrorSchema, 404: ErrorSchema}, auth=JWTBearer())
 def delete_comment(request, pk: int):
     """
-    Delete an existing comment
+    Delete an existing comment, with a single UPDATE checking that the user is its author or staff. The replies below
+    it are hidden with it.
     :param request: request object
     :param pk: primary key of the comment to delete
     :return: 204 if comment deleted successfully, 403 if user does not have permission to delete comment,
     404 if comment does not exist
     """
-    comment = get_object_or_404(Comment, pk=pk, is_blocked=False)
-    user = request.auth
+    with transaction.atomic():
+        if Comment.objects.soft_delete(pk, request.auth):
+            cascade_blocked(True, comment_id=pk)
+            return 204, None
 
-    # Check if the authenticated user is staff or the comment's author
-    if comment.author != user and not user.is_staff:
+    if Comment.objects.filter(pk=pk, is_blocked=False).exists():
         return 403, {"message": "You do not have permission to delete this comment"}
+    return 404, {"message": "No Comment matches the given query"}
+
+
+@router.post("/{pk}/restore", response={204: None, 403: ErrorSchema, 404: ErrorSchema}, auth=JWTBearer())
+def restore_comment(request, pk: int):
+    """
+    Restore a deleted comment along with the replies hidden by its deletion. Authors can restore comments they
+    deleted, staff any comment deleted by its author or staff, as long as its post and parent are visible.
+    :param request: request object
+    :param pk: primary key of the comment to restore
+    :return: 204 if the comment was restored, 403 if user does not have permission to restore the comment or its
+    post or parent is deleted, 404 if no deleted comment was found
+    """
+    with transaction.atomic():
+        if Comment.objects.restore(pk, request.auth):
+            cascade_blocked(False, comment_id=pk)
+            return 204, None
 
-    comment.is_blocked = True
-    comment.save()
-    return 204, None
+    if Comment.objects.filter(pk=pk, is_blocked=True).exists():
+        return 403, {"message": "You do not have permission to restore this comment"}
+    return 404, {"message": "No deleted Comment matches the given query"}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.comments'
+
+    def ready(self):
+        from apps.comments import handlers  # noqa: F401
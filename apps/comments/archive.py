@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from apps.comments.models import ArchivedComment, Comment
+
+
+def archive_blocked_threads(older_than: datetime, batch_size: int) -> int:
+    """
+    Move comments of blocked threads that haven't changed since older_than into ArchivedComment.
+
+    A comment is archived once it is blocked, has no replies left in the comments table and is either a top level
+    comment or a reply to another blocked comment, so a thread is archived from its leaves up and visible comments
+    never lose their parent. Blocked comments are already hidden by the API, archiving them doesn't change any
+    response, it only keeps the live table small.
+    :param older_than: only comments created and last updated before this are archived
+    :param batch_size: number of comments moved per transaction
+    :return: number of archived comments
+    """
+    candidates = Comment.objects.filter(
+        Q(parent__isnull=True) | Q(parent__is_blocked=True),
+        is_blocked=True,
+        created_at__lt=older_than,
+        updated_at__lt=older_than,
+    ).exclude(
+        Exists(Comment.objects.filter(parent_id=OuterRef('pk')))
+    ).order_by('pk')
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(candidates.select_for_update(skip_locked=True, of=('self',))[:batch_size])
+            if not batch:
+                return archived
+            ArchivedComment.objects.bulk_create([ArchivedComment.from_comment(comment) for comment in batch])
+            Comment.objects.filter(pk__in=[comment.pk for comment in batch]).delete()
+        archived += len(batch)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.core.serializers.json import DjangoJSONEncoder
+
+from PostManagementAPI.broadcast import Broadcaster
+from PostManagementAPI.redis_client import get_redis
+from apps.comments.models import Comment
+
+comment_broadcaster = Broadcaster("comments:post:*")
+
+COMMENT_EVENT_FIELDS = ("id", "post_id", "author_id", "parent_id", "text", "created_at")
+
+
+def comment_channel(post_id: int) -> str:
+    return f"comments:post:{post_id}"
+
+
+def comment_event(comment: Comment) -> dict:
+    return {field: getattr(comment, field) for field in COMMENT_EVENT_FIELDS}
+
+
+def publish_comment(payload: dict):
+    """
+    Publish a new comment to the live stream of its post.
+    :param payload: payload of the comment's "comment.created" outbox event
+    :raises RedisError: if Redis can't be reached, so the outbox relay retries
+    """
+    event = {field: payload[field] for field in COMMENT_EVENT_FIELDS}
+    get_redis().publish(comment_channel(payload["post_id"]), json.dumps(event, cls=DjangoJSONEncoder))
+
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: comment\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+def _close_connection():
+    # A connection inside a transaction (tests run in one) can't be given up
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+async def release_db_connection():
+    """
+    Close the database connection async ORM calls opened in the request's sync thread. It would only be closed by
+    request_finished, which for a stream fires once the client disconnects, so an idle stream would hold it for hours.
+    """
+    await sync_to_async(_close_connection)()
+
+
+async def comment_event_stream(post_id: int, last_event_id: int = None):
+    """
+    Server-Sent Events of the comments added to a post.
+
+    Comments after last_event_id are replayed from the database first (at most SSE_REPLAY_LIMIT), so a client that
+    reconnects doesn't miss what was published while it was away, then the database connection is released. Idle
+    streams get a comment line every SSE_HEARTBEAT_SECONDS to keep proxies from closing them.
+    :param post_id: id of the post
+    :param last_event_id: Last-Event-ID sent by a reconnecting client
+    """
+    # Subscribe before replaying, anything committed in between arrives through the subscription
+    async with comment_broadcaster.subscribe(comment_channel(post_id)) as subscription:
+        yield f"retry: {settings.SSE_RETRY_MILLISECONDS}\n\n"
+
+        last_id = last_event_id or 0
+        if last_event_id is not None:
+            missed = Comment.objects.filter(post_id=post_id, is_blocked=False, pk__gt=last_event_id).order_by('pk')
+            async for comment in missed[:settings.SSE_REPLAY_LIMIT]:
+                last_id = comment.pk
+                yield format_event(comment_event(comment))
+            await release_db_connection()
+
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                # Too far behind, the client reconnects and replays from its last event
+                return
+
+            event = json.loads(message)
+            if event["id"] <= last_id:
+                continue
+            last_id = event["id"]
+            yield f"id: {event['id']}\nevent: comment\ndata: {message.decode()}\n\n"
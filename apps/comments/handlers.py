@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.utils.dateparse import parse_datetime
+
+from apps.comments.events import publish_comment
+from apps.comments.tasks import auto_reply_to_comment
+from apps.outbox.relay import outbox_handler
+from apps.posts.models import Post
+
+
+@outbox_handler('comment.created')
+def publish_live_comment(event):
+    """
+    Push new visible comments, auto-replies included, to the live stream of their post.
+    """
+    if not event.payload['is_blocked']:
+        publish_comment(event.payload)
+
+
+@outbox_handler('comment.created')
+def schedule_auto_reply(event):
+    """
+    Schedule the post author's auto-reply to a new top level comment, auto_reply_delay seconds after it was written.
+    """
+    payload = event.payload
+    if payload['parent_id'] is not None:
+        return
+    post = Post.objects.filter(pk=payload['post_id']).values('auto_reply_enabled', 'auto_reply_delay').first()
+    if post is None or not post['auto_reply_enabled'] or post['auto_reply_delay'] <= 0:
+        return
+
+    eta = parse_datetime(payload['created_at']) + timedelta(seconds=post['auto_reply_delay'])
+    auto_reply_to_comment.apply_async((payload['id'],), {'dedup_key': event.dedup_key}, eta=eta)
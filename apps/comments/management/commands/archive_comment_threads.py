@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.comments.archive import archive_blocked_threads
+
+
+class Command(BaseCommand):
+    help = "Move comments of old blocked threads into the comment archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.COMMENT_ARCHIVE_AFTER_DAYS,
+                            help="Archive threads that haven't changed for this many days.")
+        parser.add_argument("--batch-size", type=int, default=settings.COMMENT_ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options["days"])
+        archived = archive_blocked_threads(older_than, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{archived} comments archived."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.comments.partitioning import create_future_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Create the monthly comment partitions for the current month and the next COMMENT_PARTITIONS_AHEAD months."
+
+    def handle(self, *args, **options):
+        if not is_partitioned(connection):
+            raise CommandError("The comments table isn't partitioned, see COMMENTS_PARTITIONED.")
+
+        created = create_future_partitions(connection)
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created."))
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_comment_parent'),
+        ('posts', '0003_post_posts_post_created_dadbfe_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='comments_co_created_5f6a12_idx'),
+        ),
+    ]
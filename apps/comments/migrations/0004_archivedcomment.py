@@ -0,0 +1,26 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0003_comment_comments_co_created_5f6a12_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('author_id', models.BigIntegerField()),
+                ('post_id', models.BigIntegerField(db_index=True)),
+                ('parent_id', models.BigIntegerField(null=True)),
+                ('text_compressed', models.BinaryField()),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
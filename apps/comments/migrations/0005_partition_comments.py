@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations
+
+from apps.comments.partitioning import is_supported, partition_comments_table
+
+
+def partition_comments(apps, schema_editor):
+    """
+    Convert the comments table to monthly range partitions when COMMENTS_PARTITIONED is enabled on PostgreSQL.
+    Anywhere else the table stays a plain table.
+    """
+    if not settings.COMMENTS_PARTITIONED or not is_supported(schema_editor.connection):
+        return
+
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    post_model = apps.get_model('posts', 'Post')
+    partition_comments_table(
+        schema_editor.connection,
+        user_table=user_model._meta.db_table,
+        post_table=post_model._meta.db_table,
+        created_at_index='comments_co_created_5f6a12_idx',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0004_archivedcomment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Not reversible into a plain table, migrating backwards leaves the partitions in place and migrating forwards
+        # again is a no-op for an already partitioned table
+        migrations.RunPython(partition_comments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0005_partition_comments'),
+        ('posts', '0004_post_posts_post_updated_a662aa_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at', 'id'], name='comments_co_updated_92c842_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0006_comment_comments_co_updated_92c842_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='moderated_by',
+            field=models.CharField(blank=True, choices=[('', 'Nobody'), ('classifier', 'Classifier'), ('staff', 'Staff'), ('author', 'Author')], default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='moderation_model_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='moderation_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
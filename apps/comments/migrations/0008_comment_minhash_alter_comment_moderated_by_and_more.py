@@ -0,0 +1,30 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0007_comment_moderated_by_and_more'),
+        ('posts', '0007_alter_post_moderated_by'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='moderated_by',
+            field=models.CharField(blank=True, choices=[('', 'Nobody'), ('classifier', 'Classifier'), ('staff', 'Staff'), ('author', 'Author'), ('flood', 'Flood detection')], default='', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'created_at'], name='comments_co_author__a235af_idx'),
+        ),
+    ]
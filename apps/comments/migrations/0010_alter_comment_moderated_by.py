@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0009_comment_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='moderated_by',
+            field=models.CharField(blank=True, choices=[('', 'Nobody'), ('classifier', 'Classifier'), ('staff', 'Staff'), ('author', 'Author'), ('flood', 'Flood detection'), ('cascade', 'Deleted with its thread')], default='', max_length=16),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+# apps.comments.models.PATH_SEGMENT_LENGTH at the time of this migration
+PATH_SEGMENT_LENGTH = 12
+
+
+def fill_paths(apps, schema_editor):
+    """
+    Set the path of existing comments with one UPDATE per thread level: top level comments first, then the replies
+    of comments whose path is set, until no reply is left.
+    """
+    Comment = apps.get_model('comments', 'Comment')
+    comments = Comment.objects.using(schema_editor.connection.alias)
+    segment = LPad(Cast('id', models.CharField()), PATH_SEGMENT_LENGTH, Value('0'))
+    pending = comments.filter(path='')
+
+    updated = pending.filter(parent__isnull=True).update(path=segment)
+    while updated:
+        parent_path = Subquery(comments.filter(pk=OuterRef('parent_id')).values('path')[:1])
+        updated = pending.filter(parent__path__gt='').update(path=Concat(parent_path, segment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0010_alter_comment_moderated_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=1200),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        # Created once the paths are filled in
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['path'], name='comments_comment_path_idx'),
+        ),
+    ]
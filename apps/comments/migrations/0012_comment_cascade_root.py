@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-19 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0011_comment_path'),
+        ('posts', '0009_alter_post_moderated_by'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='cascade_root',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('cascade_root', ''), _negated=True), fields=['cascade_root'], name='comments_cascade_root_idx'),
+        ),
+    ]
@@ -1,14 +1,30 @@
+import zlib
+from typing import List
+
 from ckeditor.fields import RichTextField
 from django.contrib.auth import get_user_model
 from django.db import models
-from profanity_check import predict_prob
+from django.db.models import Q
 
-from apps.posts.models import Post
+from PostManagementAPI.object_cache import ObjectCacheMixin
+from PostManagementAPI.updates import VersionedMixin
+from apps.moderation.scoring import MODERATION_FIELDS, ModeratedBy, moderate
+from apps.outbox.models import OutboxEventsMixin
+from apps.posts.models import Post, BlockableQuerySet
 
 User = get_user_model()
 
+# Every comment's path is its parent's path followed by its own id, zero padded to this many digits
+PATH_SEGMENT_LENGTH = 12
+# Replies deeper than this aren't accepted
+MAX_THREAD_DEPTH = 100
+
+
+def path_segment(pk: int) -> str:
+    return f"{pk:0{PATH_SEGMENT_LENGTH}d}"
 
-class Comment(models.Model):
+
+class Comment(VersionedMixin, ObjectCacheMixin, OutboxEventsMixin, models.Model):
     """
     Comment model.
     """
@@ -18,6 +34,13 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_blocked = models.BooleanField(default=False)
+    moderated_by = models.CharField(max_length=16, choices=ModeratedBy.choices, default=ModeratedBy.NOBODY, blank=True)
+    moderation_score = models.FloatField(null=True, blank=True)
+    moderation_model_version = models.CharField(max_length=64, blank=True, default='')
+    # Incremented by every write, for optimistic concurrency control (If-Match)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # MinHash signature of the text (see apps.moderation.fingerprints), for flood detection
+    minhash = models.BinaryField(null=True, blank=True)
     parent = models.ForeignKey(
         'self',
         on_delete=models.CASCADE,
@@ -25,18 +48,122 @@ class Comment(models.Model):
         blank=True,
         related_name='replies'
     )
+    # The deleted post or comment ("post:<id>" or "comment:<id>") whose cascade hid this comment, restoring it shows
+    # exactly these comments again (see apps.comments.threads)
+    cascade_root = models.CharField(max_length=32, blank=True, default='', editable=False)
+    # Materialized path, e.g. "000000000003000000000017" for comment 17 replying to comment 3. Sorting by it lists a
+    # thread depth first, and a subtree is a contiguous range of it (see apps.comments.threads.subtree_range).
+    path = models.CharField(max_length=PATH_SEGMENT_LENGTH * MAX_THREAD_DEPTH, blank=True, default='', editable=False)
+
+    objects = BlockableQuerySet.as_manager()
+
+    # Comments are moderated with the threshold of their post
+    moderation_threshold_lookup = 'post__moderation_threshold'
+    # Deleted comments can only be restored by BlockableQuerySet.restore into a visible post, and not below a deleted
+    # comment. A parent blocked by moderation doesn't matter, its replies stay visible.
+    restore_condition = Q(post__is_blocked=False) & (
+        Q(parent__isnull=True)
+        | Q(parent__is_blocked=False)
+        | ~Q(parent__moderated_by__in=(ModeratedBy.AUTHOR, ModeratedBy.STAFF, ModeratedBy.CASCADE))
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            # Change feed keyset
+            models.Index(fields=['updated_at', 'id']),
+            # Recent comments of an author, for flood detection
+            models.Index(fields=['author', 'created_at']),
+            # Sub-threads, read as a range of paths in index order
+            models.Index(fields=['path'], name='comments_comment_path_idx'),
+            # Comments hidden by a cascade, looked up by restores
+            models.Index(fields=['cascade_root'], name='comments_cascade_root_idx', condition=~Q(cascade_root='')),
+        ]
 
     def __str__(self):
         return f"{self.author} - {self.post}"
 
-    def save(self, *args, **kwargs):
+    def outbox_payload(self) -> dict:
+        return {
+            'id': self.pk,
+            'post_id': self.post_id,
+            'author_id': self.author_id,
+            'parent_id': self.parent_id,
+            'text': self.text,
+            'is_blocked': self.is_blocked,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+    def moderation_texts(self) -> List[str]:
+        return [self.text]
+
+    @property
+    def depth(self) -> int:
+        """
+        :return: 0 for top level comments, 1 for their replies and so on
+        """
+        return len(self.path) // PATH_SEGMENT_LENGTH - 1
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None,
+                    update_fields=None):
+        updated = super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+        if not updated and not raw and not self.path:
+            # The path ends with the id, known only once inserted. Same transaction as the insert and its outbox event.
+            parent_path = self.parent.path if self.parent_id is not None else ''
+            self.path = parent_path + path_segment(self.pk)
+            # created_at lets PostgreSQL prune the UPDATE to a single partition of a partitioned comments table
+            type(self)._base_manager.using(using).filter(pk=self.pk, created_at=self.created_at).update(path=self.path)
+        return updated
+
+    def save(self, *args, flood_detection: bool = True, **kwargs):
         """
-        Override save method to check for profanity before saving to database.
+        Override save method to score the text for profanity before saving to database, blocking the comment above
+        the threshold of its post. Partial saves that don't touch the text skip the check.
         :param args: additional arguments
+        :param flood_detection: False to skip flood detection, for replies the system writes (auto-replies)
         :param kwargs: additional keyword arguments
         :return:
         """
-        if predict_prob([self.text])[0] > 0.5:
-            self.is_blocked = True
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' not in update_fields:
+            return super().save(*args, **kwargs)
 
+        moderate(self, self.post.moderation_threshold, fingerprints=True, flood_detection=flood_detection)
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *MODERATION_FIELDS, 'minhash'}
         super().save(*args, **kwargs)
+
+
+class ArchivedComment(models.Model):
+    """
+    A comment of an old, fully blocked thread moved out of the comments table by archive_blocked_threads.
+    Archived comments are never served by the API, they only count towards the daily breakdown.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    author_id = models.BigIntegerField()
+    post_id = models.BigIntegerField(db_index=True)
+    parent_id = models.BigIntegerField(null=True)
+    text_compressed = models.BinaryField()
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived comment {self.pk}"
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self.text_compressed).decode()
+
+    @classmethod
+    def from_comment(cls, comment: Comment) -> 'ArchivedComment':
+        return cls(
+            id=comment.pk,
+            author_id=comment.author_id,
+            post_id=comment.post_id,
+            parent_id=comment.parent_id,
+            text_compressed=zlib.compress(comment.text.encode()),
+            created_at=comment.created_at,
+            updated_at=comment.updated_at,
+        )
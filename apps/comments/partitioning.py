@@ -0,0 +1,120 @@
+"""
+PostgreSQL range partitioning of the comments table by created_at month.
+
+Partitioning is opt-in (COMMENTS_PARTITIONED) and only available on PostgreSQL. The partitioned table keeps the
+columns of the plain one, but:
+- its primary key is (id, created_at), ids still come from a single sequence and stay unique,
+- Comment.parent has no database level foreign key anymore, since PostgreSQL can't reference a partitioned table
+  by a subset of its primary key. Deleting a parent still cascades, Django emulates on_delete itself.
+"""
+from datetime import date
+
+from django.conf import settings
+
+TABLE = "comments_comment"
+UNPARTITIONED_TABLE = "comments_comment_unpartitioned"
+SEQUENCE = "comments_comment_partitioned_id_seq"
+
+
+def is_supported(connection) -> bool:
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned(connection) -> bool:
+    if not is_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def add_months(month: date, months: int) -> date:
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def create_monthly_partitions(connection, first_month: date, months: int) -> list:
+    """
+    Create the partitions for months starting at first_month, skipping the ones that already exist.
+    :param connection: database connection
+    :param first_month: first day of the first month
+    :param months: number of months
+    :return: names of the partitions that were created
+    """
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months):
+            month = add_months(first_month, offset)
+            name = partition_name(month)
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            cursor.execute(
+                f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [month.isoformat(), add_months(month, 1).isoformat()],
+            )
+            created.append(name)
+    return created
+
+
+def create_future_partitions(connection, today: date = None) -> list:
+    """
+    Make sure partitions exist for the current month and the next COMMENT_PARTITIONS_AHEAD months.
+    :return: names of the partitions that were created
+    """
+    today = today or date.today()
+    return create_monthly_partitions(
+        connection, today.replace(day=1), settings.COMMENT_PARTITIONS_AHEAD + 1
+    )
+
+
+def partition_comments_table(connection, user_table: str, post_table: str, created_at_index: str) -> None:
+    """
+    Convert the plain comments table into a partitioned one and move the existing rows over.
+    Does nothing if the table is already partitioned.
+    """
+    if is_partitioned(connection):
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {UNPARTITIONED_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {UNPARTITIONED_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        )
+        # Identity columns aren't supported on partitioned tables before PostgreSQL 17
+        cursor.execute(f"CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(
+            f"SELECT setval('{SEQUENCE}', COALESCE((SELECT MAX(id) FROM {UNPARTITIONED_TABLE}), 0) + 1, false)"
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"SELECT MIN(created_at) FROM {UNPARTITIONED_TABLE}")
+        oldest = cursor.fetchone()[0]
+
+    today = date.today()
+    first_month = (oldest.date() if oldest else today).replace(day=1)
+    months = (today.year - first_month.year) * 12 + today.month - first_month.month
+    create_monthly_partitions(connection, first_month, months + settings.COMMENT_PARTITIONS_AHEAD + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {UNPARTITIONED_TABLE}")
+        cursor.execute(f"DROP TABLE {UNPARTITIONED_TABLE}")
+
+        # Constraints and indexes are created after the copy, it's a lot faster than maintaining them row by row
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_author_id_fk "
+            f"FOREIGN KEY (author_id) REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_post_id_fk "
+            f"FOREIGN KEY (post_id) REFERENCES {post_table} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        for column in ("author_id", "post_id", "parent_id"):
+            cursor.execute(f"CREATE INDEX {TABLE}_{column}_idx ON {TABLE} ({column})")
+        cursor.execute(f"CREATE INDEX {created_at_index} ON {TABLE} (created_at)")
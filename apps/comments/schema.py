@@ -17,15 +17,79 @@ class CommentInSchema(Schema):
     post_id: int = None
 
 
+class CommentPatchSchema(Schema):
+    # Only the fields sent are changed
+    text: str = None
+
+
 class CommentOutSchema(Schema):
     id: int
     text: str
     author_id: int
     replies: List[ReplySchema] = []
+    # Sent back in If-Match by updates, also returned as the ETag header
+    version: int
     created_at: datetime
 
+    @staticmethod
+    def resolve_replies(obj):
+        # Replies deleted or hidden with a deleted parent aren't listed
+        return obj.replies.filter(is_blocked=False)
+
 
 class CommentAnalyticsSchema(Schema):
     date: date
     total_comments: int
     blocked_comments: int
+
+
+class CommentDataSchema(Schema):
+    id: int
+    text: str
+    post_id: int
+    author_id: int
+    parent_id: Optional[int] = None
+    version: int
+    created_at: datetime
+
+
+class CommentBatchSchema(Schema):
+    items: List[CommentDataSchema]
+    missing: List[int]
+    blocked: List[int]
+
+
+class CommentChangeSchema(Schema):
+    id: int
+    updated_at: datetime
+    # Tombstone for a blocked or deleted comment, comment is null then
+    deleted: bool
+    comment: Optional[CommentDataSchema] = None
+
+
+class CommentChangesSchema(Schema):
+    items: List[CommentChangeSchema]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class ThreadCommentSchema(Schema):
+    id: int
+    text: str
+    author_id: int
+    parent_id: Optional[int] = None
+    # 0 for top level comments
+    depth: int
+    version: int
+    created_at: datetime
+
+
+class CommentThreadSchema(Schema):
+    items: List[ThreadCommentSchema]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class CommentThreadCountSchema(Schema):
+    # The comment itself and its visible replies at any depth
+    count: int
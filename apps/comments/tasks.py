@@ -1,27 +1,105 @@
 from __future__ import absolute_import, unicode_literals
+from datetime import timedelta
+
 from celery import shared_task
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 
-from apps.comments.models import Comment
+from PostManagementAPI.admin_utils import filter_rows
+from apps.comments.archive import archive_blocked_threads
+from apps.comments.models import MAX_THREAD_DEPTH, Comment
+from apps.comments.partitioning import create_future_partitions, is_partitioned
+from apps.comments.threads import set_thread_blocked, thread_ids
+from apps.posts.models import Post
 
 
 @shared_task
-def auto_reply_to_comment(comment_id: int):
-    try:
-        comment = Comment.objects.get(pk=comment_id)
+def auto_reply_to_comment(comment_id: int, dedup_key: str = None):
+    """
+    Write the post author's auto-reply to a comment.
+    :param comment_id: primary key of the comment
+    :param dedup_key: dedup_key of the outbox event that scheduled the reply. The relay may deliver an event more than
+    once, repeated deliveries are recognized by the reply they already wrote.
+    """
+    with transaction.atomic():
+        # Serializes deliveries of the same event, so the second one sees the reply of the first
+        comment = Comment.objects.select_for_update().filter(pk=comment_id).first()
+        if comment is None:
+            return
         post = comment.post
         user = post.author
 
-        # Ensure auto-reply is enabled for the post
-        if not post.auto_reply_enabled:
+        # Ensure auto-reply is enabled for the post, and that the thread isn't at its maximum depth
+        if not post.auto_reply_enabled or comment.depth + 1 >= MAX_THREAD_DEPTH:
             return
 
-        # Create a reply
+        # Every auto-reply of a post has the same text, so a burst of comments must not get them blocked for flooding.
+        # A delivery that failed before writing the reply left nothing behind, a repeated one can still write it.
         reply_text = f"Thank you for your comment on '{post.title}'! We appreciate your input."
-        Comment.objects.create(
+        if Comment.objects.filter(parent=comment, author=user, text=reply_text).exists():
+            return
+        # Its path is set from the comment's on insert
+        Comment(
             text=reply_text,
             post=post,
             author=user,
             parent=comment,
-        )
-    except Comment.DoesNotExist:
-        pass
+        ).save(flood_detection=False)
+
+
+@shared_task(bind=True, ignore_result=False)
+def bulk_set_comments_blocked(self, filters: dict, is_blocked: bool):
+    """
+    Block or unblock every comment matching filters in chunks, reporting progress as task state.
+    :param filters: queryset filter keyword arguments, e.g. {"post_id__in": [1, 2]}, or changelist filters from
+    admin_utils.action_filters
+    :param is_blocked: new value of is_blocked
+    :return: number of updated comments
+    """
+    def progress(updated, total):
+        self.update_state(state='PROGRESS', meta={'updated': updated, 'total': total})
+
+    return filter_rows(Comment, filters).set_blocked_in_chunks(
+        is_blocked, settings.BULK_MODERATION_CHUNK_SIZE, progress
+    )
+
+
+@shared_task
+def cascade_thread_blocked(is_blocked: bool, post_id: int = None, comment_id: int = None):
+    """
+    Hide the comments of a deleted post or the replies below a deleted comment, or show them again once it was
+    restored, for threads too large to be changed during the request (see apps.comments.threads).
+    :param is_blocked: whether the post or comment was deleted (True) or restored (False)
+    :param post_id: primary key of the post
+    :param comment_id: primary key of the comment
+    :return: number of updated comments
+    """
+    root = Post.objects.filter(pk=post_id) if comment_id is None else Comment.objects.filter(pk=comment_id)
+    # Deleted or restored again in the meantime, its own cascade takes over
+    if not root.filter(is_blocked=is_blocked).exists():
+        return 0
+    ids = thread_ids(is_blocked, post_id=post_id, comment_id=comment_id)
+    return set_thread_blocked(ids, is_blocked, post_id=post_id, comment_id=comment_id)
+
+
+@shared_task
+def create_comment_partitions():
+    """
+    Keep COMMENT_PARTITIONS_AHEAD months of comment partitions ahead of time, so new comments never land in the
+    default partition.
+    :return: names of the created partitions
+    """
+    if not is_partitioned(connection):
+        return []
+    return create_future_partitions(connection)
+
+
+@shared_task
+def archive_comment_threads():
+    """
+    Archive the blocked threads that haven't changed for COMMENT_ARCHIVE_AFTER_DAYS days.
+    :return: number of archived comments
+    """
+    older_than = timezone.now() - timedelta(days=settings.COMMENT_ARCHIVE_AFTER_DAYS)
+    return archive_blocked_threads(older_than, settings.COMMENT_ARCHIVE_BATCH_SIZE)
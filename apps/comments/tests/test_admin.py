@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from PostManagementAPI.admin_utils import filter_rows
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class CommentAdminTests(TestCase):
+    def setUp(self):
+        self.changelist_url = reverse('admin:comments_comment_changelist')
+
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.user1 = User.objects.create_user(email='test1@example.com', username='testuser1', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.client.force_login(self.admin)
+
+        self.post = Post.objects.create(title='Test Post', content='This is a test post content.', author=self.user)
+        self.other_post = Post.objects.create(title='Other Post', content='Other post content.', author=self.user)
+        self.comments = [
+            Comment.objects.create(text=f'Comment {i}', post=self.post, author=self.user) for i in range(3)
+        ]
+        self.other_comment = Comment.objects.create(text='Other comment', post=self.other_post, author=self.user1)
+
+    def run_action(self, action, comments):
+        return self.client.post(self.changelist_url, {
+            'action': action,
+            '_selected_action': [comment.pk for comment in comments],
+        })
+
+    def test_block_comments(self):
+        with patch('apps.moderation.scoring.predict_prob') as mocked_predict_prob:
+            response = self.run_action('block_comments', self.comments[:2])
+
+        self.assertEqual(response.status_code, 302)
+        mocked_predict_prob.assert_not_called()
+        self.assertEqual(Comment.objects.filter(is_blocked=True).count(), 2)
+
+    def test_unblock_comments(self):
+        Comment.objects.filter(pk=self.comments[0].pk).set_blocked(True)
+        self.run_action('unblock_comments', self.comments[:1])
+        self.assertFalse(Comment.objects.filter(is_blocked=True).exists())
+
+    def test_block_all_by_author(self):
+        self.run_action('block_all_by_author', [self.other_comment])
+        self.assertEqual(list(Comment.objects.filter(is_blocked=True)), [self.other_comment])
+
+    def test_block_all_by_post(self):
+        self.run_action('block_all_by_post', self.comments[:1])
+        self.assertEqual(Comment.objects.filter(is_blocked=True).count(), len(self.comments))
+        self.assertFalse(Comment.objects.get(pk=self.other_comment.pk).is_blocked)
+
+    @override_settings(ADMIN_BULK_SYNC_LIMIT=2)
+    def test_large_sets_are_handed_over_to_celery(self):
+        with patch('apps.comments.admin.bulk_set_comments_blocked.delay') as mocked_delay:
+            self.run_action('block_all_by_post', self.comments[:1])
+
+        mocked_delay.assert_called_once_with({'post_id__in': [self.post.pk]}, True)
+        self.assertFalse(Comment.objects.filter(is_blocked=True).exists())
+
+    @override_settings(ADMIN_BULK_SYNC_LIMIT=0)
+    def test_select_all_passes_changelist_filters(self):
+        with patch('apps.comments.admin.bulk_set_comments_blocked.delay') as mocked_delay:
+            self.client.post(f"{self.changelist_url}?author={self.user.pk}&is_blocked__exact=0", {
+                'action': 'block_comments',
+                'select_across': '1',
+                '_selected_action': [self.comments[0].pk],
+            })
+
+        filters = mocked_delay.call_args.args[0]
+        self.assertEqual(filters, {
+            'lookups': {'author_id': [self.user.pk], 'is_blocked__exact': ['0']}, 'search': '',
+        })
+        self.assertCountEqual(filter_rows(Comment, filters), self.comments)
+
+    def test_chunked_update(self):
+        progress = []
+        updated = Comment.objects.filter(post=self.post).set_blocked_in_chunks(
+            True, 2, lambda done, total: progress.append((done, total))
+        )
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+
+    def test_partial_save_skips_profanity_check(self):
+        comment = self.comments[0]
+        comment.is_blocked = True
+        with patch('apps.moderation.scoring.predict_prob') as mocked_predict_prob:
+            comment.save(update_fields=['is_blocked', 'updated_at'])
+
+        mocked_predict_prob.assert_not_called()
+
+    def get_changelist_queries(self, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.changelist_url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_query_count_is_bounded(self):
+        queries = self.get_changelist_queries()
+
+        for i in range(10):
+            author = User.objects.create_user(email=f'author{i}@example.com', username=f'author{i}',
+                                              password='password123')
+            Comment.objects.create(text=f'Comment by author {i}', post=self.post, author=author)
+
+        # Neither the number of comments nor the number of authors adds queries
+        self.assertEqual(self.get_changelist_queries(), queries)
+        self.assertLessEqual(queries, 5)
+
+    def test_changelist_author_filter(self):
+        response = self.client.get(self.changelist_url, {'author': self.user1.pk})
+        self.assertEqual(list(response.context['cl'].result_list), [self.other_comment])
+        self.assertContains(response, 'data-model-name="comment"')
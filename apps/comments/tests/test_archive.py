@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from ninja.testing import TestClient
+
+from apps.comments.api import router
+from apps.comments.archive import archive_blocked_threads
+from apps.comments.models import ArchivedComment, Comment
+from apps.comments.partitioning import add_months, is_partitioned, partition_name
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        self.old = timezone.now() - timedelta(days=400)
+
+    def create_comment(self, parent=None, is_blocked=True, created_at=None):
+        comment = Comment.objects.create(text='Old comment', post=self.post, author=self.user, parent=parent)
+        created_at = created_at or self.old
+        Comment.objects.filter(pk=comment.pk).update(
+            is_blocked=is_blocked, created_at=created_at, updated_at=created_at
+        )
+        return comment
+
+    def archive(self):
+        return archive_blocked_threads(timezone.now() - timedelta(days=365), batch_size=1)
+
+    def test_archives_blocked_thread_from_leaves_up(self):
+        root = self.create_comment()
+        reply = self.create_comment(parent=root)
+        self.create_comment(parent=reply)
+
+        self.assertEqual(self.archive(), 3)
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedComment.objects.get(pk=reply.pk)
+        self.assertEqual(archived.parent_id, root.pk)
+        self.assertEqual(archived.text, 'Old comment')
+
+    def test_keeps_threads_with_visible_or_recent_comments(self):
+        root = self.create_comment()
+        self.create_comment(parent=root, is_blocked=False)
+        recent = self.create_comment(created_at=timezone.now())
+        visible_root = self.create_comment(is_blocked=False)
+        self.create_comment(parent=visible_root)
+
+        self.assertEqual(self.archive(), 0)
+        self.assertEqual(Comment.objects.filter(pk__in=[root.pk, recent.pk, visible_root.pk]).count(), 3)
+
+    def test_daily_breakdown_includes_archived_comments(self):
+        self.create_comment()
+        self.create_comment(is_blocked=False)
+        self.archive()
+
+        day = self.old.date()
+        response = self.client.get(f"/comments-daily-breakdown?date_from={day}&date_to={day}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'date': str(day), 'total_comments': 2, 'blocked_comments': 1}])
+
+    def test_archive_command(self):
+        self.create_comment()
+
+        call_command('archive_comment_threads', days=365, stdout=StringIO())
+
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+
+
+class PartitioningTests(TestCase):
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), 11), date(2024, 12, 1))
+
+    def test_partition_name(self):
+        self.assertEqual(partition_name(date(2024, 2, 1)), 'comments_comment_p2024_02')
+
+    @skipIf(connection.vendor == 'postgresql', "Partitioning is available on PostgreSQL")
+    def test_create_partitions_requires_partitioned_table(self):
+        self.assertFalse(is_partitioned(connection))
+        with self.assertRaises(CommandError):
+            call_command('create_comment_partitions', stdout=StringIO())
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from ninja.testing import TestClient
+
+from apps.comments.api import router
+from apps.comments.models import Comment
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class CommentBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        self.comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        self.reply = Comment.objects.create(text='Reply', post=self.post, author=self.user, parent=self.comment)
+        self.blocked = Comment.objects.create(text='Blocked', post=self.post, author=self.user, is_blocked=True)
+
+    def test_batch(self):
+        response = self.client.get(f"/batch?ids={self.reply.pk},{self.blocked.pk},{self.comment.pk},999")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['items']], [self.reply.pk, self.comment.pk])
+        self.assertEqual(data['items'][0]['parent_id'], self.comment.pk)
+        self.assertEqual(data['blocked'], [self.blocked.pk])
+        self.assertEqual(data['missing'], [999])
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from ninja.testing import TestClient
+
+from apps.comments.api import router
+from apps.comments.models import Comment
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class CommentChangesTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        self.comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        self.reply = Comment.objects.create(text='Reply', post=self.post, author=self.user, parent=self.comment)
+
+    def test_changes_with_tombstones(self):
+        cursor = self.client.get("/changes?limit=1").json()['next_cursor']
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(True)
+
+        response = self.client.get(f"/changes?cursor={cursor}")
+
+        self.assertEqual(response.status_code, 200)
+        items = response.json()['items']
+        self.assertEqual([item['id'] for item in items], [self.reply.pk, self.comment.pk])
+        self.assertEqual(items[0]['comment']['parent_id'], self.comment.pk)
+        self.assertTrue(items[1]['deleted'])
+        self.assertIsNone(items[1]['comment'])
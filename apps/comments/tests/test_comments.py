@@ -4,6 +4,7 @@ from ninja.testing import TestClient
 from apps.posts.models import Post
 from apps.comments.models import Comment
 from apps.comments.tasks import auto_reply_to_comment
+from apps.moderation.scoring import ModeratedBy
 
 from unittest.mock import patch
 import json
@@ -151,6 +152,75 @@ class CommentTests(TestCase):
                                    headers=self.auth_headers)
         self.assertEqual(response.status_code, 404)
 
+    def test_update_comment_unchanged_text_not_written(self):
+        updated_at = self.comment.updated_at
+        with patch('apps.moderation.scoring.predict_prob') as predict_prob:
+            response = self.client.put(self.update_comment_url.format(pk=self.comment.pk),
+                                       json={'text': self.comment.text}, headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 200)
+        predict_prob.assert_not_called()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.updated_at, updated_at)
+
+    def test_patch_comment(self):
+        response = self.client.patch(self.update_comment_url.format(pk=self.comment.pk), json={'text': 'Patched text'},
+                                     headers={**self.auth_headers, 'If-Match': '"1"'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 2)
+        self.assertEqual(response['ETag'], '"2"')
+
+    def test_patch_comment_stale_version(self):
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(True)
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(False)
+
+        response = self.client.patch(self.update_comment_url.format(pk=self.comment.pk), json={'text': 'Patched text'},
+                                     headers={**self.auth_headers, 'If-Match': 'W/"1"'})
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Comment.objects.get(pk=self.comment.pk).version, 3)
+
+    def test_patch_comment_if_match_any_version(self):
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(True)
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(False)
+
+        response = self.client.patch(self.update_comment_url.format(pk=self.comment.pk), json={'text': 'Patched text'},
+                                     headers={**self.auth_headers, 'If-Match': '*'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 4)
+
+    def test_patch_comment_if_match_list(self):
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(True)
+        Comment.objects.filter(pk=self.comment.pk).set_blocked(False)
+        url = self.update_comment_url.format(pk=self.comment.pk)
+
+        response = self.client.patch(url, json={'text': 'Patched text'},
+                                     headers={**self.auth_headers, 'If-Match': '"1", W/"2"'})
+        self.assertEqual(response.status_code, 412)
+
+        response = self.client.patch(url, json={'text': 'Patched text'},
+                                     headers={**self.auth_headers, 'If-Match': '"1", W/"3"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_patch_comment_without_if_match(self):
+        response = self.client.patch(self.update_comment_url.format(pk=self.comment.pk), json={'text': 'Patched text'},
+                                     headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 428)
+
+    def test_delete_comment_by_staff(self):
+        with patch('apps.moderation.scoring.predict_prob') as predict_prob:
+            response = self.client.delete(self.delete_comment_url.format(pk=self.comment.pk),
+                                          headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 204)
+        predict_prob.assert_not_called()
+        self.comment.refresh_from_db()
+        self.assertTrue(self.comment.is_blocked)
+        self.assertEqual(self.comment.moderated_by, ModeratedBy.STAFF)
+
     def test_delete_comment_success(self):
         response = self.client.delete(self.delete_comment_url.format(pk=self.comment.pk), headers=self.auth_headers)
         self.assertEqual(response.status_code, 204)
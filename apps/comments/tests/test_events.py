@@ -0,0 +1,110 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+from ninja.testing import TestAsyncClient
+
+from apps.comments.events import comment_broadcaster, comment_channel, comment_event_stream
+from apps.comments.handlers import publish_live_comment
+from apps.comments.models import Comment
+from apps.outbox.models import OutboxEvent
+from apps.posts.api import router as posts_router, stream_post_comments
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class CommentPublishTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+
+    @patch('apps.comments.events.get_redis')
+    def test_relayed_comment_published(self, get_redis):
+        comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+
+        publish_live_comment(OutboxEvent.objects.get(topic='comment.created'))
+
+        channel, message = get_redis.return_value.publish.call_args.args
+        self.assertEqual(channel, comment_channel(self.post.pk))
+        self.assertEqual(json.loads(message)['id'], comment.pk)
+
+    @patch('apps.comments.events.get_redis')
+    def test_blocked_comment_not_published(self, get_redis):
+        Comment.objects.create(text='Blocked', post=self.post, author=self.user, is_blocked=True)
+
+        publish_live_comment(OutboxEvent.objects.get(topic='comment.created'))
+
+        get_redis.return_value.publish.assert_not_called()
+
+
+@patch.object(comment_broadcaster, '_ensure_listener')
+class CommentStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        self.comments = [
+            Comment.objects.create(text=f'Comment {number}', post=self.post, author=self.user) for number in range(2)
+        ]
+
+    def dispatch(self, comment_id):
+        message = json.dumps({'id': comment_id, 'post_id': self.post.pk, 'text': 'Live'}).encode()
+        comment_broadcaster.dispatch(comment_channel(self.post.pk), message)
+
+    async def test_replays_missed_comments_then_streams_live_ones(self, ensure_listener):
+        stream = comment_event_stream(self.post.pk, last_event_id=self.comments[0].pk)
+
+        self.assertTrue((await anext(stream)).startswith('retry: '))
+        self.assertIn(f'id: {self.comments[1].pk}\n', await anext(stream))
+
+        # Already replayed, skipped when it also arrives through pub/sub
+        self.dispatch(self.comments[1].pk)
+        self.dispatch(self.comments[1].pk + 1)
+        self.assertIn(f'id: {self.comments[1].pk + 1}\n', await anext(stream))
+        await stream.aclose()
+
+    @override_settings(SSE_HEARTBEAT_SECONDS=0)
+    async def test_heartbeat(self, ensure_listener):
+        stream = comment_event_stream(self.post.pk)
+
+        await anext(stream)
+        self.assertEqual(await anext(stream), ': keepalive\n\n')
+        await stream.aclose()
+
+    @override_settings(SSE_QUEUE_SIZE=1)
+    async def test_slow_consumer_disconnected(self, ensure_listener):
+        stream = comment_event_stream(self.post.pk)
+        await anext(stream)
+
+        self.dispatch(100)
+        self.dispatch(101)
+
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+    @override_settings(SSE_HEARTBEAT_SECONDS=0)
+    async def test_connection_closed_while_idle(self, ensure_listener):
+        with patch('apps.comments.events.connection') as connection:
+            connection.in_atomic_block = False
+            stream = comment_event_stream(self.post.pk, last_event_id=self.comments[0].pk)
+            await anext(stream)
+            await anext(stream)
+            connection.close.assert_not_called()
+
+            self.assertEqual(await anext(stream), ': keepalive\n\n')
+            connection.close.assert_called_once()
+        await stream.aclose()
+
+    async def test_stream_releases_connection_after_post_lookup(self, ensure_listener):
+        request = RequestFactory().get(f"/api/posts/{self.post.pk}/comments/stream")
+        with patch('apps.posts.api.release_db_connection') as release_db_connection:
+            response = await stream_post_comments(request, self.post.pk)
+
+        release_db_connection.assert_awaited_once()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    async def test_unknown_post(self, ensure_listener):
+        response = await TestAsyncClient(posts_router).get(f"/{self.post.pk + 1}/comments/stream")
+
+        self.assertEqual(response.status_code, 404)
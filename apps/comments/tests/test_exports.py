@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from ninja.testing import TestClient
+
+from apps.comments.api import router
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.users.utils import generate_access_token
+
+User = get_user_model()
+
+
+class CommentExportTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.auth_headers = {'Authorization': f'Bearer {generate_access_token(self.user)}'}
+        self.admin_headers = {'Authorization': f'Bearer {generate_access_token(self.admin)}'}
+
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        self.comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        self.reply = Comment.objects.create(text='Reply', post=self.post, author=self.user, parent=self.comment)
+        Comment.objects.filter(pk=self.reply.pk).set_blocked(True)
+
+    def test_export_comments(self):
+        response = self.client.get("/export", headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in response.content.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.comment.pk, self.reply.pk])
+        self.assertEqual(rows[1]['parent_id'], self.comment.pk)
+        self.assertTrue(rows[1]['is_blocked'])
+
+    def test_export_daily_breakdown_csv(self):
+        today = date.today()
+        response = self.client.get(
+            f"/comments-daily-breakdown/export?date_from={today}&date_to={today}&format=csv",
+            headers=self.admin_headers,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual(rows, [{'date': str(today), 'total_comments': '2', 'blocked_comments': '1'}])
+
+    def test_export_staff_only(self):
+        today = date.today()
+
+        self.assertEqual(self.client.get("/export", headers=self.auth_headers).status_code, 403)
+        response = self.client.get(
+            f"/comments-daily-breakdown/export?date_from={today}&date_to={today}", headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 403)
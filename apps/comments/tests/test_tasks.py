@@ -0,0 +1,85 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from kombu import Connection
+
+from PostManagementAPI.celery import app
+from PostManagementAPI.task_metrics import _record_latency, _stamp_published_at, queue_depth
+from apps.comments.tasks import auto_reply_to_comment, bulk_set_comments_blocked
+from apps.moderation.tasks import purge_fingerprints
+
+
+class TaskQueueTests(SimpleTestCase):
+    def test_every_task_routed_to_declared_queue(self):
+        queues = {queue.name for queue in settings.CELERY_TASK_QUEUES}
+        tasks = [name for name in app.tasks if name.startswith('apps.')]
+
+        self.assertTrue(tasks)
+        for name in tasks:
+            with self.subTest(task=name):
+                self.assertIn(settings.CELERY_TASK_ROUTES[name]['queue'], queues)
+
+    def test_route(self):
+        self.assertEqual(app.amqp.router.route({}, auto_reply_to_comment.name)['queue'].name, 'replies')
+
+    def test_acks_late_per_queue(self):
+        self.assertFalse(auto_reply_to_comment.acks_late)
+        self.assertTrue(purge_fingerprints.acks_late)
+
+    def test_results_only_kept_for_progress(self):
+        self.assertTrue(auto_reply_to_comment.ignore_result)
+        self.assertFalse(bulk_set_comments_blocked.ignore_result)
+
+
+class TaskLatencyTests(SimpleTestCase):
+    def run_task(self, **request):
+        request = {'eta': None, 'delivery_info': {'routing_key': 'replies'}, **request}
+        task = SimpleNamespace(request=SimpleNamespace(**request))
+        with patch('PostManagementAPI.task_metrics.metrics.observe') as observe:
+            _record_latency(task=task)
+        return observe
+
+    def test_published_at_stamped(self):
+        headers = {}
+        _stamp_published_at(headers=headers)
+
+        self.assertAlmostEqual(headers['published_at'], time.time(), delta=1)
+
+    def test_latency_since_published(self):
+        observe = self.run_task(published_at=time.time() - 2)
+
+        name, latency = observe.call_args.args
+        self.assertEqual(name, 'celery.replies.latency_ms')
+        self.assertAlmostEqual(latency, 2000, delta=500)
+
+    def test_latency_since_eta(self):
+        eta = time.time() - 1
+        observe = self.run_task(published_at=eta - 3600, eta=datetime.fromtimestamp(eta, timezone.utc).isoformat())
+
+        self.assertAlmostEqual(observe.call_args.args[1], 1000, delta=500)
+
+    def test_eager_tasks_not_measured(self):
+        self.run_task().assert_not_called()
+
+
+class QueueDepthTests(SimpleTestCase):
+    def setUp(self):
+        # An in-memory broker behaves like the Redis one: a queue only exists while it holds messages
+        patcher = patch.object(app, 'connection_for_read', return_value=Connection('memory://'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_empty_queue(self):
+        self.assertEqual(queue_depth('queue-depth-empty'), 0)
+
+    def test_waiting_messages(self):
+        with Connection('memory://') as connection:
+            queue = connection.SimpleQueue('queue-depth-waiting')
+            queue.put({'n': 1})
+            queue.put({'n': 2})
+
+        self.assertEqual(queue_depth('queue-depth-waiting'), 2)
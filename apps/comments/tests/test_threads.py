@@ -0,0 +1,242 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from ninja.testing import TestClient
+
+from apps.comments.api import router as comments_router
+from apps.comments.models import Comment, path_segment
+from apps.comments.tasks import auto_reply_to_comment, cascade_thread_blocked
+from apps.comments.threads import descendant_ids, encode_path_cursor, subtree_range
+from apps.moderation.scoring import ModeratedBy
+from apps.posts.api import router as posts_router
+from apps.posts.models import Post
+from apps.users.utils import generate_access_token
+
+User = get_user_model()
+
+
+class ThreadCascadeTests(TestCase):
+    def setUp(self):
+        self.comments_client = TestClient(comments_router)
+        self.posts_client = TestClient(posts_router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.other = User.objects.create_user(email='test1@example.com', username='testuser1', password='password123')
+        self.auth_headers = {'Authorization': f'Bearer {generate_access_token(self.user)}'}
+        self.other_headers = {'Authorization': f'Bearer {generate_access_token(self.other)}'}
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        # root <- reply <- nested, plus an unrelated top level comment
+        self.root = self.create_comment()
+        self.reply = self.create_comment(self.root, author=self.other)
+        self.nested = self.create_comment(self.reply)
+        self.other_root = self.create_comment()
+
+    def create_comment(self, parent=None, author=None):
+        return Comment.objects.create(text='A comment', post=self.post, author=author or self.user, parent=parent)
+
+    def blocked(self, *comments):
+        return [Comment.objects.get(pk=comment.pk).is_blocked for comment in comments]
+
+    def test_descendant_ids(self):
+        self.assertCountEqual(descendant_ids([self.root.pk]), [self.reply.pk, self.nested.pk])
+        self.assertEqual(len(descendant_ids([self.root.pk], limit=1)), 1)
+        self.assertEqual(descendant_ids([self.nested.pk]), [])
+
+    def test_delete_comment_hides_replies(self):
+        response = self.comments_client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.blocked(self.root, self.reply, self.nested, self.other_root), [True, True, True, False])
+        self.assertEqual(Comment.objects.get(pk=self.nested.pk).moderated_by, ModeratedBy.CASCADE)
+
+    def test_restore_comment_shows_replies_again(self):
+        self.comments_client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        response = self.comments_client.post(f"/{self.root.pk}/restore", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.blocked(self.root, self.reply, self.nested), [False, False, False])
+        self.assertEqual(Comment.objects.get(pk=self.reply.pk).moderated_by, ModeratedBy.NOBODY)
+
+    def test_restore_keeps_separately_deleted_subtree_hidden(self):
+        self.comments_client.delete(f"/{self.reply.pk}", headers=self.other_headers)
+        self.comments_client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        self.comments_client.post(f"/{self.root.pk}/restore", headers=self.auth_headers)
+
+        self.assertEqual(self.blocked(self.root, self.reply, self.nested), [False, True, True])
+
+    def test_restore_comment_permission_denied(self):
+        self.comments_client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        response = self.comments_client.post(f"/{self.root.pk}/restore", headers=self.other_headers)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_restore_reply_of_deleted_comment_denied(self):
+        self.comments_client.delete(f"/{self.reply.pk}", headers=self.other_headers)
+        self.comments_client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        response = self.comments_client.post(f"/{self.reply.pk}/restore", headers=self.other_headers)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_restore_visible_comment_not_found(self):
+        response = self.comments_client.post(f"/{self.root.pk}/restore", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_post_hides_comments(self):
+        response = self.posts_client.delete(f"/{self.post.pk}", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Comment.objects.filter(post=self.post, is_blocked=False).exists())
+        self.assertEqual(self.posts_client.get(f"/{self.post.pk}/comments").status_code, 404)
+
+    def test_restore_post_shows_comments_again(self):
+        self.comments_client.delete(f"/{self.other_root.pk}", headers=self.auth_headers)
+        self.posts_client.delete(f"/{self.post.pk}", headers=self.auth_headers)
+
+        response = self.posts_client.post(f"/{self.post.pk}/restore", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.blocked(self.root, self.reply, self.nested, self.other_root), [False, False, False, True])
+        self.assertEqual(self.posts_client.get(f"/{self.post.pk}/comments").status_code, 200)
+
+    def test_restore_post_shows_replies_below_moderated_comment(self):
+        # A reply stays visible below a comment blocked by moderation
+        Comment.objects.filter(pk=self.reply.pk).set_blocked(True, ModeratedBy.CLASSIFIER)
+        self.posts_client.delete(f"/{self.post.pk}", headers=self.auth_headers)
+
+        self.posts_client.post(f"/{self.post.pk}/restore", headers=self.auth_headers)
+
+        self.assertEqual(self.blocked(self.root, self.reply, self.nested), [False, True, False])
+        self.assertEqual(Comment.objects.get(pk=self.reply.pk).moderated_by, ModeratedBy.CLASSIFIER)
+
+    def test_restore_reply_below_moderated_comment(self):
+        Comment.objects.filter(pk=self.reply.pk).set_blocked(True, ModeratedBy.CLASSIFIER)
+        self.comments_client.delete(f"/{self.nested.pk}", headers=self.auth_headers)
+
+        response = self.comments_client.post(f"/{self.nested.pk}/restore", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.blocked(self.nested), [False])
+
+    def test_replies_of_visible_comment_exclude_deleted(self):
+        self.comments_client.delete(f"/{self.reply.pk}", headers=self.other_headers)
+
+        response = self.comments_client.get(f"/{self.root.pk}")
+
+        self.assertEqual(response.json()['replies'], [])
+
+    @override_settings(THREAD_CASCADE_SYNC_LIMIT=1)
+    def test_large_thread_handed_over_to_task(self):
+        with patch('apps.comments.tasks.cascade_thread_blocked.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.comments_client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        delay.assert_called_once_with(True, post_id=None, comment_id=self.root.pk)
+        self.assertEqual(self.blocked(self.reply, self.nested), [False, False])
+
+        self.assertEqual(cascade_thread_blocked(True, comment_id=self.root.pk), 2)
+        self.assertEqual(self.blocked(self.reply, self.nested), [True, True])
+
+    def test_task_skips_root_restored_meanwhile(self):
+        self.assertEqual(cascade_thread_blocked(True, comment_id=self.root.pk), 0)
+        self.assertEqual(self.blocked(self.reply), [False])
+
+
+class ThreadPathTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(comments_router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.auth_headers = {'Authorization': f'Bearer {generate_access_token(self.user)}'}
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+        # root -> (first -> first_nested), second; other is another thread
+        self.root = self.create_comment()
+        self.first = self.create_comment(self.root)
+        self.second = self.create_comment(self.root)
+        self.first_nested = self.create_comment(self.first)
+        self.other = self.create_comment()
+
+    def create_comment(self, parent=None):
+        return Comment.objects.create(text='A comment', post=self.post, author=self.user, parent=parent)
+
+    def test_path_set_on_insert(self):
+        self.assertEqual(self.root.path, path_segment(self.root.pk))
+        self.assertEqual(Comment.objects.get(pk=self.first_nested.pk).path,
+                         path_segment(self.root.pk) + path_segment(self.first.pk) + path_segment(self.first_nested.pk))
+        self.assertEqual(self.first_nested.depth, 2)
+
+    def test_path_update_filters_on_partition_key(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.create_comment(self.root)
+
+        path_update = next(query['sql'] for query in queries if query['sql'].startswith('UPDATE "comments_comment"'))
+        self.assertIn('"created_at"', path_update.split('WHERE', 1)[1])
+
+    def test_reply_endpoint_sets_path(self):
+        response = self.client.post(f"/{self.second.pk}/reply", json={'text': 'Reply'}, headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 201)
+        reply_id = response.json()['id']
+        self.assertEqual(Comment.objects.get(pk=reply_id).path, self.second.path + path_segment(reply_id))
+
+    def test_auto_reply_sets_path(self):
+        Post.objects.filter(pk=self.post.pk).update(auto_reply_enabled=True)
+
+        auto_reply_to_comment(self.second.pk)
+
+        reply = Comment.objects.get(parent=self.second)
+        self.assertEqual(reply.path, self.second.path + path_segment(reply.pk))
+
+    def test_subtree_range(self):
+        self.assertEqual(subtree_range('000000000001999999999999'),
+                         ('000000000001999999999999', '000000000002000000000000'))
+
+    def test_thread_depth_first_pages(self):
+        first_page = self.client.get(f"/{self.root.pk}/thread?limit=2").json()
+        second_page = self.client.get(f"/{self.root.pk}/thread?limit=2&cursor={first_page['next_cursor']}").json()
+
+        self.assertEqual([item['id'] for item in first_page['items']], [self.root.pk, self.first.pk])
+        self.assertTrue(first_page['has_more'])
+        self.assertEqual([item['id'] for item in second_page['items']], [self.first_nested.pk, self.second.pk])
+        self.assertEqual([item['depth'] for item in second_page['items']], [2, 1])
+        self.assertFalse(second_page['has_more'])
+
+    def test_thread_max_depth(self):
+        response = self.client.get(f"/{self.root.pk}/thread?max_depth=1")
+
+        self.assertEqual([item['id'] for item in response.json()['items']],
+                         [self.root.pk, self.first.pk, self.second.pk])
+
+    def test_thread_count(self):
+        self.client.delete(f"/{self.first.pk}", headers=self.auth_headers)
+
+        response = self.client.get(f"/{self.root.pk}/thread/count")
+
+        self.assertEqual(response.json(), {'count': 2})
+
+    def test_thread_cursor_of_other_thread(self):
+        cursor = encode_path_cursor(self.other.path)
+
+        response = self.client.get(f"/{self.root.pk}/thread?cursor={cursor}")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_thread_of_deleted_comment_not_found(self):
+        self.client.delete(f"/{self.root.pk}", headers=self.auth_headers)
+
+        response = self.client.get(f"/{self.root.pk}/thread")
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('apps.comments.api.MAX_THREAD_DEPTH', 3)
+    def test_reply_too_deep(self):
+        response = self.client.post(f"/{self.first_nested.pk}/reply", json={'text': 'Reply'},
+                                    headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 400)
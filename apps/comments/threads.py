@@ -0,0 +1,214 @@
+"""
+Cascading soft delete and restore of comment threads.
+
+Deleting a post hides all of its visible comments, deleting a comment hides every visible reply below it. The hidden
+comments are blocked with moderated_by=CASCADE and remember the deleted post or comment in cascade_root. Restoring
+shows exactly those comments again: comments that were already blocked (deleted on their own, blocked by moderation
+or hidden by an earlier cascade) weren't touched by the cascade and keep their state.
+
+Subtrees are collected with a single recursive CTE over Comment.parent on PostgreSQL and level by level elsewhere,
+then blocked or unblocked with set-based UPDATEs through BlockableQuerySet.set_blocked, in chunks. Threads of up to
+THREAD_CASCADE_SYNC_LIMIT comments are changed right away, larger ones by the cascade_thread_blocked Celery task.
+
+Reading a sub-thread doesn't need any recursion: a comment and its replies are a contiguous range of Comment.path,
+read in depth first order from the path index.
+"""
+import base64
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models.functions import Length
+
+from apps.comments.models import PATH_SEGMENT_LENGTH, Comment
+from apps.moderation.scoring import ModeratedBy
+
+DESCENDANTS_SQL = """
+    WITH RECURSIVE subtree(id) AS (
+        SELECT id FROM {table} WHERE parent_id = ANY(%s)
+        UNION ALL
+        SELECT child.id FROM {table} child JOIN subtree ON child.parent_id = subtree.id
+    )
+    SELECT id FROM subtree {limit}
+"""
+
+
+def descendant_ids(parent_ids: List[int], limit: Optional[int] = None) -> List[int]:
+    """
+    :param parent_ids: primary keys of the comments whose subtrees are collected, not included themselves
+    :param limit: stop after about this many ids
+    :return: primary keys of the replies below parent_ids, in no particular order
+    """
+    if not parent_ids:
+        return []
+    using = router.db_for_write(Comment)
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        sql = DESCENDANTS_SQL.format(
+            table=connection.ops.quote_name(Comment._meta.db_table),
+            limit="" if limit is None else f"LIMIT {int(limit)}",
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(parent_ids)])
+            return [row[0] for row in cursor.fetchall()]
+
+    # One query per level of the thread (and per chunk of a wide level)
+    replies = Comment.objects.using(using)
+    chunk_size = settings.BULK_MODERATION_CHUNK_SIZE
+    ids = []
+    parents = list(parent_ids)
+    while parents and (limit is None or len(ids) < limit):
+        children = []
+        for start in range(0, len(parents), chunk_size):
+            chunk = parents[start:start + chunk_size]
+            children.extend(replies.filter(parent_id__in=chunk).values_list('pk', flat=True))
+        ids.extend(children)
+        parents = children
+    return ids
+
+
+def cascade_root(post_id: int = None, comment_id: int = None) -> str:
+    """
+    :return: Comment.cascade_root value of the comments hidden with this post or comment
+    """
+    return f"post:{post_id}" if comment_id is None else f"comment:{comment_id}"
+
+
+def thread_ids(is_blocked: bool, post_id: int = None, comment_id: int = None, limit: Optional[int] = None) -> List[int]:
+    """
+    Comments to hide or show again with a deleted or restored post or comment.
+    :param is_blocked: True to collect the comments to hide, False the ones to show again
+    :param post_id: primary key of the post, to collect its comments
+    :param comment_id: primary key of the comment, to collect the replies below it
+    :param limit: stop after about this many ids
+    :return: primary keys of the comments, in no particular order
+    """
+    if not is_blocked:
+        # Exactly the comments the deletion hid, no need to walk the threads
+        hidden = Comment.objects.filter(
+            cascade_root=cascade_root(post_id, comment_id), is_blocked=True, moderated_by=ModeratedBy.CASCADE
+        )
+        return list(hidden.values_list('pk', flat=True)[:limit])
+    if comment_id is not None:
+        # Blocked ones are left out by set_thread_blocked
+        return descendant_ids([comment_id], limit=limit)
+    # Every comment of the post, no need to walk the threads
+    return list(Comment.objects.filter(post_id=post_id, is_blocked=False).values_list('pk', flat=True)[:limit])
+
+
+def set_thread_blocked(ids: List[int], is_blocked: bool, post_id: int = None, comment_id: int = None) -> int:
+    """
+    Hide comments as part of a cascade, or show again the ones a cascade hid, in chunks of BULK_MODERATION_CHUNK_SIZE.
+    Only visible comments are hidden, and only the ones hidden by this cascade are shown again.
+    :param ids: primary keys from thread_ids
+    :param is_blocked: new value of is_blocked
+    :param post_id: primary key of the deleted or restored post
+    :param comment_id: primary key of the deleted or restored comment
+    :return: number of updated comments
+    """
+    root = cascade_root(post_id, comment_id)
+    chunk_size = settings.BULK_MODERATION_CHUNK_SIZE
+    updated = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = Comment.objects.filter(pk__in=ids[start:start + chunk_size])
+        if is_blocked:
+            updated += chunk.set_blocked(True, ModeratedBy.CASCADE, cascade_root=root)
+        else:
+            # Nobody decided on them since, moderation thresholds apply again
+            updated += chunk.filter(cascade_root=root, moderated_by=ModeratedBy.CASCADE).set_blocked(
+                False, ModeratedBy.NOBODY, cascade_root=''
+            )
+    return updated
+
+
+def cascade_blocked(is_blocked: bool, post_id: int = None, comment_id: int = None) -> Optional[int]:
+    """
+    Hide the comments of a deleted post or the replies below a deleted comment, or show them again once it was
+    restored. Threads of more than THREAD_CASCADE_SYNC_LIMIT comments are handed over to a Celery task once the
+    current transaction committed.
+    :param is_blocked: whether the post or comment was deleted (True) or restored (False)
+    :param post_id: primary key of the post
+    :param comment_id: primary key of the comment
+    :return: number of updated comments, None if the thread is changed in the background
+    """
+    limit = settings.THREAD_CASCADE_SYNC_LIMIT
+    ids = thread_ids(is_blocked, post_id=post_id, comment_id=comment_id, limit=limit + 1)
+    if len(ids) > limit:
+        from apps.comments.tasks import cascade_thread_blocked
+
+        transaction.on_commit(
+            lambda: cascade_thread_blocked.delay(is_blocked, post_id=post_id, comment_id=comment_id),
+            using=router.db_for_write(Comment),
+        )
+        return None
+    return set_thread_blocked(ids, is_blocked, post_id=post_id, comment_id=comment_id)
+
+
+def subtree_range(path: str) -> Tuple[str, str]:
+    """
+    :param path: path of a comment
+    :return: (lower, upper) such that lower <= path < upper holds for the comment and its replies only. Paths are
+    digits only, so they compare the same under any collation, and the upper bound is the next path of equal length.
+    """
+    return path, str(int(path) + 1).zfill(len(path))
+
+
+def encode_path_cursor(path: str) -> str:
+    """
+    :return: opaque cursor pointing right after the comment with this path
+    """
+    return base64.urlsafe_b64encode(path.encode()).decode()
+
+
+def decode_path_cursor(cursor: str) -> str:
+    """
+    :param cursor: cursor returned by encode_path_cursor
+    :return: path of the last comment the client has seen
+    :raises ValueError: if the cursor is malformed
+    """
+    try:
+        path = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not path.isdigit() or len(path) % PATH_SEGMENT_LENGTH:
+        raise ValueError("Invalid cursor")
+    return path
+
+
+def subthread(root: Comment, max_depth: Optional[int] = None):
+    """
+    :param root: comment whose sub-thread is read
+    :param max_depth: only replies up to this many levels below root, all of them if None
+    :return: queryset of the visible comments of the sub-thread, root included, in depth first order
+    """
+    lower, upper = subtree_range(root.path)
+    comments = Comment.objects.filter(path__gte=lower, path__lt=upper, is_blocked=False)
+    if max_depth is not None:
+        comments = comments.alias(path_length=Length('path')).filter(
+            path_length__lte=len(root.path) + max_depth * PATH_SEGMENT_LENGTH
+        )
+    return comments.order_by('path')
+
+
+def get_subthread_page(root: Comment, cursor: Optional[str], limit: int, max_depth: Optional[int] = None):
+    """
+    Page through a sub-thread in depth first order, with the path of the last comment as keyset cursor.
+    :param root: comment whose sub-thread is read
+    :param cursor: cursor of the previous page, None to start with root
+    :param limit: maximum number of comments
+    :param max_depth: only replies up to this many levels below root, all of them if None
+    :return: (comments, next cursor, whether more comments follow)
+    :raises ValueError: if the cursor is malformed or from another sub-thread
+    """
+    comments = subthread(root, max_depth)
+    if cursor:
+        path = decode_path_cursor(cursor)
+        if not path.startswith(root.path):
+            raise ValueError("Invalid cursor")
+        comments = comments.filter(path__gt=path)
+
+    rows = list(comments[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_path_cursor(rows[-1].path) if rows else cursor
+    return rows, next_cursor, has_more
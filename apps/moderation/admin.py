@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from apps.moderation.models import ContentFingerprint
+
+
+@admin.register(ContentFingerprint)
+class ContentFingerprintAdmin(admin.ModelAdmin):
+    list_display = ('id', 'content_hash', 'moderation_score', 'model_version', 'seen_count', 'last_seen')
+    search_fields = ('content_hash',)
+    readonly_fields = [field.name for field in ContentFingerprint._meta.fields]
+    show_full_result_count = False
@@ -0,0 +1,62 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton over word tokens: finds every occurrence of any of a set of phrases in a token sequence in
+    a single pass, in time linear in the number of tokens whatever the number of phrases. Matching whole tokens
+    instead of characters keeps "class" from matching "ass".
+    """
+
+    def __init__(self, phrases: Iterable[Sequence[str]]):
+        # State 0 is the root; per state its transitions, failure link and the lengths of the phrases ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for phrase in phrases:
+            if not phrase:
+                continue
+            state = 0
+            for token in phrase:
+                if token not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][token] = len(self._goto) - 1
+                state = self._goto[state][token]
+            if len(phrase) not in self._output[state]:
+                self._output[state] += (len(phrase),)
+
+        # Breadth first, so the failure link of a state is final before its children need it. Children of the root
+        # fail to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def __len__(self):
+        """
+        :return: number of states besides the root
+        """
+        return len(self._goto) - 1
+
+    def find(self, tokens: Sequence[str]) -> Iterator[Tuple[int, int]]:
+        """
+        :param tokens: tokens to search
+        :return: (start, end) token slice of every phrase occurrence, in order of their end
+        """
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length in self._output[state]:
+                yield position + 1 - length, position + 1
@@ -0,0 +1,87 @@
+import multiprocessing
+from typing import Callable, List, Optional, Tuple
+
+from django.apps import apps
+from django.db import connections
+
+from apps.moderation.pipeline import warm_up
+from apps.moderation.scoring import model_version, score_texts
+
+MODERATED_MODELS = {'posts': 'posts.Post', 'comments': 'comments.Comment'}
+
+
+def stale_rows(model):
+    """
+    :return: rows of model not scored by the current model version
+    """
+    return model.objects.exclude(moderation_model_version=model_version())
+
+
+def chunk_bounds(model, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    First and last primary key of consecutive chunks of stale rows, read by streaming the primary keys once.
+    """
+    bounds, first_pk, size, pk = [], None, 0, None
+    for pk in stale_rows(model).order_by('pk').values_list('pk', flat=True).iterator(chunk_size=chunk_size):
+        if first_pk is None:
+            first_pk = pk
+        size += 1
+        if size == chunk_size:
+            bounds.append((first_pk, pk))
+            first_pk, size = None, 0
+    if first_pk is not None:
+        bounds.append((first_pk, pk))
+    return bounds
+
+
+def rescore_chunk(job: Tuple[str, int, int]) -> int:
+    """
+    Rescore the stale rows of one chunk with a single classifier call and a single bulk UPDATE. Only the scores
+    change, apply_moderation_threshold turns them into decisions.
+    :param job: model label, first and last primary key of the chunk
+    :return: number of rescored rows
+    """
+    label, first_pk, last_pk = job
+    rows = list(stale_rows(apps.get_model(label)).filter(pk__gte=first_pk, pk__lte=last_pk))
+    if not rows:
+        return 0
+    version = model_version()
+    for row, score in zip(rows, score_texts([row.moderation_texts() for row in rows])):
+        row.moderation_score, row.moderation_model_version = score, version
+    type(rows[0]).objects.bulk_update(rows, ['moderation_score', 'moderation_model_version'])
+    return len(rows)
+
+
+def backfill_scores(label: str, chunk_size: int, processes: int = 1,
+                    progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Rescore every row of a model whose moderation_model_version isn't the current one.
+    :param label: app label and model name, e.g. "comments.Comment"
+    :param chunk_size: rows per chunk
+    :param processes: number of worker processes, chunks are scored in the current process if 1
+    :param progress: optional callable receiving (rescored rows, total chunks done) after every chunk
+    :return: number of rescored rows
+    """
+    jobs = [(label, first_pk, last_pk) for first_pk, last_pk in chunk_bounds(apps.get_model(label), chunk_size)]
+    if not jobs:
+        return 0
+
+    rescored = 0
+    if processes <= 1:
+        results = map(rescore_chunk, jobs)
+        for done, count in enumerate(results, 1):
+            rescored += count
+            if progress is not None:
+                progress(rescored, done)
+        return rescored
+
+    # Load the memory mapped model and the wordlists before forking so the workers share their pages, and don't let
+    # them inherit open database connections
+    warm_up()
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        for done, count in enumerate(pool.imap_unordered(rescore_chunk, jobs), 1):
+            rescored += count
+            if progress is not None:
+                progress(rescored, done)
+    return rescored
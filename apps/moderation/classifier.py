@@ -0,0 +1,66 @@
+import logging
+from importlib import metadata
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from apps.moderation.hashed_model import HashedLinearModel
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_model() -> Optional[HashedLinearModel]:
+    """
+    :return: the model exported to MODERATION_MODEL_DIR, memory mapped, or None if it hasn't been exported
+    """
+    try:
+        return HashedLinearModel.load(settings.MODERATION_MODEL_DIR)
+    except FileNotFoundError:
+        logger.warning(
+            "No moderation model in %s, falling back to profanity_check. Run `manage.py export_moderation_model`.",
+            settings.MODERATION_MODEL_DIR,
+        )
+        return None
+
+
+@receiver(setting_changed)
+def _reset_model(setting, **kwargs):
+    if setting == "MODERATION_MODEL_DIR":
+        get_model.cache_clear()
+
+
+def load_fallback():
+    """
+    Import profanity_check if there is no exported model, so predict_prob doesn't import it on first use.
+    """
+    if get_model() is None:
+        import profanity_check  # noqa: F401
+
+
+def model_version() -> str:
+    """
+    :return: version of the model predict_prob currently scores with, stored along with every score
+    """
+    model = get_model()
+    if model is None:
+        return f"profanity_check-{metadata.version('alt-profanity-check')}"
+    return model.version
+
+
+def predict_prob(texts: Sequence[str]) -> np.ndarray:
+    """
+    Probability of each text being profane, drop-in for profanity_check.predict_prob.
+    :param texts: texts to score
+    :return: array of probabilities
+    """
+    model = get_model()
+    if model is None:
+        # Imported here, loading scikit-learn and the vocabulary costs tens of megabytes per process
+        from profanity_check import predict_prob as sklearn_predict_prob
+        return sklearn_predict_prob(texts)
+    return model.predict_prob(texts)
@@ -0,0 +1,138 @@
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from apps.moderation.hashed_model import token_hash, tokenize
+from apps.moderation.models import ContentFingerprint, FingerprintBand
+
+# 8 bands of 4 rows: texts sharing 80% of their words share a band with a probability of 98.5%, texts sharing 50%
+# only with 40%
+BANDS = 8
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+
+
+@lru_cache
+def _permutations():
+    """
+    Fixed multipliers and increments of the MinHash hash functions. They are derived from a hash instead of a random
+    generator, so signatures stay comparable across processes and NumPy versions.
+    """
+    def seed(name: str) -> int:
+        return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+    multipliers = np.array([seed(f"minhash-a-{index}") | 1 for index in range(PERMUTATIONS)], dtype=np.uint64)
+    increments = np.array([seed(f"minhash-b-{index}") for index in range(PERMUTATIONS)], dtype=np.uint64)
+    return multipliers, increments
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    content_hash: str
+    # MinHash signature, PERMUTATIONS uint32 values
+    minhash: bytes
+
+    @property
+    def bands(self) -> List[int]:
+        """
+        :return: hash of each band of the signature, as stored in FingerprintBand.value
+        """
+        size = len(self.minhash) // BANDS
+        return [
+            int.from_bytes(hashlib.blake2b(bytes([band]) + self.minhash[band * size:(band + 1) * size],
+                                           digest_size=8).digest(), "little", signed=True)
+            for band in range(BANDS)
+        ]
+
+
+def fingerprint(text: str) -> Optional[Fingerprint]:
+    """
+    :param text: comment text, HTML allowed
+    :return: fingerprint of the words of the text, ignoring markup, case and punctuation, or None if it has no words
+    """
+    tokens = tokenize(strip_tags(text))
+    if not tokens:
+        return None
+
+    content_hash = hashlib.sha256(" ".join(tokens).encode()).hexdigest()
+    hashes = np.array([token_hash(token) for token in set(tokens)], dtype=np.uint64)
+    multipliers, increments = _permutations()
+    # Multiply-add hash per permutation and word (wrapping uint64), keeping the high 32 bits
+    with np.errstate(over="ignore"):
+        permuted = (hashes[None, :] * multipliers[:, None] + increments[:, None]) >> np.uint64(32)
+    return Fingerprint(content_hash, permuted.min(axis=1).astype("<u4").tobytes())
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """
+    :return: estimated Jaccard similarity of the word sets of two MinHash signatures
+    """
+    return float(np.mean(np.frombuffer(a, dtype="<u4") == np.frombuffer(b, dtype="<u4")))
+
+
+def find_score(fp: Fingerprint, version: str) -> Optional[float]:
+    """
+    Score of the same text, or of a near duplicate that was blocked at the default threshold, scored by the current
+    model version. Near duplicates of clean texts aren't reused, a small edit can be what makes a text abusive.
+    :param fp: fingerprint of the text
+    :param version: current model version
+    :return: stored score, or None if the text has to be scored
+    """
+    exact = ContentFingerprint.objects.filter(content_hash=fp.content_hash, model_version=version)
+    score = exact.values_list('moderation_score', flat=True).first()
+    if score is not None:
+        return score
+
+    candidate_ids = FingerprintBand.objects.filter(value__in=fp.bands).values('fingerprint_id')
+    candidates = ContentFingerprint.objects.filter(
+        pk__in=candidate_ids, model_version=version, moderation_score__gt=settings.MODERATION_THRESHOLD
+    ).values_list('minhash', 'moderation_score')[:settings.FINGERPRINT_MAX_CANDIDATES]
+    scores = [
+        score for minhash, score in candidates
+        if similarity(bytes(minhash), fp.minhash) >= settings.FINGERPRINT_MIN_SIMILARITY
+    ]
+    return max(scores, default=None)
+
+
+def remember(fp: Fingerprint, score: float, version: str):
+    """
+    Store the score of a text, or count another sighting of it.
+    """
+    updated = ContentFingerprint.objects.filter(content_hash=fp.content_hash).update(
+        moderation_score=score, model_version=version, seen_count=F('seen_count') + 1, last_seen=timezone.now()
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            stored = ContentFingerprint.objects.create(
+                content_hash=fp.content_hash, minhash=fp.minhash, moderation_score=score, model_version=version
+            )
+            FingerprintBand.objects.bulk_create(
+                [FingerprintBand(fingerprint=stored, value=value) for value in fp.bands]
+            )
+    except IntegrityError:
+        # Stored by a concurrent request, with the same score
+        pass
+
+
+def is_flooding(recent_minhashes: Iterable[bytes], fp: Fingerprint) -> bool:
+    """
+    :param recent_minhashes: MinHash signatures of the texts an author posted within the last FLOOD_WINDOW seconds
+    :param fp: fingerprint of the author's new text
+    :return: whether the author already posted FLOOD_MAX_DUPLICATES near duplicates of the text
+    """
+    duplicates = sum(
+        1 for minhash in recent_minhashes
+        if similarity(bytes(minhash), fp.minhash) >= settings.FINGERPRINT_MIN_SIMILARITY
+    )
+    return duplicates >= settings.FLOOD_MAX_DUPLICATES
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+# Same tokens as the default scikit-learn vectorizers
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+KEYS_FILE = "keys.npy"
+IDF_FILE = "idf.npy"
+COEF_FILE = "coef.npy"
+CALIBRATION_FILE = "calibration.npy"
+META_FILE = "meta.json"
+
+
+@lru_cache(maxsize=65536)
+def token_hash(token: str) -> int:
+    """
+    Stable 64 bit hash of a token, the feature key of the model. Unlike hash() it doesn't change between processes.
+    """
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class HashedLinearModel:
+    """
+    TF-IDF features, an ensemble of linear classifiers and their sigmoid calibration, stored as plain NumPy arrays.
+
+    Features are looked up by the 64 bit hash of the token in a sorted key array instead of a vocabulary dict, so the
+    model has no Python objects per feature and loads with mmap_mode="r": every worker process maps the same pages of
+    the files instead of holding its own copy. The arrays are:
+
+    - keys: sorted token hashes, shape (features,)
+    - idf: inverse document frequency per feature, shape (features,)
+    - coef: classifier weights already multiplied by idf, shape (classifiers, features)
+    - calibration: intercept, sigmoid a and sigmoid b per classifier, shape (classifiers, 3)
+    """
+
+    def __init__(self, keys: np.ndarray, idf: np.ndarray, coef: np.ndarray, calibration: np.ndarray, version: str):
+        self.keys = keys
+        self.idf = idf
+        self.coef = coef
+        self.calibration = calibration
+        self.version = version
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "HashedLinearModel":
+        """
+        :param path: directory written by save()
+        :param mmap: map the arrays read only instead of reading them into process memory
+        :raises FileNotFoundError: if there is no model at path
+        """
+        path = Path(path)
+        mmap_mode = "r" if mmap else None
+        meta = json.loads((path / META_FILE).read_text())
+        return cls(
+            keys=np.load(path / KEYS_FILE, mmap_mode=mmap_mode),
+            idf=np.load(path / IDF_FILE, mmap_mode=mmap_mode),
+            coef=np.load(path / COEF_FILE, mmap_mode=mmap_mode),
+            calibration=np.load(path / CALIBRATION_FILE, mmap_mode=mmap_mode),
+            version=meta["version"],
+        )
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / KEYS_FILE, self.keys)
+        np.save(path / IDF_FILE, self.idf)
+        np.save(path / COEF_FILE, self.coef)
+        np.save(path / CALIBRATION_FILE, self.calibration)
+        # Written last, a directory without it isn't a complete model
+        (path / META_FILE).write_text(json.dumps({"version": self.version, "features": len(self.keys)}))
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model) -> "HashedLinearModel":
+        """
+        Convert a fitted TfidfVectorizer (word tokens, l2 norm) and a CalibratedClassifierCV of linear classifiers
+        with sigmoid calibration, such as the ones shipped with profanity_check.
+        :raises ValueError: if two vocabulary terms hash to the same key
+        """
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        hashes = np.array([token_hash(term) for term in terms], dtype=np.uint64)
+        if len(np.unique(hashes)) != len(hashes):
+            raise ValueError("Vocabulary terms collide in the 64 bit token hash")
+        order = np.argsort(hashes)
+
+        idf = vectorizer.idf_[order]
+        classifiers = model.calibrated_classifiers_
+        coef = np.stack([classifier.estimator.coef_[0][order] for classifier in classifiers]) * idf
+        calibration = np.array([
+            (classifier.estimator.intercept_[0], classifier.calibrators[0].a_, classifier.calibrators[0].b_)
+            for classifier in classifiers
+        ])
+
+        keys = hashes[order]
+        idf, coef = idf.astype(np.float32), coef.astype(np.float32)
+        digest = hashlib.sha256()
+        for array in (keys, idf, coef, calibration):
+            digest.update(array.tobytes())
+        return cls(keys, idf, coef, calibration, version=digest.hexdigest()[:12])
+
+    def predict_prob(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        :param texts: texts to score
+        :return: probability of each text being profane, shape (len(texts),)
+        """
+        rows, features = [], []
+        for row, text in enumerate(texts):
+            hashes = [token_hash(token) for token in tokenize(text)]
+            rows.append(np.full(len(hashes), row, dtype=np.int64))
+            features.append(np.array(hashes, dtype=np.uint64))
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        hashes = np.concatenate(features) if features else np.empty(0, dtype=np.uint64)
+
+        # Tokens outside the vocabulary (stop words included) have no feature and are dropped
+        positions = np.searchsorted(self.keys, hashes)
+        positions[positions == len(self.keys)] = 0
+        known = self.keys[positions] == hashes
+        rows, positions = rows[known], positions[known]
+
+        # Term counts per (text, feature) pair
+        pairs, counts = np.unique(rows * len(self.keys) + positions, return_counts=True)
+        rows, positions = pairs // len(self.keys), pairs % len(self.keys)
+
+        norms = np.sqrt(np.bincount(rows, weights=(counts * self.idf[positions]) ** 2, minlength=len(texts)))
+        norms[norms == 0] = 1
+        scores = np.stack([
+            np.bincount(rows, weights=counts * weights[positions], minlength=len(texts)) for weights in self.coef
+        ]) / norms
+
+        intercept, a, b = self.calibration.T
+        decision = scores + intercept[:, None]
+        # Mean of the calibrated probabilities of the ensemble, as CalibratedClassifierCV.predict_proba
+        return (1 / (1 + np.exp(a[:, None] * decision + b[:, None]))).mean(axis=0)
@@ -0,0 +1,24 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.moderation.backfill import MODERATED_MODELS
+
+
+class Command(BaseCommand):
+    help = "Block or unblock posts and comments from their stored moderation scores, without rescoring them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=None,
+                            help="Default threshold for posts without their own, MODERATION_THRESHOLD by default.")
+        parser.add_argument("--model", choices=MODERATED_MODELS, action="append",
+                            help="Only apply to posts or comments, may be repeated. Both by default.")
+
+    def handle(self, *args, **options):
+        threshold = settings.MODERATION_THRESHOLD if options["threshold"] is None else options["threshold"]
+        if not 0 <= threshold <= 1:
+            raise CommandError("The threshold must be between 0 and 1.")
+
+        for name in options["model"] or MODERATED_MODELS:
+            updated = apps.get_model(MODERATED_MODELS[name]).objects.all().apply_moderation_threshold(threshold)
+            self.stdout.write(self.style.SUCCESS(f"{updated} {name} changed at threshold {threshold}."))
@@ -0,0 +1,26 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.moderation.backfill import MODERATED_MODELS, backfill_scores
+from apps.moderation.scoring import model_version
+
+
+class Command(BaseCommand):
+    help = "Rescore posts and comments whose moderation score comes from another model version."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=MODERATED_MODELS, action="append",
+                            help="Only rescore posts or comments, may be repeated. Both by default.")
+        parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Number of worker processes.")
+        parser.add_argument("--chunk-size", type=int, default=settings.MODERATION_BACKFILL_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Rescoring with moderation pipeline {model_version()}.")
+        for name in options["model"] or MODERATED_MODELS:
+            def progress(rescored, chunks):
+                self.stdout.write(f"{name}: {rescored} rescored ({chunks} chunks).")
+
+            rescored = backfill_scores(MODERATED_MODELS[name], options["chunk_size"], options["processes"], progress)
+            self.stdout.write(self.style.SUCCESS(f"{rescored} {name} rescored."))
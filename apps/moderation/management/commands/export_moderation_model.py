@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.moderation.hashed_model import HashedLinearModel, META_FILE
+
+
+class Command(BaseCommand):
+    help = "Export the profanity_check classifier into the NumPy moderation model format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Model directory, MODERATION_MODEL_DIR by default.")
+        parser.add_argument("--skip-existing", action="store_true", help="Do nothing if a model is already there.")
+
+    def handle(self, *args, **options):
+        output = Path(options["output"] or settings.MODERATION_MODEL_DIR)
+        if options["skip_existing"] and (output / META_FILE).exists():
+            self.stdout.write(f"Moderation model already exported to {output}.")
+            return
+
+        from profanity_check import profanity_check
+
+        model = HashedLinearModel.from_sklearn(profanity_check.vectorizer, profanity_check.model)
+        model.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Moderation model {model.version} with {len(model.keys)} features exported to {output}."
+        ))
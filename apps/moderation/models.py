@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class ContentFingerprint(models.Model):
+    """
+    Moderation score of a distinct comment text, so repeated and near-identical texts don't go through the
+    classifier again.
+
+    content_hash identifies the exact normalized text. minhash is the MinHash signature of its set of words, whose
+    bands are indexed in FingerprintBand: texts with similar word sets very likely share a band, and the signatures
+    of the candidates sharing one tell how similar they really are.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    minhash = models.BinaryField()
+    moderation_score = models.FloatField()
+    model_version = models.CharField(max_length=64)
+    seen_count = models.PositiveIntegerField(default=1)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.content_hash
+
+
+class FingerprintBand(models.Model):
+    """
+    Hash of one band of a fingerprint's MinHash signature (locality sensitive hashing).
+    """
+    fingerprint = models.ForeignKey(ContentFingerprint, on_delete=models.CASCADE, related_name='bands')
+    value = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.fingerprint_id}: {self.value}"
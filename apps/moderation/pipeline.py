@@ -0,0 +1,187 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from PostManagementAPI import metrics
+from apps.moderation import classifier
+from apps.moderation.automaton import PhraseAutomaton
+from apps.moderation.hashed_model import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(ABC):
+    """
+    A step of the moderation pipeline. Stages run in MODERATION_PIPELINE order, each one only sees the texts the
+    stages before it left undecided. A stage that doesn't implement version and predict_prob can't be instantiated, so
+    a misconfigured MODERATION_PIPELINE fails when the pipeline is built.
+    """
+    name: str
+
+    @property
+    @abstractmethod
+    def version(self) -> str:
+        """
+        :return: identifies what the stage decides, stored scores of other versions get rescored by the backfill
+        """
+
+    @abstractmethod
+    def predict_prob(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        :param texts: texts to score
+        :return: profanity probability of each text, NaN for the texts left to the next stage
+        """
+
+
+class ClassifierStage(Stage):
+    """
+    The profanity classifier, decides every text it gets.
+    """
+    name = "classifier"
+
+    @property
+    def version(self) -> str:
+        return classifier.model_version()
+
+    def predict_prob(self, texts: Sequence[str]) -> np.ndarray:
+        return classifier.predict_prob(texts)
+
+
+def _read_phrases(path) -> Tuple[Tuple[str, ...], ...]:
+    """
+    :return: tokenized phrases of a wordlist file, one phrase per line, blank lines and "#" comments skipped
+    """
+    with open(path, encoding="utf-8") as wordlist:
+        lines = (line.split("#", 1)[0] for line in wordlist)
+        return tuple(sorted({tuple(tokenize(line)) for line in lines} - {()}))
+
+
+class WordlistStage(Stage):
+    """
+    Decides the obvious cases with two phrase automata. A text containing a MODERATION_BLOCKLIST phrase that isn't
+    part of a MODERATION_ALLOWLIST phrase scores WORDLIST_BLOCK_SCORE. A text made up entirely of allowlist phrases
+    scores 0, unless one of them contains a blocklist phrase. Everything else goes on to the next stage.
+
+    The wordlist files are checked for changes at most every MODERATION_WORDLIST_CHECK_INTERVAL seconds and the
+    automata rebuilt when they changed, so editing a list takes effect without a restart.
+    """
+    name = "wordlist"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._mtimes = None
+        self._blocklist = self._allowlist = PhraseAutomaton(())
+        self._version = ""
+
+    def _paths(self):
+        return settings.MODERATION_BLOCKLIST, settings.MODERATION_ALLOWLIST
+
+    def _reload_if_changed(self):
+        with self._lock:
+            if time.monotonic() - self._checked_at < settings.MODERATION_WORDLIST_CHECK_INTERVAL:
+                return
+            self._checked_at = time.monotonic()
+            try:
+                mtimes = tuple(os.stat(path).st_mtime_ns for path in self._paths())
+                if mtimes == self._mtimes:
+                    return
+                blocklist, allowlist = (_read_phrases(path) for path in self._paths())
+            except OSError:
+                # Keep the lists that were loaded before
+                logger.warning("Couldn't load the moderation wordlists", exc_info=True)
+                return
+
+            self._blocklist, self._allowlist = PhraseAutomaton(blocklist), PhraseAutomaton(allowlist)
+            self._version = "wordlist-" + hashlib.sha256(repr((blocklist, allowlist)).encode()).hexdigest()[:12]
+            self._mtimes = mtimes
+            logger.info("Loaded %d blocklist and %d allowlist phrases", len(blocklist), len(allowlist))
+
+    @property
+    def version(self) -> str:
+        self._reload_if_changed()
+        return self._version
+
+    def verdict(self, text: str) -> float:
+        """
+        :return: WORDLIST_BLOCK_SCORE, 0 or NaN if the text is ambiguous
+        """
+        tokens = tokenize(strip_tags(text))
+        if not tokens:
+            return np.nan
+        allowed = [False] * len(tokens)
+        for start, end in self._allowlist.find(tokens):
+            allowed[start:end] = [True] * (end - start)
+        blocked = list(self._blocklist.find(tokens))
+        if any(not all(allowed[start:end]) for start, end in blocked):
+            return settings.WORDLIST_BLOCK_SCORE
+        # An allowlist phrase keeps a blocklist word from blocking the text, not from being scored by the classifier
+        return 0.0 if all(allowed) and not blocked else np.nan
+
+    def predict_prob(self, texts: Sequence[str]) -> np.ndarray:
+        self._reload_if_changed()
+        return np.array([self.verdict(text) for text in texts], dtype=np.float64)
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+
+    @property
+    def version(self) -> str:
+        return "+".join(stage.version for stage in self.stages)
+
+    def predict_prob(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Run the texts through the stages, counting per stage how many texts it decided ("hits") and passed on
+        ("misses"), so /api/metrics shows the share of traffic each stage short-circuits.
+        :param texts: texts to score
+        :return: profanity probability of each text
+        :raises ValueError: if the last stage leaves texts undecided
+        """
+        scores = np.full(len(texts), np.nan)
+        pending = np.arange(len(texts))
+        for stage in self.stages:
+            if not len(pending):
+                break
+            stage_scores = np.asarray(stage.predict_prob([texts[index] for index in pending]), dtype=np.float64)
+            decided = ~np.isnan(stage_scores)
+            scores[pending[decided]] = stage_scores[decided]
+            metrics.increment(f"moderation.{stage.name}.hits", int(decided.sum()))
+            metrics.increment(f"moderation.{stage.name}.misses", int((~decided).sum()))
+            pending = pending[~decided]
+        if len(pending):
+            raise ValueError(f"The last moderation stage left {len(pending)} texts undecided")
+        return scores
+
+
+@lru_cache
+def get_pipeline() -> Pipeline:
+    return Pipeline([import_string(path)() for path in settings.MODERATION_PIPELINE])
+
+
+def warm_up():
+    """
+    Load the wordlists and the model ahead of the first text to score, e.g. in a process about to fork workers that
+    should share them instead of each loading its own copy.
+    """
+    classifier.load_fallback()
+    get_pipeline().version
+
+
+@receiver(setting_changed)
+def _reset_pipeline(setting, **kwargs):
+    if setting == "MODERATION_PIPELINE":
+        get_pipeline.cache_clear()
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from PostManagementAPI import metrics
+from apps.moderation.fingerprints import find_score, fingerprint, is_flooding, remember
+from apps.moderation.pipeline import get_pipeline
+
+# Fields moderate() sets, saved along with the text they were computed from
+MODERATION_FIELDS = ('moderation_score', 'moderation_model_version', 'is_blocked', 'moderated_by')
+
+
+class ModeratedBy(models.TextChoices):
+    """
+    Who made the last decision on is_blocked of a row.
+    """
+    NOBODY = '', 'Nobody'
+    CLASSIFIER = 'classifier', 'Classifier'
+    STAFF = 'staff', 'Staff'
+    AUTHOR = 'author', 'Author'
+    FLOOD = 'flood', 'Flood detection'
+    # Hidden because its post or a comment it replies to was deleted, shown again when that is restored
+    CASCADE = 'cascade', 'Deleted with its thread'
+
+
+def model_version() -> str:
+    """
+    :return: version of the MODERATION_PIPELINE stages, stored along with every score
+    """
+    return get_pipeline().version
+
+
+def predict_prob(texts: Sequence[str]) -> np.ndarray:
+    """
+    :param texts: texts to score
+    :return: probability of each text being profane according to the MODERATION_PIPELINE
+    """
+    return get_pipeline().predict_prob(texts)
+
+
+def score_texts(groups: Sequence[Sequence[str]]) -> List[float]:
+    """
+    Score several rows with one pipeline call.
+    :param groups: moderation texts of each row
+    :return: highest profanity probability of each group
+    """
+    probabilities = predict_prob([text for group in groups for text in group])
+    scores, offset = [], 0
+    for group in groups:
+        scores.append(float(probabilities[offset:offset + len(group)].max()))
+        offset += len(group)
+    return scores
+
+
+def recent_minhashes(instance) -> List[bytes]:
+    """
+    :return: MinHash signatures of the other rows the author of instance created within the last FLOOD_WINDOW seconds
+    """
+    recent = type(instance).objects.filter(
+        author_id=instance.author_id,
+        created_at__gte=timezone.now() - timedelta(seconds=settings.FLOOD_WINDOW),
+        minhash__isnull=False,
+    ).exclude(pk=instance.pk).order_by('-created_at')
+    return list(recent.values_list('minhash', flat=True)[:settings.FLOOD_HISTORY_SIZE])
+
+
+def moderate(instance, threshold: Optional[float] = None, fingerprints: bool = False, flood_detection: bool = True):
+    """
+    Score the moderation_texts() of an unsaved instance and block it if the score is above the threshold.
+
+    With fingerprints, texts seen before reuse their stored score and near duplicates of blocked texts get the score
+    of the blocked text, neither runs the classifier. An author posting a burst of near duplicates is blocked for
+    flooding without scoring at all, the backfill scores those rows later and apply_moderation_threshold decides on
+    them from then on.
+    :param instance: Post or Comment, a Comment (with a minhash field) for fingerprints
+    :param threshold: per post threshold, MODERATION_THRESHOLD if None
+    :param fingerprints: use content fingerprints and flood detection
+    :param flood_detection: False for texts the system writes on the author's behalf (auto-replies), which repeat by
+    design
+    """
+    if threshold is None:
+        threshold = settings.MODERATION_THRESHOLD
+    version = model_version()
+    fp = fingerprint(" ".join(instance.moderation_texts())) if fingerprints else None
+    if fingerprints:
+        instance.minhash = fp.minhash if fp is not None else None
+
+    if fp is not None and flood_detection and is_flooding(recent_minhashes(instance), fp):
+        metrics.increment("moderation.flood_blocks")
+        instance.moderation_score, instance.moderation_model_version = None, ''
+        if not instance.is_blocked:
+            instance.is_blocked = True
+            instance.moderated_by = ModeratedBy.FLOOD
+        return
+
+    score = find_score(fp, version) if fp is not None else None
+    if score is None:
+        score = score_texts([instance.moderation_texts()])[0]
+    else:
+        metrics.increment("moderation.fingerprint_hits")
+    if fp is not None:
+        # Near duplicates get a fingerprint of their own, so their copies are exact matches
+        remember(fp, score, version)
+
+    instance.moderation_score, instance.moderation_model_version = score, version
+    if score > threshold and not instance.is_blocked:
+        instance.is_blocked = True
+        instance.moderated_by = ModeratedBy.CLASSIFIER
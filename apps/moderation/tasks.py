@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from apps.moderation.models import ContentFingerprint
+
+
+@shared_task
+def purge_fingerprints():
+    """
+    Delete fingerprints of texts not seen for FINGERPRINT_RETENTION_DAYS days.
+    :return: number of deleted fingerprints
+    """
+    seen_before = timezone.now() - timedelta(days=settings.FINGERPRINT_RETENTION_DAYS)
+    deleted, _ = ContentFingerprint.objects.filter(last_seen__lt=seen_before).delete()
+    return deleted
@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from apps.comments.models import Comment
+from apps.comments.tasks import auto_reply_to_comment
+from apps.moderation.fingerprints import fingerprint, similarity
+from apps.moderation.models import ContentFingerprint
+from apps.moderation.scoring import ModeratedBy
+from apps.posts.models import Post
+
+User = get_user_model()
+
+SPAM = ("Make money fast from home with this one weird trick, visit our website today and earn thousands of dollars "
+        "every week without any work at all guaranteed")
+
+
+def fixed_scores(score):
+    return patch('apps.moderation.scoring.predict_prob', side_effect=lambda texts: np.full(len(texts), score))
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_markup_case_and_punctuation_ignored(self):
+        self.assertEqual(
+            fingerprint("<p>Buy CHEAP pills, now!!!</p>").content_hash, fingerprint("buy cheap pills now").content_hash
+        )
+
+    def test_no_words(self):
+        self.assertIsNone(fingerprint("<p>!!!</p>"))
+
+    def test_near_duplicates_similar(self):
+        near_duplicate = fingerprint(SPAM.replace("today", "now"))
+
+        self.assertGreater(similarity(fingerprint(SPAM).minhash, near_duplicate.minhash), 0.9)
+        self.assertTrue(set(fingerprint(SPAM).bands) & set(near_duplicate.bands))
+        self.assertLess(similarity(fingerprint(SPAM).minhash, fingerprint("Nice post, thank you").minhash), 0.2)
+
+
+class FingerprintModerationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.other_user = User.objects.create_user(email='other@example.com', username='other', password='password123')
+        with fixed_scores(0.0):
+            self.post = Post.objects.create(title='Post', content='Content', author=self.user)
+            self.other_post = Post.objects.create(title='Other post', content='Content', author=self.user)
+
+    def test_identical_text_reuses_score_across_posts(self):
+        with fixed_scores(0.9) as predict_prob:
+            first = Comment.objects.create(text=SPAM, post=self.post, author=self.user)
+            second = Comment.objects.create(text=f"<b>{SPAM.upper()}</b>", post=self.other_post, author=self.other_user)
+
+        predict_prob.assert_called_once()
+        self.assertTrue(first.is_blocked)
+        self.assertTrue(second.is_blocked)
+        self.assertEqual(second.moderation_score, 0.9)
+        self.assertEqual(ContentFingerprint.objects.get().seen_count, 2)
+
+    def test_near_duplicate_of_blocked_text_blocked_without_scoring(self):
+        with fixed_scores(0.9):
+            Comment.objects.create(text=SPAM, post=self.post, author=self.user)
+
+        with fixed_scores(0.0) as predict_prob:
+            comment = Comment.objects.create(text=SPAM.replace("today", "now"), post=self.post, author=self.other_user)
+
+        predict_prob.assert_not_called()
+        self.assertTrue(comment.is_blocked)
+        self.assertEqual(comment.moderated_by, ModeratedBy.CLASSIFIER)
+
+    def test_near_duplicate_of_clean_text_scored(self):
+        with fixed_scores(0.1):
+            Comment.objects.create(text=SPAM, post=self.post, author=self.user)
+
+        with fixed_scores(0.1) as predict_prob:
+            Comment.objects.create(text=SPAM.replace("today", "now"), post=self.post, author=self.other_user)
+
+        predict_prob.assert_called_once()
+
+    def test_flood_blocked(self):
+        with self.settings(FLOOD_MAX_DUPLICATES=3), fixed_scores(0.1):
+            comments = [
+                Comment.objects.create(text=f"{SPAM} {word}", post=self.post, author=self.user)
+                for word in ('one', 'two', 'three', 'four')
+            ]
+            other_author_comment = Comment.objects.create(text=SPAM, post=self.post, author=self.other_user)
+
+        self.assertEqual([comment.is_blocked for comment in comments], [False, False, False, True])
+        self.assertEqual(comments[-1].moderated_by, ModeratedBy.FLOOD)
+        # Left to the backfill
+        self.assertIsNone(comments[-1].moderation_score)
+        self.assertFalse(other_author_comment.is_blocked)
+
+    def test_auto_replies_not_blocked_for_flooding(self):
+        Post.objects.filter(pk=self.post.pk).update(auto_reply_enabled=True)
+        with self.settings(FLOOD_MAX_DUPLICATES=3), fixed_scores(0.1):
+            comments = [
+                Comment.objects.create(text=f"Comment number {number}", post=self.post, author=self.other_user)
+                for number in range(8)
+            ]
+            for comment in comments:
+                auto_reply_to_comment(comment.pk)
+
+        replies = Comment.objects.filter(parent__in=comments)
+        self.assertEqual(replies.count(), 8)
+        self.assertFalse(replies.filter(is_blocked=True).exists())
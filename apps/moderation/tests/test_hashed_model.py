@@ -0,0 +1,82 @@
+import random
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from profanity_check import profanity_check
+
+from apps.moderation import classifier
+from apps.moderation.hashed_model import HashedLinearModel
+
+CORPUS = [
+    "",
+    "Nice post, thanks for sharing!",
+    "I completely disagree with the second paragraph.",
+    "you are a stupid idiot",
+    "What the fuck is this shit",
+    "Shut up, moron. SHUT UP!!!",
+    "The the the and of",
+    "Ünïcödé téxt wïth äccents",
+]
+
+
+def random_corpus(size: int, seed: int = 0):
+    """
+    Texts made of vocabulary terms, stop words and unknown tokens, with repeats.
+    """
+    rng = random.Random(seed)
+    words = sorted(profanity_check.vectorizer.vocabulary_) + ["the", "and", "qwxzv", "a"]
+    return [" ".join(rng.choices(words, k=rng.randint(1, 40))) for _ in range(size)]
+
+
+class HashedLinearModelTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = HashedLinearModel.from_sklearn(profanity_check.vectorizer, profanity_check.model)
+
+    def test_parity_with_profanity_check(self):
+        texts = CORPUS + random_corpus(1000)
+
+        np.testing.assert_allclose(
+            self.model.predict_prob(texts), profanity_check.predict_prob(texts), rtol=0, atol=1e-5
+        )
+
+    def test_batch_matches_single_texts(self):
+        texts = random_corpus(20, seed=1)
+
+        np.testing.assert_allclose(
+            self.model.predict_prob(texts), [self.model.predict_prob([text])[0] for text in texts]
+        )
+
+    def test_save_and_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.model.save(path)
+            loaded = HashedLinearModel.load(path)
+
+            self.assertIsInstance(loaded.coef, np.memmap)
+            self.assertEqual(loaded.version, self.model.version)
+            np.testing.assert_array_equal(loaded.predict_prob(CORPUS), self.model.predict_prob(CORPUS))
+
+
+class ClassifierTests(SimpleTestCase):
+    def test_exported_model_used(self):
+        with tempfile.TemporaryDirectory() as path, override_settings(MODERATION_MODEL_DIR=path):
+            call_command("export_moderation_model", stdout=StringIO())
+
+            with patch("profanity_check.predict_prob") as sklearn_predict_prob:
+                probabilities = classifier.predict_prob(CORPUS)
+
+            sklearn_predict_prob.assert_not_called()
+            self.assertEqual(classifier.get_model().version, HashedLinearModel.load(path).version)
+            np.testing.assert_allclose(probabilities, profanity_check.predict_prob(CORPUS), atol=1e-5)
+
+    def test_falls_back_to_profanity_check(self):
+        with tempfile.TemporaryDirectory() as path, override_settings(MODERATION_MODEL_DIR=path):
+            with self.assertLogs("apps.moderation.classifier", "WARNING"):
+                probabilities = classifier.predict_prob(CORPUS)
+
+        np.testing.assert_array_equal(probabilities, profanity_check.predict_prob(CORPUS))
@@ -0,0 +1,144 @@
+import os
+import random
+import tempfile
+from pathlib import Path
+from unittest.mock import call, patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from apps.moderation.automaton import PhraseAutomaton
+from apps.moderation.pipeline import Pipeline, Stage, WordlistStage, get_pipeline
+
+
+class PhraseAutomatonTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        vocabulary = ["a", "b", "c", "d"]
+        for _ in range(200):
+            phrases = {tuple(rng.choices(vocabulary, k=rng.randint(1, 3))) for _ in range(rng.randint(1, 6))}
+            tokens = rng.choices(vocabulary, k=rng.randint(0, 12))
+            expected = sorted(
+                (start, start + len(phrase)) for phrase in phrases for start in range(len(tokens))
+                if tuple(tokens[start:start + len(phrase)]) == phrase
+            )
+
+            self.assertEqual(sorted(PhraseAutomaton(phrases).find(tokens)), expected)
+
+    def test_whole_tokens_only(self):
+        automaton = PhraseAutomaton([("ass",)])
+
+        self.assertEqual(list(automaton.find(["first", "class", "assessment"])), [])
+        self.assertEqual(list(automaton.find(["an", "ass"])), [(1, 2)])
+
+
+class WordlistStageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.blocklist = Path(directory.name) / "blocklist.txt"
+        self.allowlist = Path(directory.name) / "allowlist.txt"
+        self.blocklist.write_text("# comment\ndarn\nheck off\n")
+        self.allowlist.write_text("darn good\nthanks\nnice post  # trailing comment\n")
+        settings_override = override_settings(
+            MODERATION_BLOCKLIST=self.blocklist, MODERATION_ALLOWLIST=self.allowlist,
+            MODERATION_WORDLIST_CHECK_INTERVAL=0, WORDLIST_BLOCK_SCORE=1.0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.stage = WordlistStage()
+
+    def test_verdicts(self):
+        texts = [
+            "<p>Oh DARN it</p>",  # blocklist phrase
+            "Heck off, please",  # blocklist phrase of two words
+            "heck no",  # first word of a phrase only
+            "that was darn good",  # blocklist phrase inside an allowlist phrase
+            "darn good, darn bad",  # and outside of one
+            "Thanks! Nice post.",  # allowlist phrases only
+            "darn good thanks",  # allowlist phrases only, one containing a blocklist phrase
+            "thanks for the post",  # partly allowlisted
+            "<p>!!!</p>",  # no words
+        ]
+
+        np.testing.assert_array_equal(
+            self.stage.predict_prob(texts), [1.0, 1.0, np.nan, np.nan, 1.0, 0.0, np.nan, np.nan, np.nan]
+        )
+
+    def test_reloads_changed_lists(self):
+        version = self.stage.version
+        self.assertTrue(np.isnan(self.stage.predict_prob(["gosh"])[0]))
+
+        self.blocklist.write_text("gosh\n")
+        os.utime(self.blocklist, ns=(0, 0))
+
+        self.assertEqual(self.stage.predict_prob(["gosh"])[0], 1.0)
+        self.assertNotEqual(self.stage.version, version)
+
+    def test_unchanged_lists_not_checked_before_interval(self):
+        self.stage.version
+        with override_settings(MODERATION_WORDLIST_CHECK_INTERVAL=60), patch("os.stat") as stat:
+            self.stage.predict_prob(["darn"])
+
+        stat.assert_not_called()
+
+    def test_missing_list_keeps_loaded_lists(self):
+        self.stage.version
+        self.blocklist.unlink()
+
+        with self.assertLogs("apps.moderation.pipeline", "WARNING"):
+            self.assertEqual(self.stage.predict_prob(["darn"])[0], 1.0)
+
+
+class FixedStage:
+    def __init__(self, name, scores):
+        self.name, self.version, self.scores = name, name, scores
+
+    def predict_prob(self, texts):
+        return np.array([self.scores.get(text, np.nan) for text in texts])
+
+
+class IncompleteStage(Stage):
+    name = "incomplete"
+
+    def predict_prob(self, texts):
+        return np.zeros(len(texts))
+
+
+class PipelineTests(SimpleTestCase):
+    def test_later_stages_score_undecided_texts_only(self):
+        first = FixedStage("first", {"a": 1.0})
+        last = FixedStage("last", {"b": 0.2, "c": 0.3})
+
+        with patch.object(last, "predict_prob", wraps=last.predict_prob) as last_predict_prob, \
+                patch("apps.moderation.pipeline.metrics.increment") as increment:
+            scores = Pipeline([first, last]).predict_prob(["b", "a", "c"])
+
+        np.testing.assert_array_equal(scores, [0.2, 1.0, 0.3])
+        last_predict_prob.assert_called_once_with(["b", "c"])
+        self.assertEqual(increment.call_args_list, [
+            call("moderation.first.hits", 1), call("moderation.first.misses", 2),
+            call("moderation.last.hits", 2), call("moderation.last.misses", 0),
+        ])
+        self.assertEqual(Pipeline([first, last]).version, "first+last")
+
+    def test_undecided_texts_raise(self):
+        with self.assertRaises(ValueError):
+            Pipeline([FixedStage("only", {})]).predict_prob(["a"])
+
+    def test_configured_stages(self):
+        with override_settings(MODERATION_PIPELINE=["apps.moderation.pipeline.WordlistStage"]):
+            self.assertEqual([stage.name for stage in get_pipeline().stages], ["wordlist"])
+        self.assertEqual([stage.name for stage in get_pipeline().stages], ["wordlist", "classifier"])
+
+    def test_incomplete_stage_rejected(self):
+        with override_settings(MODERATION_PIPELINE=["apps.moderation.tests.test_pipeline.IncompleteStage"]):
+            with self.assertRaises(TypeError):
+                get_pipeline()
+
+    def test_default_lists_skip_classifier(self):
+        with patch("apps.moderation.pipeline.classifier.predict_prob") as classifier_predict_prob:
+            scores = get_pipeline().predict_prob(["What the fuck", "Thanks for sharing!"])
+
+        np.testing.assert_array_equal(scores, [1.0, 0.0])
+        classifier_predict_prob.assert_not_called()
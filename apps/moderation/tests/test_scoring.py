@@ -0,0 +1,147 @@
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.comments.models import Comment
+from apps.moderation.backfill import backfill_scores, chunk_bounds
+from apps.moderation.scoring import ModeratedBy, model_version
+from apps.outbox.models import OutboxEvent
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+def fixed_scores(score):
+    return patch('apps.moderation.scoring.predict_prob', side_effect=lambda texts: np.full(len(texts), score))
+
+
+class ModerationScoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+
+    def test_score_stored(self):
+        with fixed_scores(0.3):
+            post = Post.objects.create(title='Title', content='Content', author=self.user)
+
+        post.refresh_from_db()
+        self.assertEqual(post.moderation_score, 0.3)
+        self.assertEqual(post.moderation_model_version, model_version())
+        self.assertFalse(post.is_blocked)
+        self.assertEqual(post.moderated_by, ModeratedBy.NOBODY)
+
+    def test_blocked_above_threshold(self):
+        with fixed_scores(0.6):
+            post = Post.objects.create(title='Title', content='Content', author=self.user)
+
+        self.assertTrue(post.is_blocked)
+        self.assertEqual(post.moderated_by, ModeratedBy.CLASSIFIER)
+
+    def test_comment_uses_post_threshold(self):
+        with fixed_scores(0.3):
+            post = Post.objects.create(title='Title', content='Content', author=self.user, moderation_threshold=0.2)
+        with fixed_scores(0.3):
+            comment = Comment.objects.create(text='Text', post=post, author=self.user)
+
+        self.assertTrue(comment.is_blocked)
+
+
+class ApplyModerationThresholdTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        with fixed_scores(0.0):
+            self.post = Post.objects.create(title='Title', content='Content', author=self.user)
+            self.strict_post = Post.objects.create(
+                title='Strict', content='Content', author=self.user, moderation_threshold=0.1
+            )
+            self.comments = {
+                name: Comment.objects.create(text=name, post=self.post, author=self.user)
+                for name in ('classifier_blocked', 'staff_blocked', 'staff_approved', 'clean', 'borderline')
+            }
+            self.strict_comment = Comment.objects.create(text='Strict', post=self.strict_post, author=self.user)
+
+        def set_score(comment, score, **fields):
+            Comment.objects.filter(pk=comment.pk).update(moderation_score=score, **fields)
+
+        set_score(self.comments['classifier_blocked'], 0.55, is_blocked=True, moderated_by=ModeratedBy.CLASSIFIER)
+        set_score(self.comments['staff_blocked'], 0.1, is_blocked=True, moderated_by=ModeratedBy.STAFF)
+        set_score(self.comments['staff_approved'], 0.9, moderated_by=ModeratedBy.STAFF)
+        set_score(self.comments['clean'], 0.1)
+        set_score(self.comments['borderline'], 0.45)
+        set_score(self.strict_comment, 0.2)
+        OutboxEvent.objects.all().delete()
+
+    def blocked(self):
+        return set(Comment.objects.filter(is_blocked=True).values_list('text', flat=True))
+
+    def test_raised_threshold(self):
+        # The comment of the strict post is blocked at its post's threshold either way
+        self.assertEqual(Comment.objects.all().apply_moderation_threshold(0.6), 2)
+
+        self.assertEqual(self.blocked(), {'staff_blocked', 'Strict'})
+
+    def test_lowered_threshold(self):
+        self.assertEqual(Comment.objects.all().apply_moderation_threshold(0.4), 2)
+
+        self.assertEqual(self.blocked(), {'classifier_blocked', 'staff_blocked', 'borderline', 'Strict'})
+        self.assertEqual(Comment.objects.get(text='borderline').moderated_by, ModeratedBy.CLASSIFIER)
+        self.assertEqual(
+            set(OutboxEvent.objects.values_list('payload__id', flat=True)),
+            {self.comments['borderline'].pk, self.strict_comment.pk},
+        )
+
+    def test_applied_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Comment.objects.all().apply_moderation_threshold(0.4, chunk_size=1), 2)
+
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+
+        self.assertEqual(self.blocked(), {'classifier_blocked', 'staff_blocked', 'borderline', 'Strict'})
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+    def test_scored_flood_blocks_decided_by_threshold(self):
+        # Blocked for flooding, then scored by the backfill
+        Comment.objects.filter(pk=self.comments['clean'].pk).update(is_blocked=True, moderated_by=ModeratedBy.FLOOD)
+
+        Comment.objects.all().apply_moderation_threshold(0.6)
+
+        self.assertNotIn('clean', self.blocked())
+        self.assertEqual(Comment.objects.get(text='clean').moderated_by, ModeratedBy.CLASSIFIER)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('apply_moderation_threshold', '--threshold', '0.6', '--model', 'comments', stdout=out)
+
+        self.assertIn('2 comments changed', out.getvalue())
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        with fixed_scores(0.1):
+            self.posts = [
+                Post.objects.create(title=f'Post {number}', content='Content', author=self.user) for number in range(5)
+            ]
+        Post.objects.filter(pk__in=[post.pk for post in self.posts[1:4]]).update(moderation_model_version='old')
+
+    def test_chunk_bounds(self):
+        self.assertEqual(
+            chunk_bounds(Post, 2),
+            [(self.posts[1].pk, self.posts[2].pk), (self.posts[3].pk, self.posts[3].pk)],
+        )
+
+    def test_backfill_rescores_stale_rows_only(self):
+        with fixed_scores(0.9):
+            self.assertEqual(backfill_scores('posts.Post', chunk_size=2), 3)
+
+        scores = dict(Post.objects.values_list('pk', 'moderation_score'))
+        self.assertEqual([scores[post.pk] for post in self.posts], [0.1, 0.9, 0.9, 0.9, 0.1])
+        self.assertFalse(Post.objects.exclude(moderation_model_version=model_version()).exists())
+        # Decisions only change when a threshold is applied
+        self.assertFalse(Post.objects.filter(is_blocked=True).exists())
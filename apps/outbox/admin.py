@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from apps.outbox.models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'dedup_key', 'created_at', 'published_at', 'attempts', 'failed_at')
+    list_filter = ('topic', ('failed_at', admin.EmptyFieldListFilter))
+    search_fields = ('dedup_key',)
+    readonly_fields = [field.name for field in OutboxEvent._meta.fields]
+    show_full_result_count = False
+    actions = ['retry_events']
+
+    @admin.action(description="Retry selected failed events")
+    def retry_events(self, request, queryset):
+        retried = queryset.filter(published_at__isnull=True, failed_at__isnull=False).update(
+            failed_at=None, next_attempt_at=None, attempts=0
+        )
+        self.message_user(request, f"{retried} events will be relayed again.")
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.outbox.relay import relay_batch, run_relay
+
+
+class Command(BaseCommand):
+    help = "Publish outbox events to Redis and Celery."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Publish one batch and exit.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            published = relay_batch(settings.OUTBOX_BATCH_SIZE)
+            self.stdout.write(self.style.SUCCESS(f"{published} events published."))
+            return
+        run_relay()
@@ -0,0 +1,77 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import Q
+
+
+class OutboxEvent(models.Model):
+    """
+    A domain event written in the same transaction as the change it describes, and published afterwards by the
+    outbox relay. Delivery is at least once, consumers use dedup_key to ignore repeated deliveries.
+    """
+    topic = models.CharField(max_length=100)
+    dedup_key = models.CharField(max_length=255, unique=True)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Not relayed before this time: the backoff of a failed event, or the lease of a relay publishing it
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Set once the event failed OUTBOX_MAX_ATTEMPTS times, the relay skips it from then on
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The relay only ever scans unpublished events that didn't fail for good, in id order
+            models.Index(
+                fields=['id'], condition=Q(published_at__isnull=True, failed_at__isnull=True),
+                name='outbox_pending_idx',
+            ),
+            models.Index(fields=['published_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} ({self.dedup_key})"
+
+
+def build_event(model, pk, updated_at, action: str, payload: dict) -> OutboxEvent:
+    """
+    Build the "<model name>.<action>" event of a row.
+    :param model: model class
+    :param pk: primary key of the row
+    :param updated_at: updated_at of the row version the event describes
+    :param action: "created" or "updated"
+    :param payload: JSON serializable event data
+    :return: unsaved event
+    """
+    topic = f"{model._meta.model_name}.{action}"
+    return OutboxEvent(
+        topic=topic,
+        # One event per version of a row, so recording the same version twice doesn't duplicate it
+        dedup_key=f"{topic}:{pk}:{updated_at.isoformat()}",
+        payload=payload,
+    )
+
+
+def record_events(events, using=None):
+    """
+    Save events, skipping the ones whose dedup_key was already recorded.
+    """
+    OutboxEvent.objects.using(using).bulk_create(events, ignore_conflicts=True)
+
+
+class OutboxEventsMixin:
+    """
+    Model mixin recording a "<model name>.created" or "<model name>.updated" outbox event in the same transaction as
+    every save. Models using it define outbox_payload().
+    """
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            event = build_event(
+                type(self), self.pk, self.updated_at, 'created' if created else 'updated', self.outbox_payload()
+            )
+            record_events([event], using=using)
@@ -0,0 +1,154 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from PostManagementAPI.redis_client import get_redis
+from apps.outbox.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(list)
+
+# Redis or the Celery broker being unreachable, which says nothing about the event itself
+CONNECTION_ERRORS = (ConnectionError, TimeoutError, RedisConnectionError, RedisTimeoutError, OperationalError)
+
+
+def outbox_handler(topic: str):
+    """
+    Register a function called with every published event of a topic. Handlers raise to have the event retried,
+    so they have to tolerate being called more than once for the same event.
+    :param topic: event topic, e.g. "comment.created"
+    """
+    def decorator(func):
+        _handlers[topic].append(func)
+        return func
+    return decorator
+
+
+def claim_delivery(dedup_key: str) -> bool:
+    """
+    Consumer side deduplication of at least once deliveries.
+    :param dedup_key: dedup_key of the event
+    :return: True the first time a key is claimed within OUTBOX_DEDUP_TTL seconds, False afterwards
+    """
+    return cache.add(f"outbox:delivered:{dedup_key}", True, settings.OUTBOX_DEDUP_TTL)
+
+
+def publish_event(event: OutboxEvent):
+    """
+    Append the event to the OUTBOX_STREAM Redis stream for downstream consumers, then run the topic's handlers.
+    """
+    get_redis().xadd(
+        settings.OUTBOX_STREAM,
+        {
+            "id": event.pk,
+            "topic": event.topic,
+            "dedup_key": event.dedup_key,
+            "payload": json.dumps(event.payload, cls=DjangoJSONEncoder),
+        },
+        maxlen=settings.OUTBOX_STREAM_MAXLEN,
+        approximate=True,
+    )
+    for handler in _handlers.get(event.topic, ()):
+        handler(event)
+
+
+def record_failure(event: OutboxEvent, error: Exception, now):
+    """
+    Schedule the retry of an event that couldn't be published, OUTBOX_RETRY_BACKOFF seconds after the first failure
+    and twice as long after each further one, up to OUTBOX_RETRY_BACKOFF_MAX. After OUTBOX_MAX_ATTEMPTS failures the
+    event is dead-lettered: failed_at is set and the relay no longer picks it up.
+
+    Connection errors don't count as attempts, an outage of Redis or the broker would otherwise dead-letter every
+    pending event. The event is retried every OUTBOX_RETRY_BACKOFF_MAX seconds until they are reachable again.
+    """
+    event.last_error = str(error)
+    if isinstance(error, CONNECTION_ERRORS):
+        event.next_attempt_at = now + timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF_MAX)
+        return
+    event.attempts += 1
+    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        event.failed_at = now
+        logger.error("Giving up on outbox event %s after %s attempts", event.pk, event.attempts)
+        return
+    backoff = min(settings.OUTBOX_RETRY_BACKOFF * 2 ** (event.attempts - 1), settings.OUTBOX_RETRY_BACKOFF_MAX)
+    event.next_attempt_at = now + timedelta(seconds=backoff)
+
+
+def claim_batch(batch_size: int, now) -> List[OutboxEvent]:
+    """
+    Lease the oldest unpublished events that are due: their next_attempt_at is moved OUTBOX_LEASE_SECONDS ahead in a
+    short transaction, so other relays skip them while they are published and pick them up again if this relay dies.
+    :param batch_size: maximum number of events
+    :param now: current time
+    :return: claimed events
+    """
+    with transaction.atomic():
+        due = OutboxEvent.objects.filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            published_at__isnull=True,
+            failed_at__isnull=True,
+        )
+        events = list(due.order_by('id').select_for_update(skip_locked=True)[:batch_size])
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        )
+    return events
+
+
+def relay_batch(batch_size: int) -> int:
+    """
+    Publish the oldest unpublished events that are due.
+
+    Events are claimed first (see claim_batch) and published outside of any transaction, so a slow Redis or broker
+    call doesn't keep rows locked, then the results are recorded. An event whose publishing fails stays unpublished
+    and is retried with a backoff (see record_failure), so it doesn't hold up the events after it.
+    :param batch_size: maximum number of events
+    :return: number of published events
+    """
+    now = timezone.now()
+    events = claim_batch(batch_size, now)
+    published = []
+    failed = []
+    for event in events:
+        try:
+            publish_event(event)
+        except Exception as e:
+            logger.exception("Couldn't publish outbox event %s", event.pk)
+            record_failure(event, e, now)
+            failed.append(event)
+        else:
+            published.append(event.pk)
+
+    OutboxEvent.objects.filter(pk__in=published).update(published_at=timezone.now())
+    OutboxEvent.objects.bulk_update(failed, ['attempts', 'last_error', 'next_attempt_at', 'failed_at'])
+    return len(published)
+
+
+def run_relay(stop=lambda: False):
+    """
+    Relay events until stop() returns True, sleeping OUTBOX_POLL_INTERVAL seconds whenever the outbox is drained.
+    A failing batch (e.g. a database failover or statement timeout) is logged and retried after the same pause.
+    """
+    while not stop():
+        try:
+            published = relay_batch(settings.OUTBOX_BATCH_SIZE)
+        except Exception:
+            logger.exception("Outbox relay batch failed")
+            # Drop a connection the error left unusable, the next batch opens a new one
+            close_old_connections()
+            published = 0
+        if published < settings.OUTBOX_BATCH_SIZE:
+            time.sleep(settings.OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from apps.outbox.models import OutboxEvent
+
+
+@shared_task
+def purge_published_events():
+    """
+    Delete events published more than OUTBOX_RETENTION_DAYS days ago.
+    :return: number of deleted events
+    """
+    published_before = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(published_at__lt=published_before).delete()
+    return deleted
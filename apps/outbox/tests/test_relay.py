@@ -0,0 +1,207 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from apps.comments.models import Comment
+from apps.comments.tasks import auto_reply_to_comment
+from apps.outbox.models import OutboxEvent
+from apps.outbox.relay import claim_batch, relay_batch, run_relay
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class OutboxRecordingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Test Post', content='Test content', author=self.user)
+
+    def test_saves_record_events(self):
+        comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        comment.text = 'Edited'
+        comment.save()
+
+        events = OutboxEvent.objects.order_by('id')
+        self.assertEqual([event.topic for event in events], ['post.created', 'comment.created', 'comment.updated'])
+        self.assertEqual(events[2].payload['text'], 'Edited')
+        self.assertEqual(events[2].payload['id'], comment.pk)
+
+    def test_event_rolled_back_with_change(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Comment.objects.create(text='Comment', post=self.post, author=self.user)
+            raise RuntimeError
+
+        self.assertFalse(OutboxEvent.objects.filter(topic='comment.created').exists())
+
+    def test_set_blocked_records_events(self):
+        other_post = Post.objects.create(title='Other Post', content='Test content', author=self.user)
+
+        Post.objects.all().set_blocked(True)
+
+        events = OutboxEvent.objects.filter(topic='post.updated')
+        self.assertEqual({event.payload['id'] for event in events}, {self.post.pk, other_post.pk})
+        self.assertTrue(all(event.payload['is_blocked'] for event in events))
+
+
+@patch('apps.comments.events.get_redis')
+@patch('apps.outbox.relay.get_redis')
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(
+            title='Test Post', content='Test content', author=self.user, auto_reply_enabled=True, auto_reply_delay=60
+        )
+
+    def test_publishes_events_and_schedules_auto_reply(self, relay_redis, comments_redis):
+        comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        event = OutboxEvent.objects.get(topic='comment.created')
+
+        with patch.object(auto_reply_to_comment, 'apply_async') as apply_async:
+            self.assertEqual(relay_batch(100), 2)
+
+        self.assertEqual(relay_redis.return_value.xadd.call_count, 2)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1, OUTBOX_RETRY_BACKOFF_MAX=0)
+    def test_outage_does_not_dead_letter(self, relay_redis, comments_redis):
+        relay_redis.return_value.xadd.side_effect = RedisConnectionError("Connection refused")
+
+        with self.assertLogs('apps.outbox.relay', 'ERROR'):
+            relay_batch(100)
+            relay_batch(100)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 0)
+        self.assertIsNone(event.failed_at)
+        self.assertEqual(relay_redis.return_value.xadd.call_count, 2)
+        comments_redis.return_value.publish.assert_called_once()
+        apply_async.assert_called_once_with(
+            (comment.pk,), {'dedup_key': event.dedup_key},
+            eta=parse_datetime(event.payload['created_at']) + timedelta(seconds=60),
+        )
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+
+        # Published events aren't relayed again
+        self.assertEqual(relay_batch(100), 0)
+
+    def test_failed_event_retried(self, relay_redis, comments_redis):
+        relay_redis.return_value.xadd.side_effect = ConnectionError("Broker unavailable")
+
+        with self.assertLogs('apps.outbox.relay', 'ERROR'):
+            self.assertEqual(relay_batch(100), 0)
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.published_at)
+        # Not counted as an attempt, but retried later
+        self.assertEqual(event.attempts, 0)
+        self.assertEqual(event.last_error, "Broker unavailable")
+        self.assertIsNotNone(event.next_attempt_at)
+
+        # Not retried before the backoff is over
+        relay_redis.return_value.xadd.side_effect = None
+        self.assertEqual(relay_batch(100), 0)
+
+        OutboxEvent.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(relay_batch(100), 1)
+
+    def test_claimed_events_skipped_by_other_relays(self, relay_redis, comments_redis):
+        claimed_meanwhile = []
+        relay_redis.return_value.xadd.side_effect = lambda *args, **kwargs: claimed_meanwhile.extend(
+            claim_batch(100, timezone.now())
+        )
+
+        self.assertEqual(relay_batch(100), 1)
+
+        self.assertEqual(claimed_meanwhile, [])
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+
+    def test_lease_of_dead_relay_expires(self, relay_redis, comments_redis):
+        claim_batch(100, timezone.now())
+        self.assertEqual(relay_batch(100), 0)
+
+        OutboxEvent.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(relay_batch(100), 1)
+
+    def test_poisoned_event_does_not_block_batch(self, relay_redis, comments_redis):
+        Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        poisoned = OutboxEvent.objects.get(topic='post.created')
+        relay_redis.return_value.xadd.side_effect = [ValueError("Bad event"), None]
+
+        with self.assertLogs('apps.outbox.relay', 'ERROR'), patch.object(auto_reply_to_comment, 'apply_async'):
+            self.assertEqual(relay_batch(1), 0)
+            self.assertEqual(relay_batch(1), 1)
+
+        self.assertIsNotNone(OutboxEvent.objects.get(topic='comment.created').published_at)
+        self.assertIsNone(OutboxEvent.objects.get(pk=poisoned.pk).published_at)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BACKOFF=0)
+    def test_event_dead_lettered_after_max_attempts(self, relay_redis, comments_redis):
+        relay_redis.return_value.xadd.side_effect = ValueError("Bad event")
+
+        with self.assertLogs('apps.outbox.relay', 'ERROR'):
+            relay_batch(100)
+            relay_batch(100)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 2)
+        self.assertIsNotNone(event.failed_at)
+
+        # Dead-lettered events are no longer relayed
+        relay_redis.return_value.xadd.side_effect = None
+        self.assertEqual(relay_batch(100), 0)
+        self.assertEqual(relay_redis.return_value.xadd.call_count, 2)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1, OUTBOX_RETRY_BACKOFF_MAX=0)
+    def test_outage_does_not_dead_letter(self, relay_redis, comments_redis):
+        relay_redis.return_value.xadd.side_effect = RedisConnectionError("Connection refused")
+
+        with self.assertLogs('apps.outbox.relay', 'ERROR'):
+            relay_batch(100)
+            relay_batch(100)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 0)
+        self.assertIsNone(event.failed_at)
+        self.assertEqual(relay_redis.return_value.xadd.call_count, 2)
+
+    def test_duplicate_auto_reply_delivery_ignored(self, relay_redis, comments_redis):
+        comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        dedup_key = OutboxEvent.objects.get(topic='comment.created').dedup_key
+
+        auto_reply_to_comment(comment.pk, dedup_key=dedup_key)
+        auto_reply_to_comment(comment.pk, dedup_key=dedup_key)
+
+        self.assertEqual(Comment.objects.filter(parent=comment).count(), 1)
+
+    def test_failed_auto_reply_delivery_retried(self, relay_redis, comments_redis):
+        comment = Comment.objects.create(text='Comment', post=self.post, author=self.user)
+        dedup_key = OutboxEvent.objects.get(topic='comment.created').dedup_key
+
+        with patch.object(Comment, 'save', side_effect=OperationalError("Server closed the connection")):
+            with self.assertRaises(OperationalError):
+                auto_reply_to_comment(comment.pk, dedup_key=dedup_key)
+        auto_reply_to_comment(comment.pk, dedup_key=dedup_key)
+
+        self.assertEqual(Comment.objects.filter(parent=comment).count(), 1)
+
+
+class RunRelayTests(TestCase):
+    @patch('apps.outbox.relay.close_old_connections')
+    @patch('apps.outbox.relay.time.sleep')
+    @patch('apps.outbox.relay.relay_batch', side_effect=[OperationalError("Server closed the connection"), 0])
+    def test_survives_failing_batch(self, relay_batch, sleep, close_old_connections):
+        stop = iter([False, False, True])
+
+        with self.assertLogs('apps.outbox.relay', 'ERROR'):
+            run_relay(lambda: next(stop))
+
+        self.assertEqual(relay_batch.call_count, 2)
+        self.assertEqual(sleep.call_count, 2)
+        close_old_connections.assert_called_once()
@@ -1,21 +1,25 @@
 from django.contrib import admin
 
+from PostManagementAPI.admin_utils import action_filters, set_blocked, save_changed_fields, \
+    AuthorAutocompleteFilter, LargeTableAdminMixin
 from apps.posts.models import Post
+from apps.posts.tasks import bulk_set_posts_blocked
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin for Post model.
     """
     list_display = ('id', 'title', 'author',  'is_blocked', 'created_at', 'updated_at')
-    list_filter = ('author', 'created_at', 'updated_at', 'is_blocked')
-    date_hierarchy = 'created_at'
+    list_filter = (AuthorAutocompleteFilter, 'created_at', 'updated_at', 'is_blocked')
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
     search_fields = ('title', 'author__username', 'author__email')
     list_editable = [
         'is_blocked',
     ]
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'moderated_by', 'moderation_score', 'moderation_model_version')
     fieldsets = (
         (None, {
             'fields': ('title', 'content')
@@ -23,8 +27,28 @@ class PostAdmin(admin.ModelAdmin):
         ('Author and Status', {
             'fields': ('author', 'is_blocked', 'auto_reply_enabled', 'auto_reply_delay',)
         }),
+        ('Moderation', {
+            'fields': ('moderation_threshold', 'moderated_by', 'moderation_score', 'moderation_model_version'),
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',),
         }),
     )
+    actions = ['block_posts', 'unblock_posts', 'block_all_by_author']
+
+    def save_model(self, request, obj, form, change):
+        save_changed_fields(obj, form, change)
+
+    @admin.action(description="Block selected posts")
+    def block_posts(self, request, queryset):
+        set_blocked(self, request, action_filters(self, request, queryset), True, bulk_set_posts_blocked)
+
+    @admin.action(description="Unblock selected posts")
+    def unblock_posts(self, request, queryset):
+        set_blocked(self, request, action_filters(self, request, queryset), False, bulk_set_posts_blocked)
+
+    @admin.action(description="Block all posts by the authors of selected posts")
+    def block_all_by_author(self, request, queryset):
+        author_ids = list(queryset.order_by().values_list('author_id', flat=True).distinct())
+        set_blocked(self, request, {'author_id__in': author_ids}, True, bulk_set_posts_blocked)
@@ -1,21 +1,42 @@
+from datetime import datetime
 from typing import List
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from ninja import Router
 from ninja.pagination import paginate, PageNumberPagination
 
+from PostManagementAPI.change_feed import get_changes
+from PostManagementAPI.exports import ExportFormat, export_response, filter_export_queryset, iter_queryset_rows
+from PostManagementAPI.object_cache import get_batch, get_cached_objects, parse_ids
 from PostManagementAPI.schemas.errors import ErrorSchema
+from PostManagementAPI.updates import etag, save_if_match
+from apps.comments.events import comment_event_stream, release_db_connection
 from apps.comments.models import Comment
 from apps.comments.schema import CommentOutSchema
+from apps.comments.threads import cascade_blocked
+from apps.posts.cache import HotFirstPagePagination, get_post_data, record_post_read
 from apps.posts.models import Post
-from apps.posts.schema import PostOutSchema, PostInSchema
+from apps.posts.schema import (
+    PostOutSchema, PostInSchema, PostChangesSchema, PostBatchSchema, PostTrendingSchema, PostPatchSchema
+)
 from apps.users.auth import JWTBearer
 
 router = Router()
 
 User = get_user_model()
 
+POST_EXPORT_FIELDS = (
+    'id', 'title', 'content', 'author_id', 'is_blocked', 'moderated_by', 'moderation_score', 'moderation_model_version',
+    'created_at', 'updated_at',
+)
+
+
+def _serialize_post(post: Post) -> dict:
+    return PostOutSchema.from_orm(post).dict()
+
 
 @router.post("/", response={201: PostOutSchema, 500: ErrorSchema}, auth=JWTBearer())
 def create_post(request, post_data: PostInSchema):
@@ -55,78 +76,232 @@ def get_posts(request):
     return posts
 
 
+@router.get("/export", response={403: ErrorSchema}, auth=JWTBearer())
+def export_posts(request, format: ExportFormat = "ndjson", created_from: datetime = None, created_to: datetime = None,
+                 updated_since: datetime = None):
+    """
+    Stream every post, blocked ones included, as NDJSON or CSV. Staff only.
+    :param request: request object
+    :param format: "ndjson" or "csv"
+    :param created_from: only posts created at or after this
+    :param created_to: only posts created before this
+    :param updated_since: only posts updated at or after this, for incremental pulls
+    :return: 200: Streamed export, 403: If the user isn't staff
+    """
+    if not request.auth.is_staff:
+        return 403, {"message": "You do not have permission to export posts"}
+
+    posts = filter_export_queryset(Post.objects.all(), created_from, created_to, updated_since)
+    return export_response(iter_queryset_rows(posts, POST_EXPORT_FIELDS), POST_EXPORT_FIELDS, format, "posts")
+
+
+@router.get("/changes", response={200: PostChangesSchema, 400: ErrorSchema})
+def get_post_changes(request, cursor: str = None, limit: int = 100):
+    """
+    List posts created, updated or blocked since a cursor, oldest change first.
+    Blocked posts are returned as tombstones without their content.
+    :param request: request object
+    :param cursor: next_cursor of the previous page, omitted for the first sync
+    :param limit: page size, at most CHANGE_FEED_MAX_PAGE_SIZE
+    :return: 200: Changed posts and the cursor to continue from, 400: If the cursor is invalid
+    """
+    limit = max(1, min(limit, settings.CHANGE_FEED_MAX_PAGE_SIZE))
+    try:
+        posts, next_cursor, has_more = get_changes(Post.objects.all(), cursor, limit)
+    except ValueError as e:
+        return 400, {"message": str(e)}
+
+    items = [
+        {
+            'id': post.pk,
+            'updated_at': post.updated_at,
+            'deleted': post.is_blocked,
+            'post': None if post.is_blocked else post,
+        } for post in posts
+    ]
+    return 200, {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
+
+
+@router.get("/batch", response={200: PostBatchSchema, 400: ErrorSchema})
+def get_posts_batch(request, ids: str):
+    """
+    Retrieve several posts at once, from the per-object cache where possible and with one query for the rest.
+    :param request: request object
+    :param ids: comma separated post ids, at most BATCH_MAX_IDS
+    :return: 200: Visible posts in the requested order and the ids that are missing or blocked,
+    400: If ids is invalid
+    """
+    try:
+        ids = parse_ids(ids)
+    except ValueError as e:
+        return 400, {"message": str(e)}
+
+    return 200, get_batch(Post, ids, _serialize_post)
+
+
+@router.get("/trending", response={200: PostTrendingSchema, 400: ErrorSchema})
+def get_trending_posts(request, page: int = 1):
+    """
+    Not blocked posts ranked by their precomputed trending score, hottest first. Each page is a single read of the
+    trending index; there is no total count.
+    :param request: request object
+    :param page: page number, TRENDING_PAGE_SIZE posts per page
+    :return: 200: Page of posts and whether there are more, 400: If page is below 1
+    """
+    if page < 1:
+        return 400, {"message": "page must be at least 1"}
+
+    page_size = settings.TRENDING_PAGE_SIZE
+    offset = (page - 1) * page_size
+    # One row past the page tells whether there is a next one
+    posts = list(
+        Post.objects.filter(is_blocked=False).order_by('-trending_score', '-id')[offset:offset + page_size + 1]
+    )
+
+    return 200, {'items': posts[:page_size], 'page': page, 'has_more': len(posts) > page_size}
+
+
 @router.get("/{pk}", response={200: PostOutSchema, 404: ErrorSchema})
-def get_post(request, pk: int):
+def get_post(request, pk: int, response: HttpResponse):
     """
     Retrieve a post by its pk.
     :param request: request object
     :param pk: post id
+    :param response: response whose ETag header is set to the post's version
     :return: 200: If post was successfully retrieved, 404: If post was not found
     """
-    try:
-        post = get_object_or_404(Post, pk=pk, is_blocked=False)
-        return 200, post
-    except Post.DoesNotExist:
+    record_post_read(pk)
+    # Clients send the ETag back in If-Match, so it comes from the shared cache, which every process invalidates on
+    # commit and fills from the primary, not from this process' hot cache
+    post = get_cached_objects(Post, [pk], _serialize_post).get(pk)
+    if post is None or post['is_blocked']:
         return 404, {"message": "No Post matches the given query"}
+    response["ETag"] = etag(post['version'])
+    return 200, post
 
 
-@router.put("/{pk}", response={200: PostOutSchema, 403: ErrorSchema, 404: ErrorSchema}, auth=JWTBearer())
-def update_post(request, pk: int, post_data: PostInSchema):
+def _update_post(request, pk: int, data: dict, response: HttpResponse):
+    """
+    Shared by PUT and PATCH: write the changed fields of data if the user may edit the post and it's still at the
+    version the client read.
     """
-    Update a post identified by its primary key (pk).
+    post = Post.objects.editable_by(request.auth).filter(pk=pk).first()
+    if post is None:
+        # Tell apart the two failures only once the post couldn't be loaded
+        if Post.objects.filter(pk=pk, is_blocked=False).exists():
+            return 403, {"message": "You do not have permission to update this post"}
+        return 404, {"message": "No Post matches the given query"}
+
+    if not save_if_match(post, data, request.headers.get("If-Match")):
+        return 412, {"message": "The post was changed since it was read, read it again"}
+
+    response["ETag"] = etag(post.version)
+    return 200, post
+
+
+@router.put("/{pk}", response={200: PostOutSchema, 403: ErrorSchema, 404: ErrorSchema, 412: ErrorSchema},
+            auth=JWTBearer())
+def update_post(request, pk: int, post_data: PostInSchema, response: HttpResponse):
+    """
+    Update a post identified by its primary key (pk). Only changed fields are written, and title and content are only
+    re-moderated if they changed. An If-Match header with the post's ETag is optional.
     :param request: request object
     :param pk: post id
     :param post_data: updated data for the post
+    :param response: response whose ETag header is set to the new version
     :return: 200: If the post was updated successfully, 403: If user doesn't have permission to update the post,
-    404: If post was not found
+    404: If post was not found, 412: If the post was changed since the version in If-Match (or since it was loaded)
     """
-    try:
-        post = get_object_or_404(Post, pk=pk, is_blocked=False)
-    except Post.DoesNotExist:
-        return 404, {"message": "No Post matches the given query"}
-    user = request.auth
-
-    # Check if the authenticated user is staff or the post's author
-    if post.author != user and not user.is_staff:
-        return 403, {"message": "You do not have permission to update this post"}
+    return _update_post(request, pk, post_data.dict(), response)
 
-    for attr, value in post_data.dict().items():
-        setattr(post, attr, value)
 
-    post.save()
-
-    return 200, post
+@router.patch("/{pk}",
+              response={200: PostOutSchema, 403: ErrorSchema, 404: ErrorSchema, 412: ErrorSchema, 428: ErrorSchema},
+              auth=JWTBearer())
+def patch_post(request, pk: int, post_data: PostPatchSchema, response: HttpResponse):
+    """
+    Partially update a post: only the fields sent are changed, and title and content are only re-moderated if they
+    changed. Requires an If-Match header with the ETag of the version the changes are based on, so that concurrent
+    updates can't overwrite each other.
+    :param request: request object
+    :param pk: post id
+    :param post_data: fields to change
+    :param response: response whose ETag header is set to the new version
+    :return: 200: If the post was updated successfully, 403: If user doesn't have permission to update the post,
+    404: If post was not found, 412: If the post was changed since that version, 428: If If-Match is missing
+    """
+    if "If-Match" not in request.headers:
+        return 428, {"message": "If-Match header with the post's ETag is required"}
+    return _update_post(request, pk, post_data.dict(exclude_none=True), response)
 
 
 @router.delete("/{pk}", response={204: None, 403: ErrorSchema, 404: ErrorSchema}, auth=JWTBearer())
 def delete_post(request, pk: int):
     """
-    Delete an existing post.
+    Delete an existing post, with a single UPDATE checking that the user is its author or staff. Its comments are
+    hidden with it.
     :param request: request object
     :param pk: post id
     :return: 204 No Content: If the post is successfully deleted, 403: If user doesn't have permission to delete post,
     404: If post wasn't found
     """
-    try:
-        post = get_object_or_404(Post, pk=pk, is_blocked=False)
-        user = request.auth
+    with transaction.atomic():
+        if Post.objects.soft_delete(pk, request.auth):
+            cascade_blocked(True, post_id=pk)
+            return 204, None
+
+    if Post.objects.filter(pk=pk, is_blocked=False).exists():
+        return 403, {"message": "You do not have permission to delete this post"}
+    return 404, {"message": "No Post matches the given query"}
+
+
+@router.post("/{pk}/restore", response={204: None, 403: ErrorSchema, 404: ErrorSchema}, auth=JWTBearer())
+def restore_post(request, pk: int):
+    """
+    Restore a deleted post along with the comments hidden by its deletion. Authors can restore posts they deleted,
+    staff any post deleted by its author or staff.
+    :param request: request object
+    :param pk: post id
+    :return: 204 No Content: If the post was restored, 403: If user doesn't have permission to restore the post,
+    404: If no deleted post was found
+    """
+    with transaction.atomic():
+        if Post.objects.restore(pk, request.auth):
+            cascade_blocked(False, post_id=pk)
+            return 204, None
+
+    if Post.objects.filter(pk=pk, is_blocked=True).exists():
+        return 403, {"message": "You do not have permission to restore this post"}
+    return 404, {"message": "No deleted Post matches the given query"}
 
-        # Check if the authenticated user is staff or the post's author
-        if post.author != user and not user.is_staff:
-            return 403, {"message": "You do not have permission to delete this post"}
 
-        post.is_blocked = True
-        post.save()
-        return 204, None
-    except Post.DoesNotExist:
+@router.get("/{post_id}/comments/stream", response={404: ErrorSchema})
+async def stream_post_comments(request, post_id: int):
+    """
+    Stream the comments added to a post as Server-Sent Events. Only served by the ASGI application.
+    :param request: request object
+    :param post_id: primary key of the post
+    :return: 200: text/event-stream of "comment" events, 404: If no visible post matches post_id
+    """
+    exists = await Post.objects.filter(pk=post_id, is_blocked=False).aexists()
+    await release_db_connection()
+    if not exists:
         return 404, {"message": "No Post matches the given query"}
 
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+
+    response = StreamingHttpResponse(comment_event_stream(post_id, last_event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 
 @router.get("/{post_id}/comments", response={200: List[CommentOutSchema], 404: ErrorSchema})
-@paginate(PageNumberPagination)
+@paginate(HotFirstPagePagination, item_schema=CommentOutSchema)
 def get_post_comments(request, post_id: int):
     """
-    Retrieve all comments related to a post.
+    Retrieve all comments related to a post. The first page of popular posts is served from the hot cache.
 
     :param request: request object
     :param post_id: primary key of the post to retrieve comments for
@@ -134,7 +309,10 @@ def get_post_comments(request, post_id: int):
     :returns: 200: A list of comments related to the post.
     404: If no post matching the given post_id is found.
     """
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.filter(post=post, is_blocked=False).select_related('author')
+    record_post_read(post_id)
+    post = get_post_data(post_id)
+    if post is None or post['is_blocked']:
+        raise Http404("No Post matches the given query")
+    comments = Comment.objects.filter(post_id=post_id, is_blocked=False).select_related('author')
 
     return comments
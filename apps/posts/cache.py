@@ -0,0 +1,91 @@
+from typing import Optional
+
+from django.db import router
+from django.dispatch import receiver
+from ninja.pagination import PageNumberPagination
+
+from PostManagementAPI.hot_cache import HotCache
+from PostManagementAPI.object_cache import objects_invalidated
+from PostManagementAPI.popularity import PopularityTracker
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.posts.schema import PostOutSchema
+
+post_popularity = PopularityTracker("posts")
+post_hot_cache = HotCache("posts", post_popularity)
+
+
+def popularity_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def comments_page_key(post_id: int) -> str:
+    return f"post:{post_id}:comments:1"
+
+
+def record_post_read(post_id: int):
+    post_popularity.record(popularity_key(post_id))
+
+
+def _fill_alias(model, popularity_key: str) -> str:
+    # Values kept in memory are only invalidated in this process, a lagging replica must not be the source of them
+    if post_hot_cache.admits(popularity_key):
+        return router.db_for_write(model)
+    return router.db_for_read(model)
+
+
+def get_post_data(post_id: int) -> Optional[dict]:
+    """
+    Serialized post, from the hot cache if the post is popular enough to be pinned there. Posts that go into the hot
+    cache are loaded from the primary.
+    :param post_id: primary key of the post
+    :return: PostOutSchema data of the post, blocked or not, or None if it doesn't exist
+    """
+    key = popularity_key(post_id)
+    data = post_hot_cache.get(key)
+    if data is None:
+        post = Post.objects.using(_fill_alias(Post, key)).filter(pk=post_id).first()
+        if post is None:
+            return None
+        data = PostOutSchema.from_orm(post).dict()
+        post_hot_cache.put(key, data, key)
+    return data
+
+
+class HotFirstPagePagination(PageNumberPagination):
+    """
+    Page number pagination of a post's comments that serves the first page of popular posts from the hot cache. First
+    pages that go into the hot cache are loaded from the primary.
+    """
+
+    def __init__(self, item_schema, **kwargs):
+        self.item_schema = item_schema
+        super().__init__(**kwargs)
+
+    def paginate_queryset(self, queryset, pagination, **params):
+        post_id = params["post_id"]
+        if pagination.page != 1:
+            return super().paginate_queryset(queryset, pagination, **params)
+
+        key = comments_page_key(post_id)
+        page = post_hot_cache.get(key)
+        if page is None:
+            queryset = queryset.using(_fill_alias(queryset.model, popularity_key(post_id)))
+            page = super().paginate_queryset(queryset, pagination, **params)
+            page = {**page, "items": [self.item_schema.from_orm(item).dict() for item in page["items"]]}
+            post_hot_cache.put(key, page, popularity_key(post_id))
+        return page
+
+
+@receiver(objects_invalidated, sender=Post)
+def _invalidate_posts(sender, pks, **kwargs):
+    for pk in pks:
+        post_hot_cache.invalidate(popularity_key(pk), comments_page_key(pk))
+
+
+@receiver(objects_invalidated, sender=Comment)
+def _invalidate_comments_pages(sender, pks, **kwargs):
+    # Sent once the change committed for saved comments as well as for ones deleted or blocked in bulk
+    post_ids = Comment.objects.filter(pk__in=pks).order_by().values_list('post_id', flat=True).distinct()
+    for post_id in post_ids:
+        post_hot_cache.invalidate(comments_page_key(post_id))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_auto_reply_delay_post_auto_reply_enabled'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['created_at'], name='posts_post_created_dadbfe_idx'),
+        ),
+    ]
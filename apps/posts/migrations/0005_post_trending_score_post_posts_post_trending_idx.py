@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_posts_post_updated_a662aa_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_blocked', False)), fields=['-trending_score', '-id'], name='posts_post_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_trending_score_post_posts_post_trending_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='moderated_by',
+            field=models.CharField(blank=True, choices=[('', 'Nobody'), ('classifier', 'Classifier'), ('staff', 'Staff'), ('author', 'Author')], default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='moderation_model_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='moderation_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='moderation_threshold',
+            field=models.FloatField(blank=True, help_text='Blocks the post and its comments above this score instead of the default', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_moderated_by_post_moderation_model_version_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='moderated_by',
+            field=models.CharField(blank=True, choices=[('', 'Nobody'), ('classifier', 'Classifier'), ('staff', 'Staff'), ('author', 'Author'), ('flood', 'Flood detection')], default='', max_length=16),
+        ),
+    ]
@@ -1,13 +1,185 @@
+from typing import List, Tuple
+
 from ckeditor.fields import RichTextField
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from profanity_check import predict_prob
+from PostManagementAPI.object_cache import ObjectCacheMixin, invalidate_objects
+from PostManagementAPI.updates import VersionedMixin
+from apps.moderation.scoring import MODERATION_FIELDS, ModeratedBy, moderate
+from apps.outbox.models import OutboxEventsMixin, build_event, record_events
 
 User = get_user_model()
 
 
-class Post(models.Model):
+class BlockableQuerySet(models.QuerySet):
+    """
+    QuerySet for models that can be blocked by moderation.
+    """
+
+    def _record_blocked_changes(self, changes: List[Tuple[int, bool]], updated_at):
+        record_events([
+            build_event(self.model, pk, updated_at, 'updated',
+                        {'id': pk, 'is_blocked': is_blocked, 'updated_at': updated_at})
+            for pk, is_blocked in changes
+        ], using=self.db)
+        invalidate_objects(self.model, [pk for pk, _ in changes], using=self.db)
+
+    def editable_by(self, user) -> 'BlockableQuerySet':
+        """
+        :return: the not blocked rows user may edit or delete, every one for staff and their own for other users
+        """
+        visible = self.filter(is_blocked=False)
+        return visible if user.is_staff else visible.filter(author_id=user.pk)
+
+    def soft_delete(self, pk: int, user) -> bool:
+        """
+        Block a row on behalf of its author or a staff member, with a single conditional UPDATE that checks visibility
+        and ownership itself, without loading the row or re-running moderation. Records the same outbox event and
+        cache invalidation as set_blocked. Comments hidden along with the row are up to the caller, see
+        apps.comments.threads.
+        :param pk: primary key of the row
+        :param user: user deleting the row
+        :return: whether the row was deleted, False if it doesn't exist, is blocked already or user may not delete it
+        """
+        # Part of the caller's transaction if there is one, e.g. together with the cascade
+        with transaction.atomic(using=self.db, savepoint=False):
+            updated_at = timezone.now()
+            updated = self.editable_by(user).filter(pk=pk).update(
+                is_blocked=True,
+                version=F('version') + 1,
+                moderated_by=Case(
+                    When(author_id=user.pk, then=Value(ModeratedBy.AUTHOR)), default=Value(ModeratedBy.STAFF)
+                ),
+                updated_at=updated_at,
+            )
+            if updated:
+                self._record_blocked_changes([(pk, True)], updated_at)
+        return bool(updated)
+
+    def restore(self, pk: int, user) -> bool:
+        """
+        Unblock a deleted row, with a single conditional UPDATE like soft_delete. Authors can restore what they deleted
+        themselves, staff can also restore what staff deleted; rows blocked by moderation can't be restored. Rows whose
+        model.restore_condition doesn't hold, e.g. comments of a deleted post, stay deleted.
+        :param pk: primary key of the row
+        :param user: user restoring the row
+        :return: whether the row was restored, False if it doesn't exist, isn't deleted or user may not restore it
+        """
+        restorable = self.filter(self.model.restore_condition, is_blocked=True)
+        if user.is_staff:
+            restorable = restorable.filter(moderated_by__in=(ModeratedBy.AUTHOR, ModeratedBy.STAFF))
+        else:
+            restorable = restorable.filter(moderated_by=ModeratedBy.AUTHOR, author_id=user.pk)
+        with transaction.atomic(using=self.db, savepoint=False):
+            updated_at = timezone.now()
+            updated = restorable.filter(pk=pk).update(
+                is_blocked=False, moderated_by=ModeratedBy.NOBODY, updated_at=updated_at, version=F('version') + 1
+            )
+            if updated:
+                self._record_blocked_changes([(pk, False)], updated_at)
+        return bool(updated)
+
+    def set_blocked(self, is_blocked: bool, moderated_by: str = ModeratedBy.STAFF, **fields) -> int:
+        """
+        Block or unblock all rows of the queryset with a single UPDATE, without loading them or re-running moderation.
+
+        This is the one place bulk moderation changes go through, anything derived from is_blocked has to be kept in
+        sync here. Changed rows are dropped from the per-object cache, and each gets an "<model name>.updated" outbox
+        event in the same transaction whose payload only holds id, is_blocked and updated_at.
+        :param is_blocked: new value of is_blocked
+        :param moderated_by: ModeratedBy value recorded on the changed rows
+        :param fields: other columns set by the same UPDATE, e.g. Comment.cascade_root
+        :return: number of updated rows
+        """
+        with transaction.atomic(using=self.db):
+            pks = list(
+                self.exclude(is_blocked=is_blocked).select_for_update(of=('self',)).values_list('pk', flat=True)
+            )
+            if not pks:
+                return 0
+            updated_at = timezone.now()
+            updated = self.model.objects.filter(pk__in=pks).update(
+                is_blocked=is_blocked, moderated_by=moderated_by, updated_at=updated_at, version=F('version') + 1,
+                **fields
+            )
+            self._record_blocked_changes([(pk, is_blocked) for pk in pks], updated_at)
+        return updated
+
+    def apply_moderation_threshold(self, threshold: float, chunk_size: int = None) -> int:
+        """
+        Re-decide is_blocked from the stored moderation scores, without re-running the classifier.
+
+        Only rows the classifier is in charge of are touched: rows it blocked, unblocked rows nobody decided on, and
+        rows blocked for flooding once the backfill scored them.
+        The rows to flip are processed in primary key ordered chunks, each in its own transaction: selected and locked
+        with one query and flipped with one set-based UPDATE, followed by the same outbox events and cache invalidation
+        as set_blocked. Rows without a score are left alone.
+        :param threshold: deployment wide threshold, used for rows without a per post moderation_threshold
+        :param chunk_size: number of rows locked and updated per transaction, BULK_MODERATION_CHUNK_SIZE by default
+        :return: number of updated rows
+        """
+        chunk_size = chunk_size or settings.BULK_MODERATION_CHUNK_SIZE
+        effective_threshold = Coalesce(F(self.model.moderation_threshold_lookup), Value(threshold))
+        should_block = Q(moderation_score__gt=effective_threshold)
+        decided_by_classifier = Q(moderated_by__in=(ModeratedBy.CLASSIFIER, ModeratedBy.FLOOD)) | Q(
+            moderated_by=ModeratedBy.NOBODY, is_blocked=False
+        )
+        pending = (
+            self.filter(decided_by_classifier, moderation_score__isnull=False)
+            .filter((should_block & Q(is_blocked=False)) | (~should_block & Q(is_blocked=True)))
+            .order_by('pk')
+        )
+        updated = 0
+        last_pk = None
+        while True:
+            chunk = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+            with transaction.atomic(using=self.db):
+                changes = list(chunk.select_for_update(of=('self',)).values_list('pk', 'is_blocked')[:chunk_size])
+                if not changes:
+                    break
+                updated_at = timezone.now()
+                updated += self.model.objects.filter(pk__in=[pk for pk, _ in changes]).update(
+                    is_blocked=Case(When(is_blocked=True, then=Value(False)), default=Value(True)),
+                    moderated_by=ModeratedBy.CLASSIFIER,
+                    updated_at=updated_at,
+                    version=F('version') + 1,
+                )
+                self._record_blocked_changes([(pk, not was_blocked) for pk, was_blocked in changes], updated_at)
+            last_pk = changes[-1][0]
+        return updated
+
+    def set_blocked_in_chunks(self, is_blocked: bool, chunk_size: int, progress=None,
+                              moderated_by: str = ModeratedBy.STAFF) -> int:
+        """
+        Same as set_blocked, but in primary key ordered chunks so that no single statement locks a huge set of rows.
+        :param is_blocked: new value of is_blocked
+        :param chunk_size: number of rows updated per statement
+        :param progress: optional callable receiving (updated rows, total rows) after every chunk
+        :param moderated_by: ModeratedBy value recorded on the changed rows
+        :return: number of updated rows
+        """
+        pending = self.exclude(is_blocked=is_blocked).order_by('pk')
+        total = pending.count()
+        updated = 0
+        last_pk = None
+        while True:
+            chunk = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            updated += self.model.objects.filter(pk__in=pks).set_blocked(is_blocked, moderated_by)
+            last_pk = pks[-1]
+            if progress is not None:
+                progress(updated, total)
+        return updated
+
+
+class Post(VersionedMixin, ObjectCacheMixin, OutboxEventsMixin, models.Model):
     """
     Post model.
     """
@@ -17,21 +189,71 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_blocked = models.BooleanField(default=False)
+    moderated_by = models.CharField(max_length=16, choices=ModeratedBy.choices, default=ModeratedBy.NOBODY, blank=True)
+    # Profanity probability of the title or content, whichever is higher, and the model that computed it
+    moderation_score = models.FloatField(null=True, blank=True)
+    moderation_model_version = models.CharField(max_length=64, blank=True, default='')
+    moderation_threshold = models.FloatField(
+        null=True, blank=True, help_text="Blocks the post and its comments above this score instead of the default"
+    )
+    # Incremented by every write, for optimistic concurrency control (If-Match)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Maintained by the update_trending_scores task, see apps.posts.trending
+    trending_score = models.FloatField(default=0)
 
     # Fields for automatic replies
     auto_reply_enabled = models.BooleanField(default=False)
     auto_reply_delay = models.PositiveIntegerField(default=0, help_text="Auto delay for comment in seconds")
 
+    objects = BlockableQuerySet.as_manager()
+
+    # Threshold lookup used by BlockableQuerySet.apply_moderation_threshold
+    moderation_threshold_lookup = 'moderation_threshold'
+    # Deleted posts can always be restored by BlockableQuerySet.restore
+    restore_condition = Q()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            # Change feed keyset
+            models.Index(fields=['updated_at', 'id']),
+            # Trending feed, read in index order
+            models.Index(
+                fields=['-trending_score', '-id'], name='posts_post_trending_idx', condition=Q(is_blocked=False)
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
+    def outbox_payload(self) -> dict:
+        return {
+            'id': self.pk,
+            'title': self.title,
+            'author_id': self.author_id,
+            'is_blocked': self.is_blocked,
+            'auto_reply_enabled': self.auto_reply_enabled,
+            'auto_reply_delay': self.auto_reply_delay,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+    def moderation_texts(self) -> List[str]:
+        return [self.title, self.content]
+
     def save(self, *args, **kwargs):
         """
-        Check for profanity in title and content
+        Score title and content for profanity and block the post above its threshold, unless a partial save doesn't
+        touch them
         :param args:
         :param kwargs:
         :return:
         """
-        if predict_prob([self.title])[0] > 0.5 or predict_prob([self.content])[0] > 0.5:
-            self.is_blocked = True
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'title', 'content'} & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        moderate(self, self.moderation_threshold)
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *MODERATION_FIELDS}
         super().save(*args, **kwargs)
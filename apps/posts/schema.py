@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List, Optional
 
 from ninja import Schema
 
@@ -10,10 +11,46 @@ class PostInSchema(Schema):
     auto_reply_delay: int = 0
 
 
+class PostPatchSchema(Schema):
+    # Only the fields sent are changed
+    title: str = None
+    content: str = None
+    auto_reply_enabled: bool = None
+    auto_reply_delay: int = None
+
+
 class PostOutSchema(Schema):
     id: int
     title: str
     content: str
     author_id: int
     is_blocked: bool
+    # Sent back in If-Match by updates, also returned as the ETag header
+    version: int
     created_at: datetime
+
+
+class PostChangeSchema(Schema):
+    id: int
+    updated_at: datetime
+    # Tombstone for a blocked or deleted post, post is null then
+    deleted: bool
+    post: Optional[PostOutSchema] = None
+
+
+class PostChangesSchema(Schema):
+    items: List[PostChangeSchema]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class PostBatchSchema(Schema):
+    items: List[PostOutSchema]
+    missing: List[int]
+    blocked: List[int]
+
+
+class PostTrendingSchema(Schema):
+    items: List[PostOutSchema]
+    page: int
+    has_more: bool
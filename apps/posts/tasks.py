@@ -0,0 +1,33 @@
+from __future__ import absolute_import, unicode_literals
+from celery import shared_task
+from django.conf import settings
+
+from PostManagementAPI.admin_utils import filter_rows
+from apps.posts.models import Post
+from apps.posts.trending import update_trending_scores_since_last_run
+
+
+@shared_task(bind=True, ignore_result=False)
+def bulk_set_posts_blocked(self, filters: dict, is_blocked: bool):
+    """
+    Block or unblock every post matching filters in chunks, reporting progress as task state.
+    :param filters: queryset filter keyword arguments, e.g. {"author_id__in": [1, 2]}, or changelist filters from
+    admin_utils.action_filters
+    :param is_blocked: new value of is_blocked
+    :return: number of updated posts
+    """
+    def progress(updated, total):
+        self.update_state(state='PROGRESS', meta={'updated': updated, 'total': total})
+
+    return filter_rows(Post, filters).set_blocked_in_chunks(
+        is_blocked, settings.BULK_MODERATION_CHUNK_SIZE, progress
+    )
+
+
+@shared_task
+def update_trending_scores():
+    """
+    Rescore the posts with activity since the previous run.
+    :return: number of rescored posts
+    """
+    return update_trending_scores_since_last_run()
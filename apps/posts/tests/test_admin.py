@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from PostManagementAPI.admin_utils import filter_rows
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    def setUp(self):
+        self.changelist_url = reverse('admin:posts_post_changelist')
+
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.user1 = User.objects.create_user(email='test1@example.com', username='testuser1', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.client.force_login(self.admin)
+
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='Post content.', author=self.user) for i in range(2)
+        ]
+        self.other_post = Post.objects.create(title='Other Post', content='Other post content.', author=self.user1)
+
+    def run_action(self, action, posts):
+        return self.client.post(self.changelist_url, {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+        })
+
+    def test_block_posts(self):
+        with patch('apps.moderation.scoring.predict_prob') as mocked_predict_prob:
+            self.run_action('block_posts', self.posts[:1])
+
+        mocked_predict_prob.assert_not_called()
+        self.assertEqual(list(Post.objects.filter(is_blocked=True)), self.posts[:1])
+
+    def test_block_all_by_author(self):
+        self.run_action('block_all_by_author', self.posts[:1])
+        self.assertEqual(Post.objects.filter(is_blocked=True).count(), len(self.posts))
+        self.assertFalse(Post.objects.get(pk=self.other_post.pk).is_blocked)
+
+    @override_settings(ADMIN_BULK_SYNC_LIMIT=0)
+    def test_select_all_passes_search_term(self):
+        with patch('apps.posts.admin.bulk_set_posts_blocked.delay') as mocked_delay:
+            self.client.post(f"{self.changelist_url}?q=testuser1", {
+                'action': 'block_posts',
+                'select_across': '1',
+                '_selected_action': [self.other_post.pk],
+            })
+
+        filters = mocked_delay.call_args.args[0]
+        self.assertEqual(filters, {'lookups': {}, 'search': 'testuser1'})
+        self.assertEqual(list(filter_rows(Post, filters)), [self.other_post])
+
+    def test_changelist_query_count_is_bounded(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.changelist_url)
+        queries = len(context.captured_queries)
+
+        for i in range(10):
+            author = User.objects.create_user(email=f'author{i}@example.com', username=f'author{i}',
+                                              password='password123')
+            Post.objects.create(title=f'Post by author {i}', content='Post content.', author=author)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.changelist_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context.captured_queries), queries)
+        self.assertLessEqual(queries, 5)
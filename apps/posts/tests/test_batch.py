@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from ninja.testing import TestClient
+
+from apps.posts.api import router
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class PostBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.posts = [
+            Post.objects.create(title=f'Post {number}', content='Content', author=self.user) for number in range(3)
+        ]
+        Post.objects.filter(pk=self.posts[1].pk).set_blocked(True)
+
+    def test_batch(self):
+        missing_id = self.posts[-1].pk + 1
+        ids = [self.posts[2].pk, missing_id, self.posts[1].pk, self.posts[0].pk]
+
+        response = self.client.get(f"/batch?ids={','.join(map(str, ids))}")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['items']], [self.posts[2].pk, self.posts[0].pk])
+        self.assertEqual(data['missing'], [missing_id])
+        self.assertEqual(data['blocked'], [self.posts[1].pk])
+
+    def test_served_from_cache_when_warm(self):
+        url = f"/batch?ids={self.posts[0].pk},{self.posts[2].pk}"
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.json()['items']), 2)
+
+    def test_cache_invalidated_on_change(self):
+        url = f"/batch?ids={self.posts[0].pk},{self.posts[2].pk}"
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].title = 'Updated'
+            self.posts[0].save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.filter(pk=self.posts[2].pk).set_blocked(True)
+
+        data = self.client.get(url).json()
+        self.assertEqual(data['items'][0]['title'], 'Updated')
+        self.assertEqual(data['blocked'], [self.posts[2].pk])
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get("/batch?ids=1,abc").status_code, 400)
+        self.assertEqual(self.client.get("/batch?ids=").status_code, 400)
+        with self.settings(BATCH_MAX_IDS=2):
+            self.assertEqual(self.client.get("/batch?ids=1,2,3").status_code, 400)
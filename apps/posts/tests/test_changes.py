@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from ninja.testing import TestClient
+
+from apps.posts.api import router
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class PostChangesTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.posts = [
+            Post.objects.create(title=f'Post {number}', content='Content', author=self.user) for number in range(3)
+        ]
+
+    def test_pages_through_changes(self):
+        response = self.client.get("/changes?limit=2")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['items']], [self.posts[0].pk, self.posts[1].pk])
+        self.assertEqual(data['items'][0]['post']['title'], 'Post 0')
+        self.assertTrue(data['has_more'])
+
+        data = self.client.get(f"/changes?limit=2&cursor={data['next_cursor']}").json()
+        self.assertEqual([item['id'] for item in data['items']], [self.posts[2].pk])
+        self.assertFalse(data['has_more'])
+
+        # Nothing changed since, the cursor stays where it is
+        cursor = data['next_cursor']
+        data = self.client.get(f"/changes?cursor={cursor}").json()
+        self.assertEqual(data['items'], [])
+        self.assertEqual(data['next_cursor'], cursor)
+
+    def test_returns_updated_and_blocked_posts_after_cursor(self):
+        cursor = self.client.get("/changes").json()['next_cursor']
+
+        self.posts[0].title = 'Updated'
+        self.posts[0].save()
+        Post.objects.filter(pk=self.posts[1].pk).set_blocked(True)
+
+        items = self.client.get(f"/changes?cursor={cursor}").json()['items']
+        self.assertEqual([item['id'] for item in items], [self.posts[0].pk, self.posts[1].pk])
+        self.assertEqual(items[0]['post']['title'], 'Updated')
+        self.assertTrue(items[1]['deleted'])
+        self.assertIsNone(items[1]['post'])
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_recent_changes_are_held_back(self):
+        data = self.client.get("/changes").json()
+
+        self.assertEqual(data['items'], [])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/changes?cursor=not-a-cursor")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from ninja.testing import TestClient
+
+from apps.posts.api import router
+from apps.posts.models import Post
+from apps.users.utils import generate_access_token
+
+User = get_user_model()
+
+
+class PostExportTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.auth_headers = {'Authorization': f'Bearer {generate_access_token(self.user)}'}
+        self.admin_headers = {'Authorization': f'Bearer {generate_access_token(self.admin)}'}
+
+        self.old_post = Post.objects.create(title='Old post', content='Old content', author=self.user)
+        Post.objects.filter(pk=self.old_post.pk).update(
+            created_at=timezone.now() - timedelta(days=10), updated_at=timezone.now() - timedelta(days=10)
+        )
+        self.post = Post.objects.create(title='New post', content='New content', author=self.user)
+        self.blocked_post = Post.objects.create(title='Blocked post', content='Content', author=self.user)
+        Post.objects.filter(pk=self.blocked_post.pk).set_blocked(True)
+
+    def test_export_ndjson(self):
+        response = self.client.get("/export", headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.content.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.old_post.pk, self.post.pk, self.blocked_post.pk])
+        self.assertTrue(rows[2]['is_blocked'])
+
+    def test_export_csv(self):
+        response = self.client.get("/export?format=csv", headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['title'], 'Old post')
+
+    def test_export_filters(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+
+        response = self.client.get(f"/export?{urlencode({'updated_since': since})}", headers=self.admin_headers)
+        ids = [json.loads(line)['id'] for line in response.content.decode().splitlines()]
+        self.assertEqual(ids, [self.post.pk, self.blocked_post.pk])
+
+        response = self.client.get(f"/export?{urlencode({'created_to': since})}", headers=self.admin_headers)
+        ids = [json.loads(line)['id'] for line in response.content.decode().splitlines()]
+        self.assertEqual(ids, [self.old_post.pk])
+
+    def test_export_staff_only(self):
+        response = self.client.get("/export", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,202 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from ninja.testing import TestClient
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+
+from PostManagementAPI.db_routers import replica_reads
+from PostManagementAPI.hot_cache import HotCache
+from PostManagementAPI.popularity import CountMinSketch, PopularityTracker
+from apps.comments.models import Comment
+from apps.posts.api import router
+from apps.posts.cache import comments_page_key, get_post_data, popularity_key, post_hot_cache, post_popularity
+from apps.posts.models import Post
+from apps.users.utils import generate_access_token
+
+User = get_user_model()
+
+
+class CountMinSketchTests(SimpleTestCase):
+    def test_estimate_never_undercounts(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        for number in range(200):
+            sketch.add(f"key:{number}", count=number % 5 + 1)
+
+        for number in range(200):
+            self.assertGreaterEqual(sketch.estimate(f"key:{number}"), number % 5 + 1)
+
+    def test_halve(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        sketch.add("key", count=10)
+
+        sketch.halve()
+
+        self.assertEqual(sketch.estimate("key"), 5)
+
+
+@override_settings(HOT_CACHE_SIZE=2, HOT_CACHE_MIN_FREQUENCY=2, POPULARITY_FLUSH_INTERVAL=3600)
+class HotCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.popularity = PopularityTracker("test")
+        self.cache = HotCache("test", self.popularity)
+
+    def read(self, key, times):
+        for _ in range(times):
+            self.popularity.record(key)
+
+    def test_rarely_read_keys_not_admitted(self):
+        self.read("once", 1)
+
+        self.assertFalse(self.cache.put("once", "value", "once"))
+        self.assertIsNone(self.cache.get("once"))
+
+    def test_full_cache_only_admits_more_popular_keys(self):
+        self.read("a", 5)
+        self.read("b", 5)
+        self.cache.put("a", "a", "a")
+        self.cache.put("b", "b", "b")
+
+        self.read("c", 2)
+        self.assertFalse(self.cache.put("c", "c", "c"))
+
+        self.read("d", 10)
+        self.assertTrue(self.cache.put("d", "d", "d"))
+        # The least recently used entry made room
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), "b")
+        self.assertEqual(self.cache.get("d"), "d")
+
+
+@override_settings(HOT_CACHE_MIN_FREQUENCY=2, POPULARITY_FLUSH_INTERVAL=3600)
+class HotPostTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        post_hot_cache.clear()
+        post_popularity.clear()
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.post = Post.objects.create(title='Hot post', content='Content', author=self.user)
+        Comment.objects.create(text='Comment', post=self.post, author=self.user)
+
+    def test_popular_post_served_from_memory(self):
+        self.client.get(f"/{self.post.pk}/comments")
+        self.client.get(f"/{self.post.pk}/comments")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_post_data(self.post.pk)['title'], 'Hot post')
+
+    def test_post_etag_not_served_from_memory(self):
+        self.client.get(f"/{self.post.pk}/comments")
+        self.client.get(f"/{self.post.pk}/comments")
+        # Another process edited the post, this process' hot cache wasn't invalidated
+        Post.objects.filter(pk=self.post.pk).update(title='Edited', version=2)
+
+        response = self.client.get(f"/{self.post.pk}")
+
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.json()['title'], 'Edited')
+
+    def test_popular_post_first_comments_page_served_from_memory(self):
+        self.client.get(f"/{self.post.pk}/comments")
+        self.client.get(f"/{self.post.pk}/comments")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/{self.post.pk}/comments")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['text'] for item in response.json()['items']], ['Comment'])
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_popular_post_loaded_from_primary(self, _):
+        post_popularity.record(popularity_key(self.post.pk))
+
+        # Reads of the replica aren't allowed in this test case, replica_reads() only reaches the primary
+        with replica_reads():
+            self.assertEqual(self.client.get(f"/{self.post.pk}").status_code, 200)
+            self.assertEqual(self.client.get(f"/{self.post.pk}/comments").status_code, 200)
+
+        self.assertIsNotNone(post_hot_cache.get(popularity_key(self.post.pk)))
+        self.assertIsNotNone(post_hot_cache.get(comments_page_key(self.post.pk)))
+
+    def test_saved_post_invalidated(self):
+        self.client.get(f"/{self.post.pk}")
+        self.client.get(f"/{self.post.pk}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+
+        self.assertEqual(self.client.get(f"/{self.post.pk}").json()['title'], 'Edited')
+
+    def test_blocked_post_invalidated(self):
+        self.client.get(f"/{self.post.pk}")
+        self.client.get(f"/{self.post.pk}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.filter(pk=self.post.pk).set_blocked(True)
+
+        self.assertEqual(self.client.get(f"/{self.post.pk}").status_code, 404)
+
+    def test_new_comment_invalidates_first_page(self):
+        self.client.get(f"/{self.post.pk}/comments")
+        self.client.get(f"/{self.post.pk}/comments")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(text='Another comment', post=self.post, author=self.user)
+
+        self.assertEqual(self.client.get(f"/{self.post.pk}/comments").json()['count'], 2)
+
+    def test_deleted_comment_invalidates_first_page(self):
+        self.client.get(f"/{self.post.pk}/comments")
+        self.client.get(f"/{self.post.pk}/comments")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.filter(post=self.post).set_blocked(True)
+
+        self.assertEqual(self.client.get(f"/{self.post.pk}/comments").json()['count'], 0)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.auth_headers = {'Authorization': f'Bearer {generate_access_token(self.user)}'}
+        self.admin_headers = {'Authorization': f'Bearer {generate_access_token(self.admin)}'}
+
+    @patch('PostManagementAPI.task_metrics.queue_depth', return_value=7)
+    @patch('PostManagementAPI.metrics.get_counters')
+    def test_metrics(self, get_counters, queue_depth):
+        get_counters.return_value = {
+            'hot_cache.posts.hits': 3, 'hot_cache.posts.misses': 1,
+            'celery.replies.latency_ms.count': 4, 'celery.replies.latency_ms.sum': 1000,
+        }
+
+        response = self.client.get("/api/metrics", headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['hit_rates'], {'hot_cache.posts': 0.75})
+        self.assertEqual(response.json()['averages'], {'celery.replies.latency_ms': 250})
+        self.assertIn('hot_cache.posts.size', response.json()['gauges'])
+        self.assertEqual(response.json()['gauges']['celery.replies.depth'], 7)
+
+    def test_metrics_staff_only(self):
+        response = self.client.get("/api/metrics", headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 403)
+
+    @patch('PostManagementAPI.metrics.get_counters', side_effect=RedisError)
+    def test_metrics_unavailable(self, get_counters):
+        response = self.client.get("/api/metrics", headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 503)
+
+    @patch('PostManagementAPI.task_metrics.queue_depth', side_effect=OperationalError)
+    @patch('PostManagementAPI.metrics.get_counters', return_value={})
+    def test_metrics_broker_unavailable(self, get_counters, queue_depth):
+        response = self.client.get("/api/metrics", headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 503)
@@ -1,9 +1,16 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from ninja.testing import TestClient
+from apps.moderation.scoring import ModeratedBy
+from apps.outbox.models import OutboxEvent
+from PostManagementAPI.updates import VersionConflict
 from apps.posts.models import Post  # Adjust the import according to your project structure
 from apps.users.utils import generate_access_token
 from apps.posts.api import router
+from apps.posts.cache import post_hot_cache, post_popularity
 from datetime import timedelta
 import jwt
 from django.conf import settings
@@ -13,6 +20,9 @@ User = get_user_model()
 
 class PostTests(TestCase):
     def setUp(self):
+        cache.clear()
+        post_hot_cache.clear()
+        post_popularity.clear()
         self.client = TestClient(router)
         self.create_post_url = "/"
         self.get_posts_url = "/"
@@ -111,6 +121,103 @@ class PostTests(TestCase):
         response = self.client.delete(self.delete_post_url.format(pk=9999), headers=self.auth_headers)
         self.assertEqual(response.status_code, 404)
 
+    def test_update_post_without_text_change_skips_moderation(self):
+        updated_data = {
+            'title': self.post.title,
+            'content': self.post.content,
+            'auto_reply_enabled': True,
+            'auto_reply_delay': 30,
+        }
+        with patch('apps.moderation.scoring.predict_prob') as predict_prob:
+            response = self.client.put(self.update_post_url.format(pk=self.post.pk), json=updated_data,
+                                       headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 200)
+        predict_prob.assert_not_called()
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.auto_reply_enabled)
+        self.assertEqual(self.post.auto_reply_delay, 30)
+
+    def test_update_post_by_staff(self):
+        response = self.client.put(self.update_post_url.format(pk=self.post.pk), json=self.post_data,
+                                   headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).title, self.post_data['title'])
+
+    def test_get_post_etag(self):
+        response = self.client.get(self.get_post_url.format(pk=self.post.pk))
+
+        self.assertEqual(response['ETag'], '"1"')
+        self.assertEqual(response.json()['version'], 1)
+
+    def test_patch_post_only_sent_fields(self):
+        with patch('apps.moderation.scoring.predict_prob') as predict_prob:
+            response = self.client.patch(self.update_post_url.format(pk=self.post.pk),
+                                         json={'auto_reply_enabled': True},
+                                         headers={**self.auth_headers, 'If-Match': '"1"'})
+
+        self.assertEqual(response.status_code, 200)
+        predict_prob.assert_not_called()
+        self.assertEqual(response['ETag'], '"2"')
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.auto_reply_enabled)
+        self.assertEqual(self.post.title, 'Existing Post')
+        self.assertEqual(self.post.version, 2)
+
+    def test_patch_post_without_if_match(self):
+        response = self.client.patch(self.update_post_url.format(pk=self.post.pk), json={'title': 'New title'},
+                                     headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 428)
+
+    def test_patch_post_stale_version(self):
+        self.client.patch(self.update_post_url.format(pk=self.post.pk), json={'title': 'First'},
+                          headers={**self.auth_headers, 'If-Match': '"1"'})
+
+        response = self.client.patch(self.update_post_url.format(pk=self.post.pk), json={'title': 'Second'},
+                                     headers={**self.auth_headers, 'If-Match': '"1"'})
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).title, 'First')
+
+    def test_update_post_written_concurrently(self):
+        # Another request wrote the post between loading it and the UPDATE
+        stale = Post.objects.get(pk=self.post.pk)
+        self.post.title = 'Concurrent title'
+        self.post.save()
+        stale.title = 'Lost update'
+
+        with self.assertRaises(VersionConflict):
+            stale.save(update_fields=['title'], expected_version=1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Concurrent title')
+        self.assertEqual(self.post.version, 2)
+
+    def test_delete_post_single_update(self):
+        # The token's user, then in a savepoint one UPDATE, the outbox event and the lookup of the comments to hide
+        with patch('apps.moderation.scoring.predict_prob') as predict_prob, self.assertNumQueries(6):
+            response = self.client.delete(self.delete_post_url.format(pk=self.post.pk), headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 204)
+        predict_prob.assert_not_called()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.moderated_by, ModeratedBy.AUTHOR)
+        self.assertTrue(OutboxEvent.objects.filter(topic='post.updated', payload__is_blocked=True).exists())
+
+    def test_delete_post_by_staff(self):
+        response = self.client.delete(self.delete_post_url.format(pk=self.post.pk), headers=self.admin_headers)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).moderated_by, ModeratedBy.STAFF)
+
+    def test_delete_deleted_post_not_found(self):
+        self.client.delete(self.delete_post_url.format(pk=self.post.pk), headers=self.auth_headers)
+
+        response = self.client.delete(self.delete_post_url.format(pk=self.post.pk), headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 404)
+
     def test_get_post_comments_success(self):
         response = self.client.get(self.get_post_comments_url.format(post_id=self.post.pk))
         self.assertEqual(response.status_code, 200)
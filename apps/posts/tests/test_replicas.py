@@ -0,0 +1,121 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from PostManagementAPI.db_routers import ReplicaRouter, replica_reads, _replica_lag
+from PostManagementAPI.middleware import ReplicaRoutingMiddleware
+from PostManagementAPI.object_cache import get_cached_objects
+from apps.posts.models import Post
+from apps.users.utils import generate_access_token
+
+User = get_user_model()
+
+HAS_REPLICA_DATABASE = 'replica' in settings.DATABASES
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.auth_header = f'Bearer {generate_access_token(self.user)}'
+        _replica_lag.clear()
+        cache.clear()
+
+    def route_request(self, method, path='/api/posts/', **headers):
+        """
+        Run a request through the middleware and return the alias a read in the view would use.
+        """
+        routed_to = []
+
+        def view(request):
+            routed_to.append(self.router.db_for_read(Post))
+            return HttpResponse(status=201 if method == 'post' else 200)
+
+        request = getattr(self.factory, method)(path, headers=headers)
+        ReplicaRoutingMiddleware(view)(request)
+        return routed_to[0]
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_reads_use_primary_outside_replica_reads(self, _):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_reads_use_replica_inside_replica_reads(self, _):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_related_objects_read_from_instance_database(self, _):
+        post = Post(title='Post', content='Content', author=self.user)
+        post._state.db = 'default'
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post, instance=post), 'default')
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=30)
+    def test_lagging_replica_is_skipped(self, _):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_get_requests_read_from_replica(self, _):
+        self.assertEqual(self.route_request('get'), 'replica')
+        self.assertEqual(self.route_request('post', Authorization=self.auth_header), 'default')
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_admin_and_streams_read_from_primary(self, _):
+        self.assertEqual(self.route_request('get', '/admin/'), 'default')
+        self.assertEqual(self.route_request('get', '/api/posts/1/comments/stream'), 'default')
+        self.assertEqual(self.route_request('get', '/api/comments/comments-daily-breakdown'), 'replica')
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_read_your_writes(self, _):
+        self.route_request('post', Authorization=self.auth_header)
+
+        # The writer reads from the primary for a while, everybody else keeps using the replica
+        self.assertEqual(self.route_request('get', Authorization=self.auth_header), 'default')
+        self.assertEqual(self.route_request('get'), 'replica')
+
+    @patch('PostManagementAPI.db_routers.get_replica_lag', return_value=0)
+    def test_object_cache_filled_from_primary(self, _):
+        post = Post.objects.create(title='Post', content='Content', author=self.user)
+        cache.clear()
+
+        with replica_reads(), self.assertNumQueries(1, using='default'):
+            objects = get_cached_objects(Post, [post.pk], lambda instance: {'id': instance.pk})
+
+        self.assertEqual(objects, {post.pk: {'id': post.pk}})
+
+
+@skipUnless(HAS_REPLICA_DATABASE, "requires the 'replica' alias of PostManagementAPI.settings.test")
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingIntegrationTests(TestCase):
+    databases = {'default', 'replica'} if HAS_REPLICA_DATABASE else {'default'}
+
+    def setUp(self):
+        _replica_lag.clear()
+
+    def test_get_posts_reads_from_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries, \
+                CaptureQueriesContext(connections['default']) as primary_queries:
+            response = self.client.get('/api/posts/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(replica_queries.captured_queries), 0)
+        self.assertEqual(len(primary_queries.captured_queries), 0)
+        self.assertEqual(router.db_for_read(Post), 'default')
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ninja.testing import TestClient
+
+from apps.comments.models import Comment
+from apps.posts.api import router
+from apps.posts.models import Post
+from apps.posts.trending import trending_score, update_trending_scores, update_trending_scores_since_last_run
+
+User = get_user_model()
+
+
+class TrendingScoreTests(TestCase):
+    def test_comments_and_recency_both_count(self):
+        now = timezone.now()
+
+        self.assertGreater(trending_score(10, now), trending_score(0, now))
+        self.assertGreater(trending_score(0, now), trending_score(0, now - timedelta(days=1)))
+        # Enough comments outweigh some age
+        self.assertGreater(trending_score(1000, now - timedelta(hours=12)), trending_score(0, now))
+
+
+class TrendingUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.quiet_post = Post.objects.create(title='Quiet post', content='Content', author=self.user)
+        self.busy_post = Post.objects.create(title='Busy post', content='Content', author=self.user)
+
+    def test_full_update(self):
+        Comment.objects.bulk_create([Comment(text='Comment', post=self.busy_post, author=self.user) for _ in range(10)])
+
+        self.assertEqual(update_trending_scores(), 2)
+
+        self.quiet_post.refresh_from_db()
+        self.busy_post.refresh_from_db()
+        self.assertGreater(self.busy_post.trending_score, self.quiet_post.trending_score)
+        self.assertAlmostEqual(self.busy_post.trending_score, trending_score(10, self.busy_post.created_at))
+
+    def test_incremental_update_only_touches_active_posts(self):
+        update_trending_scores_since_last_run()
+        since = cache.get('posts:trending:watermark')
+        Post.objects.filter(pk=self.busy_post.pk).update(created_at=since - timedelta(days=1))
+        Post.objects.filter(pk=self.quiet_post.pk).update(created_at=since - timedelta(days=1))
+        Comment.objects.create(text='Comment', post=self.busy_post, author=self.user)
+
+        self.assertEqual(update_trending_scores(since, since + timedelta(minutes=1)), 1)
+
+    @override_settings(TRENDING_WINDOW=3600)
+    def test_comments_leaving_window_rescore_post(self):
+        comment = Comment.objects.create(text='Comment', post=self.busy_post, author=self.user)
+        update_trending_scores()
+        Post.objects.filter(pk=self.quiet_post.pk).update(created_at=timezone.now() - timedelta(days=1))
+        since = comment.updated_at + timedelta(minutes=30)
+
+        self.assertEqual(update_trending_scores(since, since + timedelta(hours=1)), 1)
+
+        self.busy_post.refresh_from_db()
+        self.assertAlmostEqual(self.busy_post.trending_score, trending_score(0, self.busy_post.created_at))
+
+
+@override_settings(TRENDING_PAGE_SIZE=2)
+class TrendingEndpointTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+        self.posts = [
+            Post.objects.create(title=f'Post {number}', content='Content', author=self.user, trending_score=number)
+            for number in range(3)
+        ]
+        Post.objects.filter(pk=self.posts[1].pk).set_blocked(True)
+        self.hot_post = Post.objects.create(title='Hot post', content='Content', author=self.user, trending_score=10)
+
+    def test_trending(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/trending")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['items']], [self.hot_post.pk, self.posts[2].pk])
+        self.assertTrue(data['has_more'])
+
+        data = self.client.get("/trending?page=2").json()
+        self.assertEqual([item['id'] for item in data['items']], [self.posts[0].pk])
+        self.assertFalse(data['has_more'])
+
+    def test_invalid_page(self):
+        response = self.client.get("/trending?page=0")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+
+WATERMARK_KEY = "posts:trending:watermark"
+
+
+def trending_score(comment_count: int, created_at: datetime) -> float:
+    """
+    Rank of a post in the trending feed: log10 of the comments of the last TRENDING_WINDOW seconds, plus one point per
+    TRENDING_DECAY_SECONDS of post age. Recency is measured from a fixed epoch instead of from now, so the scores of
+    posts without new activity never have to be recomputed, newer posts simply outrank them.
+    :param comment_count: visible comments of the post created in the last TRENDING_WINDOW seconds
+    :param created_at: creation time of the post
+    :return: score, higher is hotter
+    """
+    return math.log10(1 + comment_count) + created_at.timestamp() / settings.TRENDING_DECAY_SECONDS
+
+
+def _comment_counts(post_ids: Iterable[int], now: datetime) -> Dict[int, int]:
+    recent = Comment.objects.filter(
+        post_id__in=post_ids, is_blocked=False, created_at__gt=now - timedelta(seconds=settings.TRENDING_WINDOW)
+    )
+    return dict(recent.values_list('post_id').annotate(count=Count('id')).order_by())
+
+
+def _update_scores(post_ids: Iterable[int], now: datetime) -> int:
+    post_ids = list(post_ids)
+    counts = _comment_counts(post_ids, now)
+    posts = list(Post.objects.filter(pk__in=post_ids).only('pk', 'created_at'))
+    for post in posts:
+        post.trending_score = trending_score(counts.get(post.pk, 0), post.created_at)
+    # bulk_update skips save(), a derived score isn't a change of the post for the outbox, caches or the change feed
+    Post.objects.bulk_update(posts, ['trending_score'])
+    return len(posts)
+
+
+def update_trending_scores(since: Optional[datetime] = None, now: Optional[datetime] = None) -> int:
+    """
+    Recompute the scores of posts whose score may have changed since the last run: posts created since then, posts
+    with comments created, blocked or unblocked since then, and posts with comments that dropped out of the
+    TRENDING_WINDOW. Without a previous run every post is rescored.
+    :param since: time of the previous run
+    :param now: time of this run
+    :return: number of rescored posts
+    """
+    now = now or timezone.now()
+    batch_size = settings.TRENDING_BATCH_SIZE
+    updated = 0
+
+    if since is None:
+        last_pk = 0
+        post_ids_after = Post.objects.order_by('pk').values_list('pk', flat=True)
+        while True:
+            post_ids = list(post_ids_after.filter(pk__gt=last_pk)[:batch_size])
+            if not post_ids:
+                return updated
+            updated += _update_scores(post_ids, now)
+            last_pk = post_ids[-1]
+
+    window = timedelta(seconds=settings.TRENDING_WINDOW)
+    commented = Comment.objects.filter(
+        Q(updated_at__gt=since) | Q(created_at__gt=since - window, created_at__lte=now - window)
+    ).order_by().values_list('post_id', flat=True).distinct()
+    post_ids = sorted({*commented, *Post.objects.filter(created_at__gt=since).values_list('pk', flat=True)})
+    for start in range(0, len(post_ids), batch_size):
+        updated += _update_scores(post_ids[start:start + batch_size], now)
+    return updated
+
+
+def update_trending_scores_since_last_run() -> int:
+    """
+    Incremental update_trending_scores, remembering the time of the last run in the cache. Consecutive runs overlap
+    by TRENDING_UPDATE_INTERVAL seconds so that comments committed late by slow transactions aren't missed.
+    :return: number of rescored posts
+    """
+    now = timezone.now()
+    last_run = cache.get(WATERMARK_KEY)
+    since = last_run - timedelta(seconds=settings.TRENDING_UPDATE_INTERVAL) if last_run is not None else None
+    updated = update_trending_scores(since, now)
+    cache.set(WATERMARK_KEY, now, None)
+    return updated
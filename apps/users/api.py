@@ -2,12 +2,16 @@ import jwt
 from django.conf import settings
 from django.contrib.auth import get_user_model, authenticate, password_validation
 from django.core.exceptions import ValidationError
+from django.http import HttpResponse
 from ninja import Router
 
 from PostManagementAPI.schemas.errors import ErrorSchema
+from apps.users.hashers import HashingPoolBusy
+from apps.users.keys import get_jwks
 from apps.users.schema import UserRegistrationSchema, UserOutSchema, UserLoginSchema, TokenSchema, \
-    RefreshTokenSchema, AccessTokenSchema
-from apps.users.utils import generate_access_token, generate_refresh_token
+    RefreshTokenSchema, JWKSSchema
+from apps.users.utils import generate_access_token, generate_refresh_token, consume_refresh_token, \
+    revoke_refresh_token
 
 router = Router()
 
@@ -44,12 +48,15 @@ def register_user(request, data_in: UserRegistrationSchema):
         return 400, {"message": str(e)}
 
 
-@router.post("/token", response={200: TokenSchema, 401: ErrorSchema})
+@router.post("/token", response={200: TokenSchema, 401: ErrorSchema, 503: ErrorSchema})
 def token(request, data_in: UserLoginSchema):
     """
     Authenticates users based on credentials (username and password) and issues JWT tokens
     """
-    user = authenticate(username=data_in.username, password=data_in.password)
+    try:
+        user = authenticate(request, username=data_in.username, password=data_in.password)
+    except HashingPoolBusy:
+        return 503, {"message": "Too many login attempts, please try again later"}
     if user is None:
         return 401, {"message": "Invalid credentials"}
 
@@ -59,8 +66,12 @@ def token(request, data_in: UserLoginSchema):
     return 200, {"access_token": access_token, "refresh_token": refresh_token}
 
 
-@router.post("/token/refresh", response={200: AccessTokenSchema, 401: ErrorSchema, 404: ErrorSchema})
+@router.post("/token/refresh", response={200: TokenSchema, 401: ErrorSchema, 404: ErrorSchema})
 def refresh_token(request, data_in: RefreshTokenSchema):
+    """
+    Exchanges a refresh token for a new access token and a new refresh token.
+    Every refresh token can be used only once, the token it was exchanged for replaces it.
+    """
     # Extract the access token from the request data
     refresh_token = data_in.refresh_token
 
@@ -69,16 +80,48 @@ def refresh_token(request, data_in: RefreshTokenSchema):
         payload = jwt.decode(refresh_token, settings.REFRESH_TOKEN_SECRET_KEY, algorithms=['HS256'])
         user_id = payload['user_id']
 
+        # Rotate: the token is spent from now on, whether or not it was valid for this user
+        if not consume_refresh_token(refresh_token, payload):
+            return 401, {"message": "Refresh token has been revoked"}
+
         try:
             user = User.objects.get(id=user_id)
         except User.DoesNotExist:
             return 404, {"message": "User does not exist"}
 
-        # Generate a new access token
+        # Generate a new access token and the refresh token replacing the used one
         access_token = generate_access_token(user)
+        new_refresh_token = generate_refresh_token(user)
 
-        return 200, {"access_token": access_token}
+        return 200, {"access_token": access_token, "refresh_token": new_refresh_token}
     except jwt.ExpiredSignatureError:
         return 401, {"message": "Refresh token has expired"}
     except jwt.InvalidTokenError:
         return 401, {"message": "Invalid refresh token"}
+
+
+@router.post("/token/revoke", response={204: None, 401: ErrorSchema})
+def revoke_token(request, data_in: RefreshTokenSchema):
+    """
+    Revokes a refresh token, e.g. on logout or when it is known to be compromised.
+    """
+    try:
+        payload = jwt.decode(data_in.refresh_token, settings.REFRESH_TOKEN_SECRET_KEY, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        # An expired token can't be used anymore anyway
+        return 204, None
+    except jwt.InvalidTokenError:
+        return 401, {"message": "Invalid refresh token"}
+
+    revoke_refresh_token(data_in.refresh_token, payload)
+    return 204, None
+
+
+@router.get("/jwks.json", response={200: JWKSSchema})
+def jwks(request, response: HttpResponse):
+    """
+    Publishes the public keys access tokens are signed with, so other services can verify them locally.
+    The set is empty while access tokens are signed with HS256.
+    """
+    response["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE}"
+    return 200, get_jwks()
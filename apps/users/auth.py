@@ -1,8 +1,9 @@
 import jwt
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from ninja.security import HttpBearer
 
+from apps.users.utils import decode_access_token
+
 User = get_user_model()
 
 
@@ -19,7 +20,7 @@ class JWTBearer(HttpBearer):
         :return: User instance or None if the token is invalid.
         """
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+            payload = decode_access_token(token)
             user_id = payload.get('user_id')
 
             if not user_id:
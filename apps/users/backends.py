@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from apps.users.hashers import run_hasher
+
+User = get_user_model()
+
+
+def _failed_login_cache_key(user, password: str) -> str:
+    """
+    Build the cache key remembering a rejected (user, password) pair.
+
+    The stored password hash is part of the HMAC input, so the entry stops matching as soon as the password changes.
+    """
+    digest = salted_hmac("users.failed-login", f"{user.pk}:{user.password}:{password}").hexdigest()
+    return f"users:failed-login:{digest}"
+
+
+class HashingPoolModelBackend(ModelBackend):
+    """
+    ModelBackend that hashes on a bounded thread pool and remembers recently rejected credentials.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            run_hasher(make_password, password)
+            return None
+
+        failed_key = _failed_login_cache_key(user, password)
+        if cache.get(failed_key):
+            return None
+
+        # The setter runs on the pool thread, so it only records that an upgrade is due;
+        # the row itself is written from the request thread below.
+        needs_upgrade = []
+        if not run_hasher(check_password, password, user.password, needs_upgrade.append):
+            cache.set(failed_key, True, settings.FAILED_LOGIN_CACHE_TIMEOUT)
+            return None
+
+        if needs_upgrade:
+            user.password = run_hasher(make_password, password)
+            user.save(update_fields=["password"])
+
+        if self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher whose cost parameters come from settings.
+
+    The algorithm name is unchanged, so hashes created with different parameters are still verified and
+    transparently re-hashed on the next successful login.
+    """
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose iteration count comes from settings.
+    """
+    iterations = settings.PBKDF2_ITERATIONS
+
+
+class HashingPoolBusy(Exception):
+    """
+    Raised when a password hash could not be computed within PASSWORD_HASHING_TIMEOUT.
+    """
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix="password-hashing",
+                )
+    return _executor
+
+
+def run_hasher(func, *args, **kwargs):
+    """
+    Run a CPU-bound hashing function on the bounded password hashing pool.
+
+    Both hashlib and argon2 release the GIL while hashing, so at most PASSWORD_HASHING_WORKERS hashes run at the
+    same time no matter how many request threads are logging users in.
+
+    :param func: hashing function, e.g. check_password or make_password
+    :return: the result of func
+    :raises HashingPoolBusy: if the pool did not produce a result in time
+    """
+    future = _get_executor().submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise HashingPoolBusy("Password hashing pool is saturated")
@@ -0,0 +1,121 @@
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+# Minimum number of seconds between key directory re-reads triggered by unknown kids
+KEYS_RELOAD_INTERVAL = 60
+
+_last_reload = 0.0
+
+ASYMMETRIC_ALGORITHMS = {
+    "RS256": (rsa.RSAPrivateKey, rsa.RSAPublicKey),
+    "EdDSA": (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey),
+}
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    """
+    A parsed signing key. private_key is None for retired keys that are only kept to verify tokens issued with them.
+    """
+    kid: str
+    algorithm: str
+    public_key: object
+    private_key: Optional[object] = None
+
+    def to_jwk(self) -> dict:
+        if self.algorithm == "RS256":
+            jwk = RSAAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def _load_key(path: Path, algorithm: str) -> JWTKey:
+    private_type, public_type = ASYMMETRIC_ALGORITHMS[algorithm]
+    data = path.read_bytes()
+    if b"PRIVATE KEY" in data:
+        private_key = load_pem_private_key(data, password=None)
+        if not isinstance(private_key, private_type):
+            raise ImproperlyConfigured(f"JWT key {path.name} can't be used with {algorithm}")
+        return JWTKey(kid=path.stem, algorithm=algorithm, public_key=private_key.public_key(), private_key=private_key)
+
+    public_key = load_pem_public_key(data)
+    if not isinstance(public_key, public_type):
+        raise ImproperlyConfigured(f"JWT key {path.name} can't be used with {algorithm}")
+    return JWTKey(kid=path.stem, algorithm=algorithm, public_key=public_key)
+
+
+@lru_cache(maxsize=None)
+def get_jwt_keys() -> Dict[str, JWTKey]:
+    """
+    Parse every <kid>.pem file in JWT_KEYS_DIR once per process.
+
+    Private keys can sign and verify, public keys of retired signing keys can only verify. Rotating keys means adding
+    a new private key, pointing JWT_ACTIVE_KID at it and deleting the old one once its last tokens have expired.
+    :return: keys by their kid, empty when tokens are signed with HS256
+    """
+    if settings.JWT_ALGORITHM == "HS256":
+        return {}
+    if settings.JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        raise ImproperlyConfigured(f"Unsupported JWT_ALGORITHM {settings.JWT_ALGORITHM}")
+
+    keys_dir = Path(settings.JWT_KEYS_DIR)
+    return {
+        path.stem: _load_key(path, settings.JWT_ALGORITHM)
+        for path in sorted(keys_dir.glob("*.pem"))
+    }
+
+
+def get_signing_key() -> Optional[JWTKey]:
+    """
+    :return: the active asymmetric signing key or None when tokens are signed with HS256
+    :raises ImproperlyConfigured: if JWT_ACTIVE_KID has no private key in JWT_KEYS_DIR
+    """
+    if settings.JWT_ALGORITHM == "HS256":
+        return None
+
+    keys = get_jwt_keys()
+
+    key = keys.get(settings.JWT_ACTIVE_KID)
+    if key is None or key.private_key is None:
+        raise ImproperlyConfigured(f"JWT_ACTIVE_KID {settings.JWT_ACTIVE_KID!r} has no private key in JWT_KEYS_DIR")
+    return key
+
+
+def get_verification_key(kid: str) -> Optional[JWTKey]:
+    """
+    :param kid: kid header of the token
+    :return: the cached key with this kid, or None if there is no such key
+    """
+    global _last_reload
+    key = get_jwt_keys().get(kid)
+    if key is None and time.monotonic() - _last_reload > KEYS_RELOAD_INTERVAL:
+        # A key we haven't seen yet may have been rotated in by another process
+        _last_reload = time.monotonic()
+        get_jwt_keys.cache_clear()
+        key = get_jwt_keys().get(kid)
+    return key
+
+
+def get_jwks() -> dict:
+    """
+    :return: public keys as a JSON Web Key Set
+    """
+    return {"keys": [key.to_jwk() for key in get_jwt_keys().values()]}
+
+
+@receiver(setting_changed)
+def _clear_jwt_keys(setting, **kwargs):
+    if setting in ("JWT_ALGORITHM", "JWT_KEYS_DIR", "JWT_ACTIVE_KID"):
+        get_jwt_keys.cache_clear()
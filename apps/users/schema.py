@@ -1,5 +1,7 @@
+from typing import Annotated, List, Literal, Union
+
 from ninja import Schema
-from pydantic import EmailStr
+from pydantic import EmailStr, Field
 
 
 class UserRegistrationSchema(Schema):
@@ -31,3 +33,26 @@ class RefreshTokenSchema(Schema):
 
 class AccessTokenSchema(Schema):
     access_token: str
+
+
+class RSAJWKSchema(Schema):
+    kty: Literal["RSA"]
+    kid: str
+    alg: str
+    use: str
+    n: str
+    e: str
+
+
+class OKPJWKSchema(Schema):
+    # Ed25519 keys
+    kty: Literal["OKP"]
+    kid: str
+    alg: str
+    use: str
+    crv: str
+    x: str
+
+
+class JWKSSchema(Schema):
+    keys: List[Annotated[Union[RSAJWKSchema, OKPJWKSchema], Field(discriminator="kty")]]
@@ -0,0 +1,94 @@
+import tempfile
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from ninja.testing import TestClient
+
+from apps.users.api import router
+from apps.users.auth import JWTBearer
+from apps.users.utils import generate_access_token
+
+User = get_user_model()
+
+
+def write_private_key(keys_dir: Path, kid: str, private_key) -> None:
+    (keys_dir / f"{kid}.pem").write_bytes(private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ))
+
+
+def write_public_key(keys_dir: Path, kid: str, private_key) -> None:
+    (keys_dir / f"{kid}.pem").write_bytes(private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ))
+
+
+class AsymmetricKeyTests(TestCase):
+    def setUp(self):
+        self.client = TestClient(router)
+        self.jwks_url = "/jwks.json"
+
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='password123')
+
+        self.keys_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.keys_dir.cleanup)
+        self.keys_path = Path(self.keys_dir.name)
+
+    def test_jwks_empty_with_hs256(self):
+        response = self.client.get(self.jwks_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'keys': []})
+
+    def test_missing_keys_rejected_with_asymmetric_algorithm(self):
+        for algorithm in ('RS256', 'EdDSA'):
+            keys = {'JWT_ALGORITHM': algorithm, 'JWT_KEYS_DIR': self.keys_dir.name, 'JWT_ACTIVE_KID': 'current'}
+            with self.subTest(algorithm=algorithm), override_settings(**keys):
+                with self.assertRaises(ImproperlyConfigured):
+                    generate_access_token(self.user)
+
+    def test_rs256_token_verifiable_with_jwks(self):
+        write_private_key(self.keys_path, 'current', rsa.generate_private_key(public_exponent=65537, key_size=2048))
+        with override_settings(JWT_ALGORITHM='RS256', JWT_KEYS_DIR=self.keys_path, JWT_ACTIVE_KID='current'):
+            token = generate_access_token(self.user)
+            jwks = self.client.get(self.jwks_url).json()
+
+            self.assertEqual(jwt.get_unverified_header(token)['kid'], 'current')
+            self.assertEqual(JWTBearer().authenticate(None, token), self.user)
+
+        self.assertEqual(set(jwks['keys'][0]), {'kty', 'kid', 'alg', 'use', 'n', 'e'})
+        public_key = jwt.PyJWK(jwks['keys'][0]).key
+        self.assertEqual(jwt.decode(token, public_key, algorithms=['RS256'])['user_id'], self.user.id)
+
+    def test_eddsa_rotation_keeps_old_tokens_valid(self):
+        old_key = ed25519.Ed25519PrivateKey.generate()
+        write_private_key(self.keys_path, 'old', old_key)
+        with override_settings(JWT_ALGORITHM='EdDSA', JWT_KEYS_DIR=self.keys_path, JWT_ACTIVE_KID='old'):
+            old_token = generate_access_token(self.user)
+
+        # Rotate: new active key, the old one is kept for verification only
+        write_public_key(self.keys_path, 'old', old_key)
+        write_private_key(self.keys_path, 'new', ed25519.Ed25519PrivateKey.generate())
+        with override_settings(JWT_ALGORITHM='EdDSA', JWT_KEYS_DIR=self.keys_path, JWT_ACTIVE_KID='new'):
+            new_token = generate_access_token(self.user)
+            keys = self.client.get(self.jwks_url).json()['keys']
+
+            self.assertEqual({key['kid'] for key in keys}, {'old', 'new'})
+            # Only the members of OKP keys, no RSA members set to null
+            self.assertEqual(set(keys[0]), {'kty', 'kid', 'alg', 'use', 'crv', 'x'})
+            self.assertEqual(JWTBearer().authenticate(None, old_token), self.user)
+            self.assertEqual(JWTBearer().authenticate(None, new_token), self.user)
+
+    def test_hs256_tokens_rejected_when_disabled(self):
+        token = generate_access_token(self.user)
+        write_private_key(self.keys_path, 'current', ed25519.Ed25519PrivateKey.generate())
+        with override_settings(JWT_ALGORITHM='EdDSA', JWT_KEYS_DIR=self.keys_path, JWT_ACTIVE_KID='current',
+                               JWT_ACCEPT_HS256=False):
+            self.assertIsNone(JWTBearer().authenticate(None, token))
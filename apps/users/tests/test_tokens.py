@@ -1,10 +1,15 @@
+from unittest.mock import patch
+
 import jwt
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
 from django.test import TestCase
 from ninja.testing import TestClient
 
 from apps.users.api import router
+from apps.users.hashers import HashingPoolBusy
 from apps.users.utils import generate_refresh_token
 
 User = get_user_model()
@@ -16,6 +21,7 @@ class TokenTests(TestCase):
         self.register_url = "/register"
         self.token_url = "/token"
         self.refresh_url = "/token/refresh"
+        self.revoke_url = "/token/revoke"
 
         self.user_data = {
             'email': 'test@example.com',
@@ -31,6 +37,7 @@ class TokenTests(TestCase):
 
         self.user = User.objects.create_user(email=self.user_data['email'], username=self.user_data['username'],
                                              password=self.user_data['password1'])
+        cache.clear()
 
     def test_token_success(self):
         response = self.client.post(self.token_url, json=self.login_data)
@@ -48,12 +55,60 @@ class TokenTests(TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertEqual(response.json()['message'], 'Invalid credentials')
 
+    def test_token_upgrades_password_hash(self):
+        self.user.password = make_password(self.login_data['password'], hasher='pbkdf2_sha256')
+        self.user.save(update_fields=['password'])
+
+        response = self.client.post(self.token_url, json=self.login_data)
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith(settings.PASSWORD_HASHER))
+        self.assertTrue(self.user.check_password(self.login_data['password']))
+
+    def test_token_repeated_invalid_credentials_skip_hashing(self):
+        invalid_login_data = {
+            'username': 'testuser',
+            'password': 'wrongpassword',
+        }
+        with patch('apps.users.backends.check_password', wraps=check_password) as mocked_check_password:
+            for _ in range(3):
+                response = self.client.post(self.token_url, json=invalid_login_data)
+                self.assertEqual(response.status_code, 401)
+
+        self.assertEqual(mocked_check_password.call_count, 1)
+
+    def test_token_pool_busy(self):
+        with patch('apps.users.backends.run_hasher', side_effect=HashingPoolBusy):
+            response = self.client.post(self.token_url, json=self.login_data)
+        self.assertEqual(response.status_code, 503)
+
     def test_refresh_token_success(self):
         # Generate a refresh token for the user
         refresh_token = generate_refresh_token(self.user)
         response = self.client.post(self.refresh_url, json={'refresh_token': refresh_token})
         self.assertEqual(response.status_code, 200)
         self.assertIn('access_token', response.json())
+        self.assertIn('refresh_token', response.json())
+        self.assertNotEqual(response.json()['refresh_token'], refresh_token)
+
+    def test_refresh_token_rotated_token_reuse(self):
+        refresh_token = generate_refresh_token(self.user)
+        response = self.client.post(self.refresh_url, json={'refresh_token': refresh_token})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(self.refresh_url, json={'refresh_token': refresh_token})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['message'], 'Refresh token has been revoked')
+
+    def test_refresh_token_revoked(self):
+        refresh_token = generate_refresh_token(self.user)
+        response = self.client.post(self.revoke_url, json={'refresh_token': refresh_token})
+        self.assertEqual(response.status_code, 204)
+
+        response = self.client.post(self.refresh_url, json={'refresh_token': refresh_token})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['message'], 'Refresh token has been revoked')
 
     def test_refresh_token_expired(self):
         # Generate an expired refresh token for testing
@@ -1,7 +1,13 @@
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta
 
 import jwt
 from django.conf import settings
+from django.core.cache import cache
+
+from apps.users.keys import get_signing_key, get_verification_key
 
 
 def generate_access_token(user):
@@ -10,13 +16,77 @@ def generate_access_token(user):
         'exp': datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
         'iat': datetime.utcnow(),
     }
+    signing_key = get_signing_key()
+    if signing_key is not None:
+        return jwt.encode(access_token_payload, signing_key.private_key, algorithm=signing_key.algorithm,
+                          headers={'kid': signing_key.kid})
     return jwt.encode(access_token_payload, settings.SECRET_KEY, algorithm='HS256')
 
 
+def decode_access_token(token: str) -> dict:
+    """
+    Verify an access token and return its payload.
+
+    Tokens with a kid header are verified with the cached public key of that kid only, tokens without one with
+    SECRET_KEY, as long as HS256 tokens are accepted.
+    :param token: encoded access token
+    :return: decoded payload
+    :raises jwt.InvalidTokenError: if the token is invalid, expired or signed with an unknown key
+    """
+    kid = jwt.get_unverified_header(token).get('kid')
+    if kid is not None:
+        verification_key = get_verification_key(kid)
+        if verification_key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid}")
+        return jwt.decode(token, verification_key.public_key, algorithms=[verification_key.algorithm])
+
+    if settings.JWT_ALGORITHM != 'HS256' and not settings.JWT_ACCEPT_HS256:
+        raise jwt.InvalidAlgorithmError("HS256 access tokens are not accepted")
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+
+
 def generate_refresh_token(user):
     refresh_token_payload = {
         'user_id': user.id,
+        'jti': uuid.uuid4().hex,
         'exp': datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
         'iat': datetime.utcnow(),
     }
     return jwt.encode(refresh_token_payload, settings.REFRESH_TOKEN_SECRET_KEY, algorithm='HS256')
+
+
+def _refresh_token_cache_key(refresh_token: str, payload: dict) -> str:
+    # Tokens issued before jti was introduced are identified by their digest instead
+    jti = payload.get('jti') or hashlib.sha256(refresh_token.encode()).hexdigest()
+    return f"users:refresh-token:used:{jti}"
+
+
+def _refresh_token_ttl(payload: dict) -> int:
+    """
+    Seconds until the token expires; a used/revoked marker never has to outlive the token itself.
+    """
+    exp = payload.get('exp')
+    if exp is None:
+        return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+    return max(int(exp - time.time()), 1)
+
+
+def consume_refresh_token(refresh_token: str, payload: dict) -> bool:
+    """
+    Mark a decoded refresh token as used.
+
+    This is a single atomic add on the cache, so two concurrent refreshes with the same token can't both succeed.
+    :param refresh_token: encoded refresh token
+    :param payload: decoded payload of the token
+    :return: True if the token had not been used or revoked before, False otherwise
+    """
+    return cache.add(_refresh_token_cache_key(refresh_token, payload), True, _refresh_token_ttl(payload))
+
+
+def revoke_refresh_token(refresh_token: str, payload: dict) -> None:
+    """
+    Revoke a decoded refresh token so it can't be used for refreshing anymore.
+    :param refresh_token: encoded refresh token
+    :param payload: decoded payload of the token
+    """
+    cache.set(_refresh_token_cache_key(refresh_token, payload), True, _refresh_token_ttl(payload))
@@ -0,0 +1,60 @@
+"""
+Measures the per-request database connection overhead with and without persistent connections.
+
+Every simulated request goes through the same request_started/request_finished signals Django uses to decide
+whether a connection is reused or closed, and runs one trivial query.
+
+Usage (inside the web container, against the configured database):
+    python -m benchmarks.db_connections --requests 500
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PostManagementAPI.settings.development')
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connection  # noqa: E402
+
+
+def run(requests: int, conn_max_age: int) -> float:
+    """
+    :param requests: number of simulated requests
+    :param conn_max_age: CONN_MAX_AGE to simulate
+    :return: mean milliseconds per request
+    """
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        request_finished.send(sender=None)
+    elapsed = time.perf_counter() - start
+
+    connection.close()
+    return elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--conn-max-age', type=int, default=60, help="CONN_MAX_AGE of the persistent run")
+    args = parser.parse_args()
+
+    print(f"database: {connection.vendor} {connection.settings_dict['HOST'] or connection.settings_dict['NAME']}")
+    fresh = run(args.requests, 0)
+    persistent = run(args.requests, args.conn_max_age)
+    print(f"{'new connection per request (CONN_MAX_AGE=0):':<50}{fresh:8.3f} ms/request")
+    print(f"{f'persistent connection (CONN_MAX_AGE={args.conn_max_age}):':<50}{persistent:8.3f} ms/request")
+    print(f"{'connection overhead per request:':<50}{fresh - persistent:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
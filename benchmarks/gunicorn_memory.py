@@ -0,0 +1,102 @@
+"""
+Measures the memory of each gunicorn worker without preloading the application, with preloading it in the master
+and with preloading plus gc.freeze() (see PostManagementAPI/gunicorn_config.py): unique set size (USS, memory only
+that worker holds, what each additional worker costs) and proportional set size (PSS, shared pages split between the
+processes sharing them), after the workers served some requests. Linux only, reads /proc.
+
+Usage (inside the web container, with the web service stopped or on another port):
+    python -m benchmarks.gunicorn_memory --workers 4 --requests 400
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+
+def worker_pids(master_pid: int) -> List[int]:
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as children:
+        return [int(pid) for pid in children.read().split()]
+
+
+def memory(pid: int) -> Dict[str, float]:
+    """
+    :return: USS and PSS of a process in megabytes
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0]) / 1024
+    return {"uss": fields["Private_Clean"] + fields["Private_Dirty"], "pss": fields["Pss"]}
+
+
+def get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            response.read()
+            return response.status
+    except OSError:
+        return 0
+
+
+def measure(preload: bool, freeze: bool, workers: int, requests: int, port: int, path: str,
+            settle: float) -> List[Dict[str, float]]:
+    """
+    Start gunicorn, send requests to it and read the memory of its workers.
+    :return: USS and PSS of each worker
+    """
+    env = {
+        **os.environ,
+        "GUNICORN_PRELOAD": str(preload).lower(),
+        "GUNICORN_GC_FREEZE": str(freeze).lower(),
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_MAX_REQUESTS": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "python:PostManagementAPI.gunicorn_config",
+         "PostManagementAPI.wsgi:application"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}{path}"
+    try:
+        deadline = time.monotonic() + 60
+        while get(url) != 200:
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError("gunicorn didn't start")
+            time.sleep(0.5)
+        with ThreadPoolExecutor(max_workers=workers * 2) as executor:
+            list(executor.map(get, [url] * requests))
+        # Let workers still warming up (without preloading) finish
+        time.sleep(settle)
+        return [memory(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--path', default='/api/openapi.json')
+    parser.add_argument('--settle', type=float, default=3)
+    args = parser.parse_args()
+
+    variants = {"no preload": (False, False), "preload": (True, False), "preload + gc.freeze": (True, True)}
+    for label, (preload, freeze) in variants.items():
+        results = measure(preload, freeze, args.workers, args.requests, args.port, args.path, args.settle)
+        uss = sum(result["uss"] for result in results) / len(results)
+        pss = sum(result["pss"] for result in results) / len(results)
+        print(f"{f'{label}, {len(results)} workers:':<40}USS {uss:7.1f} MB/worker, PSS {pss:7.1f} MB/worker")
+
+
+if __name__ == '__main__':
+    main()
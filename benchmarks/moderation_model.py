@@ -0,0 +1,85 @@
+"""
+Compares the NumPy moderation model with profanity_check: per-text latency for single texts and batches, and the
+peak memory (peak RSS) of a fresh process that loads each model and scores one batch.
+
+Usage:
+    python -m benchmarks.moderation_model --texts 2000
+"""
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from profanity_check import profanity_check
+
+from apps.moderation.hashed_model import HashedLinearModel
+
+# Peak RSS from /proc (Linux), ru_maxrss of a child includes the peak of the parent it was forked from
+RSS_SCRIPT = """
+import sys
+def peak_rss():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+before = peak_rss()
+if sys.argv[1] == "numpy":
+    from apps.moderation.hashed_model import HashedLinearModel
+    predict_prob = HashedLinearModel.load(sys.argv[2]).predict_prob
+else:
+    from profanity_check import predict_prob
+predict_prob(["some text to score"] * 100)
+print(before, peak_rss())
+"""
+
+
+def corpus(size: int):
+    rng = random.Random(0)
+    words = sorted(profanity_check.vectorizer.vocabulary_) + ["the", "and", "of"] * 200
+    return [" ".join(rng.choices(words, k=rng.randint(5, 60))) for _ in range(size)]
+
+
+def latency(predict_prob, texts, batch_size: int) -> float:
+    """
+    :return: mean microseconds per text
+    """
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        predict_prob(texts[offset:offset + batch_size])
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def peak_rss(implementation: str, model_dir: str):
+    """
+    :return: peak RSS in megabytes of a fresh interpreter before and after loading the model and scoring a batch
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", RSS_SCRIPT, implementation, model_dir], capture_output=True, text=True, check=True
+    ).stdout
+    before, after = (int(value) / 1024 for value in output.split())
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = corpus(args.texts)
+    model = HashedLinearModel.from_sklearn(profanity_check.vectorizer, profanity_check.model)
+    implementations = {"profanity_check": profanity_check.predict_prob, "numpy": model.predict_prob}
+
+    for batch_size in (1, 100):
+        for name, predict_prob in implementations.items():
+            per_text = latency(predict_prob, texts, batch_size)
+            print(f"{f'{name}, batches of {batch_size}:':<40}{per_text:10.1f} us/text")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        model.save(model_dir)
+        for name in implementations:
+            before, after = peak_rss(name, model_dir)
+            print(f"{f'{name}, peak RSS:':<40}{after:10.1f} MB ({after - before:.1f} MB for the model)")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,9 @@ set -e
 
 ./wait-for-it.sh $DB_HOST:$PGPORT -t 60
 
+echo "Exporting the moderation model..."
+python manage.py export_moderation_model --skip-existing
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
@@ -19,6 +22,6 @@ echo "Database is ready. Starting the development server..."
 ./wait-for-it.sh nginx:80 -- echo "Nginx is ready to accept connections."
 
 # Start the development server
-gunicorn PostManagementAPI.wsgi:application --bind 0.0.0.0:8000 --access-logfile - --error-logfile - --workers 4 --threads 4
+gunicorn -c python:PostManagementAPI.gunicorn_config PostManagementAPI.wsgi:application
 
 exec "$@"
\ No newline at end of file